@@ -0,0 +1,206 @@
+"""
+Agent Adapters
+Async BaseAgent wrappers around the sync CrewAI agents so the
+orchestrator can route tasks to them. Crew calls block, so they run on
+the shared agent executor; agent instances come from a pool that is
+filled in initialize() and released in shutdown().
+"""
+
+from abc import abstractmethod
+from typing import Any, Callable, Dict, List, Optional, Tuple
+
+from agents.base_agent import BaseAgent
+from utils.agent_executor import AgentExecutor, get_agent_executor
+from utils.agent_pool import AgentPool, lazy_factory, pool_size_for
+
+
+def _text(value: Any, key: str) -> Any:
+    """Upstream stage output: the adapter result dict's `key`, or the value itself"""
+    return value.get(key, value) if isinstance(value, dict) else value
+
+
+def _vehicle(data: Dict[str, Any]) -> Dict[str, Any]:
+    vehicle = data.get("vehicle")
+    if not vehicle:
+        raise ValueError("Task data has no vehicle")
+    return vehicle
+
+
+class CrewAgentAdapter(BaseAgent):
+    """
+    Runs one kind of CrewAI agent under the BaseAgent contract
+
+    Subclasses set agent_type and factory_path and implement run(), which
+    is called on an executor thread with a pooled CrewAI agent and the
+    task data.
+    """
+
+    agent_type = ""
+    factory_path = ""
+
+    def __init__(self, executor: Optional[AgentExecutor] = None,
+                 factory: Optional[Callable[[], Any]] = None, pool_size: Optional[int] = None):
+        super().__init__(agent_id=f"{self.agent_type}_adapter", agent_name=self.agent_type)
+        self.executor = executor
+        self.factory = factory or lazy_factory(self.factory_path)
+        self.pool_size = pool_size or pool_size_for(self.agent_type)
+        self.pool: Optional[AgentPool] = None
+
+    async def initialize(self) -> bool:
+        """Build the CrewAI agents up front (imports crewai on first use)"""
+        if self.executor is None:
+            self.executor = get_agent_executor()
+        if self.pool is None:
+            pool = AgentPool(self.agent_type, self.factory, self.pool_size)
+            await self.executor.run(pool.warm)
+            self.pool = pool
+        return True
+
+    async def shutdown(self) -> bool:
+        """Drop the pooled agents and their LLM clients"""
+        self.pool = None
+        return True
+
+    async def process_task(self, task: Dict[str, Any]) -> Dict[str, Any]:
+        return await self._call(self.run, task["data"])
+
+    async def _call(self, method: Callable[..., Any], *args) -> Any:
+        pool = self.pool
+        if pool is None:
+            raise RuntimeError(f"{self.agent_type} adapter is not initialized")
+
+        def call():
+            with pool.agent() as agent:
+                return method(agent, *args)
+
+        return await self.executor.run(call)
+
+    @abstractmethod
+    def run(self, agent: Any, data: Dict[str, Any]) -> Dict[str, Any]:
+        """Do the task with a checked-out CrewAI agent (runs on an executor thread)"""
+
+
+class DataAnalysisAdapter(CrewAgentAdapter):
+    """Analyzes data["vehicle"]; batches many vehicles into one LLM call"""
+
+    agent_type = "data_analysis"
+    factory_path = "agents.data_analysis_agent.agent:DataAnalysisAgent"
+
+    def run(self, agent, data):
+        vehicle = _vehicle(data)
+        return {
+            "vehicle_id": vehicle.get("vehicle_id"),
+            "analysis": agent.analyze(vehicle, use_cache=data.get("use_cache", True)),
+            "source": "agent",
+        }
+
+    async def process_batch(self, tasks: List[Dict[str, Any]]) -> List[Any]:
+        """
+        One result per task; tasks without a vehicle or a report fail on their own
+
+        Tasks are grouped by their use_cache flag, so a task asking for a
+        fresh analysis never gets a cached report.
+        """
+        results: List[Any] = [None] * len(tasks)
+        groups: Dict[bool, List[Tuple[int, Dict[str, Any]]]] = {}
+        for i, task in enumerate(tasks):
+            try:
+                vehicle = _vehicle(task["data"])
+            except ValueError as e:
+                results[i] = e
+                continue
+            groups.setdefault(bool(task["data"].get("use_cache", True)), []).append((i, vehicle))
+        if groups:
+            def analyze(agent):
+                return {
+                    use_cache: agent.analyze_batch([vehicle for _, vehicle in members], use_cache=use_cache)
+                    for use_cache, members in groups.items()
+                }
+
+            reports = await self._call(analyze)
+            for use_cache, members in groups.items():
+                for (i, vehicle), report in zip(members, reports[use_cache]):
+                    if isinstance(report, Exception):
+                        results[i] = report
+                    else:
+                        results[i] = {"vehicle_id": vehicle.get("vehicle_id"), "analysis": report,
+                                      "source": "agent"}
+        return results
+
+
+class DiagnosisAdapter(CrewAgentAdapter):
+    """Diagnoses data["vehicle"] from the data-analysis result in data["analysis"]"""
+
+    agent_type = "diagnosis"
+    factory_path = "agents.diagnosis_agent.agent:DiagnosisAgent"
+
+    def run(self, agent, data):
+        vehicle = _vehicle(data)
+        analysis = _text(data["analysis"], "analysis")
+        return {
+            "vehicle_id": vehicle.get("vehicle_id"),
+            "diagnosis": agent.diagnose(analysis, vehicle, use_cache=data.get("use_cache", True)),
+        }
+
+
+class CustomerEngagementAdapter(CrewAgentAdapter):
+    """Writes a call script for the owner of data["vehicle"] from data["diagnosis"]"""
+
+    agent_type = "customer_engagement"
+    factory_path = "agents.customer_engagement_agent.agent:CustomerEngagementAgent"
+
+    def run(self, agent, data):
+        vehicle = _vehicle(data)
+        diagnosis = _text(data["diagnosis"], "diagnosis")
+        return {
+            "vehicle_id": vehicle.get("vehicle_id"),
+            "call_script": agent.generate_call_script(vehicle.get("owner"), diagnosis),
+        }
+
+
+class SchedulingAdapter(CrewAgentAdapter):
+    """Books an appointment for the owner of data["vehicle"]"""
+
+    agent_type = "scheduling"
+    factory_path = "agents.scheduling_agent.agent:SchedulingAgent"
+
+    def run(self, agent, data):
+        vehicle = _vehicle(data)
+        customer = {
+            "name": vehicle.get("owner"),
+            "phone": vehicle.get("phone"),
+            "preferred_time": data.get("preferred_time"),
+        }
+        return {
+            "vehicle_id": vehicle.get("vehicle_id"),
+            "booking": agent.schedule_appointment(customer),
+        }
+
+
+class FeedbackAdapter(CrewAgentAdapter):
+    """Generates a post-service survey"""
+
+    agent_type = "feedback"
+    factory_path = "agents.feedback_agent.agent:FeedbackAgent"
+
+    def run(self, agent, data):
+        return {"survey": agent.generate_survey()}
+
+
+ADAPTERS = [
+    DataAnalysisAdapter,
+    DiagnosisAdapter,
+    CustomerEngagementAdapter,
+    SchedulingAdapter,
+    FeedbackAdapter,
+]
+
+
+def register_crew_agents(orchestrator):
+    """
+    Register an adapter for every CrewAI agent on the orchestrator
+
+    Module-level so it can also serve as a ShardedOrchestrator agent factory.
+    """
+    for adapter_class in ADAPTERS:
+        orchestrator.register_agent(adapter_class.agent_type, adapter_class())
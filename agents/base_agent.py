@@ -3,11 +3,19 @@ Base Agent Class
 All specialized agents inherit from this base class
 """
 from abc import ABC, abstractmethod
-from typing import Dict, Any, Optional
+from typing import Awaitable, Dict, Any, List, Optional
 from datetime import datetime
+import time
 import logging
 from enum import Enum
 
+from utils.metrics import AGENT_TASK_DURATION, AGENT_TASK_QUEUE_WAIT, Histogram
+
+# Weight of the newest task in the latency moving average
+EWMA_ALPHA = 0.2
+# Tasks needed before the p99 latency budget is enforced by is_healthy()
+MIN_LATENCY_SAMPLES = 20
+
 class AgentStatus(Enum):
     IDLE = "idle"
     RUNNING = "running"
@@ -28,9 +36,10 @@ class BaseAgent(ABC):
     - State management
     - Message handling
     - Error handling
+    - Task timing (run tasks through execute() to record it)
     """
     
-    def __init__(self, agent_id: str, agent_name: str):
+    def __init__(self, agent_id: str, agent_name: str, latency_budget_seconds: Optional[float] = None):
         self.agent_id = agent_id
         self.agent_name = agent_name
         self.status = AgentStatus.IDLE
@@ -39,6 +48,13 @@ class BaseAgent(ABC):
         self.task_count = 0
         self.error_count = 0
         
+        # Timing; is_healthy() fails once p99 latency exceeds latency_budget_seconds
+        self.latency_budget_seconds = latency_budget_seconds
+        self.in_flight = 0
+        self.ewma_latency: Optional[float] = None
+        self.latency = Histogram("task_duration_seconds", "Task wall time")
+        self.queue_wait = Histogram("task_queue_wait_seconds", "Task queue wait")
+        
         # Setup logging
         self.logger = logging.getLogger(f"agent.{agent_name}")
         self.logger.info(f"Agent {agent_name} initialized with ID: {agent_id}")
@@ -51,6 +67,54 @@ class BaseAgent(ABC):
         """
         pass
     
+    async def execute(self, task: Dict[str, Any]) -> Dict[str, Any]:
+        """Run process_task and record its timing"""
+        return await self._timed(self.process_task(task), [task])
+    
+    async def execute_batch(self, tasks: List[Dict[str, Any]]) -> List[Any]:
+        """
+        Run process_batch (for agents that implement it) and record its timing
+        
+        Every task in the batch is recorded with the batch's wall time,
+        since that is how long each of them took.
+        """
+        return await self._timed(self.process_batch(tasks), tasks)
+    
+    async def _timed(self, call: Awaitable, tasks: List[Dict[str, Any]]):
+        now = datetime.now()
+        for task in tasks:
+            wait = self._queue_wait(task, now)
+            if wait is not None:
+                self.queue_wait.observe(wait)
+                AGENT_TASK_QUEUE_WAIT.observe(wait, agent=self.agent_name)
+        
+        self.in_flight += len(tasks)
+        started = time.perf_counter()
+        try:
+            return await call
+        finally:
+            elapsed = time.perf_counter() - started
+            self.in_flight -= len(tasks)
+            for _ in tasks:
+                self.latency.observe(elapsed)
+                AGENT_TASK_DURATION.observe(elapsed, agent=self.agent_name)
+                self.update_activity()
+            self.ewma_latency = elapsed if self.ewma_latency is None else \
+                EWMA_ALPHA * elapsed + (1 - EWMA_ALPHA) * self.ewma_latency
+    
+    @staticmethod
+    def _queue_wait(task: Dict[str, Any], now: datetime) -> Optional[float]:
+        """Seconds since the orchestrator stamped the task, if it did"""
+        try:
+            return max(0.0, (now - datetime.fromisoformat(task["timestamp"])).total_seconds())
+        except (KeyError, TypeError, ValueError):
+            return None
+    
+    def latency_budget_exceeded(self) -> bool:
+        if self.latency_budget_seconds is None or self.latency.count() < MIN_LATENCY_SAMPLES:
+            return False
+        return self.latency.quantile(0.99) > self.latency_budget_seconds
+    
     @abstractmethod
     async def initialize(self) -> bool:
         """
@@ -99,9 +163,23 @@ class BaseAgent(ABC):
             "created_at": self.created_at.isoformat(),
             "last_activity": self.last_activity.isoformat(),
             "task_count": self.task_count,
-            "error_count": self.error_count
+            "error_count": self.error_count,
+            "in_flight": self.in_flight,
+            "latency_seconds": {
+                "ewma": _round(self.ewma_latency),
+                **{f"p{int(q * 100)}": _round(self.latency.quantile(q)) for q in (0.5, 0.95, 0.99)},
+                "budget_p99": self.latency_budget_seconds
+            },
+            "queue_wait_seconds": {
+                f"p{int(q * 100)}": _round(self.queue_wait.quantile(q)) for q in (0.5, 0.95, 0.99)
+            }
         }
     
     def is_healthy(self) -> bool:
         """Check if agent is healthy"""
-        return self.status == AgentStatus.RUNNING and self.error_count < 10
+        return self.status == AgentStatus.RUNNING and self.error_count < 10 \
+            and not self.latency_budget_exceeded()
+
+
+def _round(value: Optional[float]) -> Optional[float]:
+    return None if value is None else round(value, 4)
@@ -0,0 +1,78 @@
+"""
+LLM Callback Handlers
+Shared LangChain callback handlers attached to every agent's LLM
+"""
+
+import time
+from typing import Any, Callable, Dict, List, Optional, Tuple
+from uuid import UUID
+
+from langchain_core.callbacks import BaseCallbackHandler
+from langchain_core.outputs import LLMResult
+
+from utils.metrics import LLM_REQUEST_DURATION, LLM_TOKENS
+
+
+class TokenRelay(BaseCallbackHandler):
+    """
+    Forwards streamed LLM tokens to the current holder of the agent
+
+    Each agent owns one relay. Whoever checks the agent out sets sink for
+    the duration of a call and clears it afterwards; with no sink attached
+    tokens are simply dropped.
+    """
+
+    def __init__(self):
+        self.sink: Optional[Callable[[str], None]] = None
+
+    def on_llm_new_token(self, token: str, **kwargs: Any) -> None:
+        sink = self.sink
+        if sink is not None and token:
+            sink(token)
+
+
+class LLMUsageRecorder(BaseCallbackHandler):
+    """Records per-agent LLM request latency and token usage metrics"""
+
+    def __init__(self, agent_type: str):
+        self.agent_type = agent_type
+        self._started: Dict[UUID, float] = {}
+
+    def on_llm_start(self, serialized: Dict[str, Any], prompts: List[str], *,
+                     run_id: UUID, **kwargs: Any) -> None:
+        self._started[run_id] = time.perf_counter()
+
+    def on_chat_model_start(self, serialized: Dict[str, Any], messages: List[List[Any]], *,
+                            run_id: UUID, **kwargs: Any) -> None:
+        self._started[run_id] = time.perf_counter()
+
+    def on_llm_end(self, response: LLMResult, *, run_id: UUID, **kwargs: Any) -> None:
+        started = self._started.pop(run_id, None)
+        if started is not None:
+            LLM_REQUEST_DURATION.observe(time.perf_counter() - started, agent=self.agent_type)
+
+        prompt_tokens, completion_tokens = _token_usage(response)
+        if prompt_tokens:
+            LLM_TOKENS.inc(prompt_tokens, agent=self.agent_type, kind="prompt")
+        if completion_tokens:
+            LLM_TOKENS.inc(completion_tokens, agent=self.agent_type, kind="completion")
+
+    def on_llm_error(self, error: BaseException, *, run_id: UUID, **kwargs: Any) -> None:
+        self._started.pop(run_id, None)
+
+
+def _token_usage(response: LLMResult) -> Tuple[int, int]:
+    """Prompt and completion token counts from a (possibly streamed) LLM result"""
+    usage = (response.llm_output or {}).get("token_usage") or {}
+    if usage:
+        return usage.get("prompt_tokens", 0), usage.get("completion_tokens", 0)
+
+    # Streamed chat responses carry usage on the message instead
+    prompt_tokens = completion_tokens = 0
+    for generations in response.generations:
+        for generation in generations:
+            metadata = getattr(getattr(generation, "message", None), "usage_metadata", None)
+            if metadata:
+                prompt_tokens += metadata.get("input_tokens", 0)
+                completion_tokens += metadata.get("output_tokens", 0)
+    return prompt_tokens, completion_tokens
@@ -0,0 +1,77 @@
+"""
+CrewAI LLM Adapter
+Lets CrewAI agents run on a LangChain chat model. CrewAI 1.x only accepts
+its own LLM classes and rebuilds anything else from the model name, which
+drops the shared HTTP client (rate limits, response cache, fake backend)
+and the callbacks in agents/callbacks.py; this adapter keeps them
+"""
+
+import logging
+from typing import Any, Dict, List, Optional, Union
+
+from crewai import BaseLLM
+from crewai.events.types.llm_events import LLMCallType
+from crewai.llms.base_llm import llm_call_context
+from langchain_core.language_models import BaseChatModel
+from pydantic import PrivateAttr
+
+logger = logging.getLogger("crew_llm")
+
+
+class ChatModelLLM(BaseLLM):
+    """
+    CrewAI LLM that sends every call through a LangChain chat model
+
+    Messages go to chat_model.invoke() unchanged, so its http_client,
+    streaming and callbacks apply to CrewAI calls too. Native tool calling
+    is not supported; none of the agents use tools.
+    """
+
+    llm_type: str = "langchain"
+    _chat_model: BaseChatModel = PrivateAttr()
+
+    def __init__(self, chat_model: BaseChatModel, **kwargs: Any):
+        super().__init__(
+            model=getattr(chat_model, "model_name", None) or chat_model.get_name(),
+            temperature=getattr(chat_model, "temperature", None),
+            stream=getattr(chat_model, "streaming", None),
+            provider="openai",
+            **kwargs,
+        )
+        self._chat_model = chat_model
+
+    @property
+    def chat_model(self) -> BaseChatModel:
+        return self._chat_model
+
+    def call(self, messages: Union[str, List[Dict[str, Any]]], tools: Optional[List[Any]] = None,
+             callbacks: Optional[List[Any]] = None, available_functions: Optional[Dict[str, Any]] = None,
+             from_task: Any = None, from_agent: Any = None, response_model: Any = None) -> str:
+        """Complete messages with the chat model and return the reply text"""
+        with llm_call_context():
+            self._emit_call_started_event(
+                messages=messages, callbacks=callbacks,
+                from_task=from_task, from_agent=from_agent,
+            )
+            try:
+                formatted = self._format_messages(messages)
+                self._invoke_before_llm_call_hooks(formatted, from_agent)
+                reply = self._chat_model.invoke(
+                    [(message["role"], message["content"]) for message in formatted],
+                    stop=self.stop_sequences or None,
+                )
+            except Exception as e:
+                logger.error(f"LLM call failed: {str(e)}")
+                self._emit_call_failed_event(error=str(e), from_task=from_task, from_agent=from_agent)
+                raise
+
+            content = self._apply_stop_words(reply.content)
+            self._emit_call_completed_event(
+                response=content,
+                call_type=LLMCallType.LLM_CALL,
+                from_task=from_task,
+                from_agent=from_agent,
+                messages=formatted,
+                usage=getattr(reply, "usage_metadata", None),
+            )
+            return self._invoke_after_llm_call_hooks(formatted, content, from_agent)
@@ -3,18 +3,19 @@ Customer Engagement Agent
 Generates natural conversation scripts for customer communication
 """
 
-import os
 from crewai import Agent, Task, Crew
-from langchain_openai import ChatOpenAI
+from agents.callbacks import LLMUsageRecorder, TokenRelay
+from agents.llm import get_llm
 
 class CustomerEngagementAgent:
     """Agent for customer communication and engagement"""
     
     def __init__(self):
         """Initialize the Customer Engagement Agent"""
-        self.llm = ChatOpenAI(
-            model=os.getenv("OPENAI_MODEL", "gpt-4o-mini"),
-            temperature=0.7
+        self.token_relay = TokenRelay()
+        self.llm = get_llm(
+            0.7,
+            callbacks=[self.token_relay, LLMUsageRecorder("customer_engagement")]
         )
         
         self.agent = Agent(
@@ -4,18 +4,60 @@ Processes vehicle telemetry data and detects anomalies
 """
 
 import os
+import json
+from typing import Any, Dict, List
 from crewai import Agent, Task, Crew
-from langchain_openai import ChatOpenAI
+from agents.callbacks import LLMUsageRecorder, TokenRelay
+from agents.llm import default_model, get_llm
+from agents.data_analysis_agent.rules import describe_thresholds, evaluate_fleet, evaluate_vehicle, healthy_report
+from utils.result_cache import cache_key, result_cache
+
+
+def parse_batch_reports(text: str, count: int) -> Dict[int, str]:
+    """
+    Extract {ref: report} from a multi-vehicle reply
+
+    The reply should hold a JSON array of {"ref": int, "report": str}.
+    Surrounding prose or code fences are ignored; entries with an unknown
+    ref or no report are dropped, so the caller can re-run just those.
+    """
+    start, end = text.find("["), text.rfind("]")
+    if start == -1 or end < start:
+        return {}
+    try:
+        entries = json.loads(text[start:end + 1])
+    except json.JSONDecodeError:
+        return {}
+    reports = {}
+    for entry in entries if isinstance(entries, list) else []:
+        if not isinstance(entry, dict):
+            continue
+        ref, report = entry.get("ref"), entry.get("report")
+        if not isinstance(ref, int) or not 0 <= ref < count or not report:
+            continue
+        if not isinstance(report, str):
+            report = "\n".join(f"{k}: {v}" for k, v in report.items()) if isinstance(report, dict) else str(report)
+        reports[ref] = report
+    return reports
 
 
 class DataAnalysisAgent:
     """Agent for analyzing vehicle sensor data"""
     
+    # Bump whenever the task prompt changes so cached results are not reused
+    PROMPT_VERSION = "2"
+    # Batch LLM calls per analyze_batch before vehicles missing from the reply fail
+    BATCH_REPLY_ATTEMPTS = 2
+    
     def __init__(self):
         """Initialize the Data Analysis Agent"""
-        self.llm = ChatOpenAI(
-            model=os.getenv("OPENAI_MODEL", "gpt-4o-mini"),
-            temperature=float(os.getenv("TEMPERATURE", "0.3"))
+        self.model = default_model()
+        self.temperature = float(os.getenv("TEMPERATURE", "0.3"))
+        self.token_relay = TokenRelay()
+        self.llm = get_llm(
+            self.temperature,
+            callbacks=[self.token_relay, LLMUsageRecorder("data_analysis")],
+            model=self.model
         )
         
         self.agent = Agent(
@@ -26,12 +68,14 @@ class DataAnalysisAgent:
             verbose=True
         )
     
-    def analyze(self, vehicle_data):
+    def analyze(self, vehicle_data, use_cache=True, use_rules=True):
         """
         Analyze vehicle sensor data
         
         Args:
             vehicle_data: Dictionary containing vehicle type and sensor readings
+            use_cache: Return a cached report for identical inputs if available
+            use_rules: Skip the LLM when the threshold rules find no anomalies
             
         Returns:
             Analysis report with anomalies and recommendations
@@ -39,22 +83,24 @@ class DataAnalysisAgent:
         vehicle_type = vehicle_data.get("type", "Unknown")
         sensor_data = vehicle_data.get("sensor_data", {})
         
+        if use_rules and not evaluate_vehicle(vehicle_data)["needs_llm"]:
+            return healthy_report()
+        
+        key = self._cache_key(vehicle_data)
+        if use_cache:
+            cached = result_cache.get(key)
+            if cached is not None:
+                return cached
+        
+        thresholds = "\n".join(
+            f"            {line}" if line else "" for line in describe_thresholds().splitlines()
+        )
         task = Task(
             description=f"""
             Analyze this {vehicle_type} vehicle's sensor data: {sensor_data}
             
             Thresholds:
-            ICE Vehicles:
-            - Engine Temp: 80-90°C normal, >100°C critical
-            - Oil Pressure: 40-60 PSI normal, <30 PSI critical
-            - Battery Voltage: 12.6-14.4V normal, <12V critical
-            - Brake Wear: <50% good, >75% critical
-            
-            EV Vehicles:
-            - Battery SOH: 85-100% good, <70% critical
-            - Battery Temp: 20-45°C normal, >60°C critical
-            - Motor Temp: <80°C normal, >95°C critical
-            - Brake Wear: <50% good, >75% critical
+{thresholds}
             
             Return structured analysis with:
             - Anomalies Found: [list]
@@ -72,8 +118,106 @@ class DataAnalysisAgent:
             verbose=False
         )
         
-        result = crew.kickoff()
-        return str(result)
+        result = str(crew.kickoff())
+        result_cache.set(key, result)
+        return result
+    
+    def _cache_key(self, vehicle_data: Dict[str, Any]) -> str:
+        return cache_key(
+            "data_analysis", self.PROMPT_VERSION, self.model, self.temperature,
+            {"type": vehicle_data.get("type", "Unknown"), "sensor_data": vehicle_data.get("sensor_data", {})}
+        )
+    
+    def analyze_batch(self, vehicles: List[Dict[str, Any]], use_cache=True, use_rules=True) -> List[str]:
+        """
+        Analyze several vehicles with a single LLM call
+        
+        Vehicles that pass the threshold rules or have a cached report are
+        answered without the LLM; the rest share one prompt, so the fixed
+        preamble (role, thresholds, output format) is paid once per batch.
+        Batch reports use the same format as analyze() and share its cache
+        entries. Vehicles missing from a partial reply are sent again in
+        one smaller batch; a reply with no usable reports at all (e.g. JSON
+        truncated at the output limit) gets its batch split in half
+        instead. Each vehicle is sent at most BATCH_REPLY_ATTEMPTS times;
+        those still missing get a ValueError instead of a report, so one
+        bad reply never turns into a run of serial calls.
+        
+        Returns:
+            One analysis report (or ValueError) per vehicle, in input order
+        """
+        reports: List[Any] = [None] * len(vehicles)
+        findings = evaluate_fleet(vehicles) if use_rules else [{"needs_llm": True}] * len(vehicles)
+        todo = []
+        for i, (vehicle, finding) in enumerate(zip(vehicles, findings)):
+            if not finding["needs_llm"]:
+                reports[i] = healthy_report()
+                continue
+            cached = result_cache.get(self._cache_key(vehicle)) if use_cache else None
+            if cached is not None:
+                reports[i] = cached
+            else:
+                todo.append(i)
+        
+        if len(todo) == 1:
+            reports[todo[0]] = self.analyze(vehicles[todo[0]], use_cache=False, use_rules=False)
+            todo = []
+        # (vehicle indexes, attempt) still to send, next batch last
+        pending = [(todo, 1)] if todo else []
+        while pending:
+            batch, attempt = pending.pop()
+            parsed = self._analyze_together([vehicles[i] for i in batch])
+            for ref, i in enumerate(batch):
+                if ref in parsed:
+                    reports[i] = parsed[ref]
+                    result_cache.set(self._cache_key(vehicles[i]), parsed[ref])
+            missing = [i for ref, i in enumerate(batch) if ref not in parsed]
+            if not missing:
+                continue
+            if attempt >= self.BATCH_REPLY_ATTEMPTS:
+                for i in missing:
+                    reports[i] = ValueError(
+                        f"No analysis for vehicle {vehicles[i].get('vehicle_id', i)} in the batch reply"
+                    )
+            elif parsed or len(missing) == 1:
+                pending.append((missing, attempt + 1))
+            else:
+                half = len(missing) // 2
+                pending += [(missing[half:], attempt + 1), (missing[:half], attempt + 1)]
+        return reports
+    
+    def _analyze_together(self, vehicles: List[Dict[str, Any]]) -> Dict[int, str]:
+        """One LLM call for all vehicles; returns {index: report} for those in the reply"""
+        batch = [
+            {"ref": ref, "type": vehicle.get("type", "Unknown"),
+             "sensor_data": vehicle.get("sensor_data", {})}
+            for ref, vehicle in enumerate(vehicles)
+        ]
+        thresholds = "\n".join(
+            f"            {line}" if line else "" for line in describe_thresholds().splitlines()
+        )
+        task = Task(
+            description=f"""
+            Analyze the sensor data of each of these {len(batch)} vehicles independently:
+            {json.dumps(batch)}
+            
+            Thresholds:
+{thresholds}
+            
+            For every vehicle write a structured analysis with:
+            - Anomalies Found: [list]
+            - Severity Level: LOW/MEDIUM/HIGH/CRITICAL
+            - Recommended Action: [action]
+            - Time to Failure: [estimate]
+            
+            Reply with only a JSON array containing one object per vehicle:
+            [{{"ref": <ref>, "report": "<analysis>"}}]
+            """,
+            agent=self.agent,
+            expected_output="JSON array of per-vehicle analysis reports keyed by ref"
+        )
+        crew = Crew(agents=[self.agent], tasks=[task], verbose=False)
+        return parse_batch_reports(str(crew.kickoff()), len(batch))
 
 
 if __name__ == "__main__":
@@ -0,0 +1,168 @@
+"""
+Sensor Threshold Rules
+Deterministic, vectorized threshold checks used as a fast path before
+the LLM: vehicles with every reading in range never need an LLM call
+"""
+
+from typing import Any, Dict, Iterable, List
+
+import numpy as np
+
+SEVERITY_LEVELS = ["LOW", "MEDIUM", "HIGH", "CRITICAL"]
+
+# Each rule: normal operating range (None = open-ended) and the limit past
+# which the reading is critical. Readings outside the normal range are
+# MEDIUM, past the midpoint between the normal bound and the critical limit
+# HIGH, and beyond the critical limit CRITICAL.
+THRESHOLDS: List[Dict[str, Any]] = [
+    {"metric": "engine_temp", "label": "Engine Temp", "unit": "°C",
+     "vehicle_types": ("ICE",), "normal": (80, 90), "critical": (">", 100)},
+    {"metric": "oil_pressure", "label": "Oil Pressure", "unit": " PSI",
+     "vehicle_types": ("ICE",), "normal": (40, 60), "critical": ("<", 30)},
+    {"metric": "battery_voltage", "label": "Battery Voltage", "unit": "V",
+     "vehicle_types": ("ICE",), "normal": (12.6, 14.4), "critical": ("<", 12)},
+    {"metric": "brake_wear", "label": "Brake Wear", "unit": "%",
+     "vehicle_types": ("ICE",), "normal": (None, 50), "critical": (">", 75)},
+    {"metric": "battery_soh", "label": "Battery SOH", "unit": "%",
+     "vehicle_types": ("EV",), "normal": (85, 100), "critical": ("<", 70)},
+    {"metric": "battery_temp", "label": "Battery Temp", "unit": "°C",
+     "vehicle_types": ("EV",), "normal": (20, 45), "critical": (">", 60)},
+    {"metric": "motor_temp", "label": "Motor Temp", "unit": "°C",
+     "vehicle_types": ("EV",), "normal": (None, 80), "critical": (">", 95)},
+    {"metric": "brake_wear", "label": "Brake Wear", "unit": "%",
+     "vehicle_types": ("EV",), "normal": (None, 50), "critical": (">", 75)},
+]
+
+COVERED_VEHICLE_TYPES = sorted({t for rule in THRESHOLDS for t in rule["vehicle_types"]})
+
+
+def _reading(value: Any) -> float:
+    """Sensor value as a float; missing or non-numeric values (e.g. "N/A") are NaN"""
+    try:
+        return float(value)
+    except (TypeError, ValueError):
+        return np.nan
+
+
+def _format_number(value: float) -> str:
+    return f"{value:g}"
+
+
+def describe_thresholds() -> str:
+    """Render the thresholds as the prose block used in the LLM prompt"""
+    sections = []
+    for vehicle_type in ("ICE", "EV"):
+        lines = [f"{vehicle_type} Vehicles:"]
+        for rule in THRESHOLDS:
+            if vehicle_type not in rule["vehicle_types"]:
+                continue
+            low, high = rule["normal"]
+            if low is None:
+                normal = f"<{_format_number(high)}{rule['unit']}"
+            else:
+                normal = f"{_format_number(low)}-{_format_number(high)}{rule['unit']}"
+            op, limit = rule["critical"]
+            lines.append(
+                f"- {rule['label']}: {normal} normal, "
+                f"{op}{_format_number(limit)}{rule['unit']} critical"
+            )
+        sections.append("\n".join(lines))
+    return "\n\n".join(sections)
+
+
+def _rule_levels(values: np.ndarray, rule: Dict[str, Any]) -> np.ndarray:
+    """Severity index (0-3) of every value against a single rule"""
+    low, high = rule["normal"]
+    low = -np.inf if low is None else low
+    high = np.inf if high is None else high
+    op, limit = rule["critical"]
+
+    if op == ">":
+        bound = high
+        beyond_critical = values > limit
+        past_midpoint = values >= (bound + limit) / 2
+    else:
+        bound = low
+        beyond_critical = values < limit
+        past_midpoint = values <= (bound + limit) / 2
+    outside_normal = (values < low) | (values > high)
+
+    levels = np.select(
+        [beyond_critical, past_midpoint & outside_normal, outside_normal],
+        [3, 2, 1],
+        default=0,
+    )
+    # Missing readings are never anomalies
+    return np.where(np.isnan(values), 0, levels)
+
+
+def evaluate_fleet(vehicles: Iterable[Dict[str, Any]]) -> List[Dict[str, Any]]:
+    """
+    Check every vehicle against the thresholds in one vectorized pass
+
+    Args:
+        vehicles: Vehicle dicts with "type" and "sensor_data"
+
+    Returns:
+        One result per vehicle (same order) with overall severity, the
+        list of anomalous readings and whether an LLM analysis is needed.
+        Vehicle types without rules always need the LLM, as do vehicles
+        missing a reading their rules check or reporting it as a
+        non-number.
+    """
+    vehicles = list(vehicles)
+    if not vehicles:
+        return []
+
+    types = np.array([v.get("type", "Unknown") for v in vehicles])
+    levels = np.zeros((len(vehicles), len(THRESHOLDS)), dtype=np.int8)
+    readings = np.full((len(vehicles), len(THRESHOLDS)), np.nan)
+    unreadable = np.zeros((len(vehicles), len(THRESHOLDS)), dtype=bool)
+
+    for j, rule in enumerate(THRESHOLDS):
+        values = np.array(
+            [_reading(v.get("sensor_data", {}).get(rule["metric"])) for v in vehicles],
+            dtype=float,
+        )
+        applies = np.isin(types, rule["vehicle_types"])
+        readings[:, j] = values
+        levels[:, j] = np.where(applies, _rule_levels(values, rule), 0)
+        unreadable[:, j] = applies & np.isnan(values)
+
+    overall = levels.max(axis=1)
+    needs_llm = (overall > 0) | unreadable.any(axis=1) | ~np.isin(types, COVERED_VEHICLE_TYPES)
+    results = []
+    for i, vehicle in enumerate(vehicles):
+        anomalies = [
+            {
+                "metric": THRESHOLDS[j]["metric"],
+                "label": THRESHOLDS[j]["label"],
+                "value": float(readings[i, j]),
+                "unit": THRESHOLDS[j]["unit"].strip(),
+                "severity": SEVERITY_LEVELS[levels[i, j]],
+            }
+            for j in np.flatnonzero(levels[i])
+        ]
+        results.append({
+            "vehicle_id": vehicle.get("vehicle_id"),
+            "severity": SEVERITY_LEVELS[overall[i]],
+            "anomalies": anomalies,
+            "needs_llm": bool(needs_llm[i]),
+        })
+    return results
+
+
+def evaluate_vehicle(vehicle: Dict[str, Any]) -> Dict[str, Any]:
+    """Threshold check for a single vehicle"""
+    return evaluate_fleet([vehicle])[0]
+
+
+def healthy_report() -> str:
+    """Analysis report for a vehicle whose readings are all within range"""
+    return (
+        "Anomalies Found: None\n"
+        "Severity Level: LOW\n"
+        "Recommended Action: No action required; continue routine monitoring\n"
+        "Time to Failure: No failure expected based on current readings\n"
+        "(Rule-based check: all sensor readings within normal ranges)"
+    )
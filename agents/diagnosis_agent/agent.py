@@ -5,16 +5,25 @@ Predicts component failures with cost estimates
 
 import os
 from crewai import Agent, Task, Crew
-from langchain_openai import ChatOpenAI
+from agents.callbacks import LLMUsageRecorder, TokenRelay
+from agents.llm import default_model, get_llm
+from utils.result_cache import cache_key, result_cache
 
 class DiagnosisAgent:
     """Agent for diagnosing vehicle issues and predicting failures"""
     
+    # Bump whenever the task prompt changes so cached results are not reused
+    PROMPT_VERSION = "1"
+    
     def __init__(self):
         """Initialize the Diagnosis Agent"""
-        self.llm = ChatOpenAI(
-            model=os.getenv("OPENAI_MODEL", "gpt-4o-mini"),
-            temperature=float(os.getenv("TEMPERATURE", "0.3"))
+        self.model = default_model()
+        self.temperature = float(os.getenv("TEMPERATURE", "0.3"))
+        self.token_relay = TokenRelay()
+        self.llm = get_llm(
+            self.temperature,
+            callbacks=[self.token_relay, LLMUsageRecorder("diagnosis")],
+            model=self.model
         )
         
         self.agent = Agent(
@@ -25,13 +34,14 @@ class DiagnosisAgent:
             verbose=True
         )
     
-    def diagnose(self, analysis_result, vehicle_info):
+    def diagnose(self, analysis_result, vehicle_info, use_cache=True):
         """
         Diagnose vehicle issues based on analysis
         
         Args:
             analysis_result: Analysis output from Data Analysis Agent
             vehicle_info: Dictionary with model, year, type
+            use_cache: Return a cached diagnosis for identical inputs if available
             
         Returns:
             Diagnosis report with failure predictions and cost estimates
@@ -40,6 +50,15 @@ class DiagnosisAgent:
         year = vehicle_info.get("year", "Unknown")
         vehicle_type = vehicle_info.get("type", "Unknown")
         
+        key = cache_key(
+            "diagnosis", self.PROMPT_VERSION, self.model, self.temperature,
+            {"analysis": analysis_result, "model": model, "year": year, "type": vehicle_type}
+        )
+        if use_cache:
+            cached = result_cache.get(key)
+            if cached is not None:
+                return cached
+        
         task = Task(
             description=f"""
             Based on this analysis: {analysis_result}
@@ -70,8 +89,9 @@ class DiagnosisAgent:
             verbose=False
         )
         
-        result = crew.kickoff()
-        return str(result)
+        result = str(crew.kickoff())
+        result_cache.set(key, result)
+        return result
 
 
 if __name__ == "__main__":
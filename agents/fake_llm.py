@@ -0,0 +1,364 @@
+"""
+Fake LLM Backend
+Local stand-in for the OpenAI chat completions API, selected with
+OPENAI_MODEL=fake. Replies are deterministic, follow each agent's output
+format and stream at a configurable token rate after a configurable
+latency, with optional error injection, so the server, orchestrator and
+caches can be exercised and benchmarked without network or cost
+"""
+
+import os
+import re
+import ast
+import json
+import math
+import time
+import random
+import hashlib
+import threading
+from typing import Any, Callable, Dict, Iterator, List, Optional
+
+import httpx
+
+FAKE_MODEL = "fake"
+
+DEFAULT_LATENCY_MS = 200.0
+DEFAULT_LATENCY_STDDEV_MS = 50.0
+DEFAULT_TOKENS_PER_SECOND = 50.0
+DEFAULT_ERROR_STATUS = 500
+
+LATENCY_DISTRIBUTIONS = ("fixed", "uniform", "normal", "lognormal")
+
+# Shown by CrewAI agents in the system prompt; such callers expect a ReAct reply
+REACT_MARKER = "Final Answer:"
+
+_ACTIONS = {
+    "LOW": ("No action required; continue routine monitoring", "No failure expected in the next 90 days"),
+    "MEDIUM": ("Schedule an inspection at the next service", "4-8 weeks"),
+    "HIGH": ("Book a service appointment this week", "1-2 weeks"),
+    "CRITICAL": ("Stop driving and arrange immediate inspection", "Less than 3 days"),
+}
+
+# (keywords, component, cost) matched against the analysis, in priority order
+_COMPONENTS = [
+    (("battery soh", "battery temp"), "EV battery pack", "₹25,000-50,000"),
+    (("brake",), "Front brake pads", "₹3,000-6,000"),
+    (("oil",), "Engine oil and filter", "₹2,000-4,000"),
+    (("engine temp",), "Cooling system (thermostat/coolant)", "₹4,000-9,000"),
+    (("battery voltage",), "12V battery", "₹8,000-15,000"),
+    (("motor temp",), "Drive motor cooling", "₹10,000-20,000"),
+]
+
+_RISK = {"LOW": ("LOW", "Can wait"), "MEDIUM": ("MEDIUM", "Schedule soon"),
+         "HIGH": ("HIGH", "Schedule soon"), "CRITICAL": ("HIGH", "Immediate")}
+
+
+def _env_float(name: str, default: float) -> float:
+    return float(os.getenv(name, default))
+
+
+class FakeLLMTransport(httpx.BaseTransport):
+    """
+    httpx transport answering chat completions locally
+
+    Latency (time to first token) is drawn per request from
+    latency_distribution with mean latency_ms and spread stddev_ms; the
+    reply then streams at tokens_per_second (0 = all at once). A fraction
+    error_rate of requests fail with error_status instead. Reply text
+    depends only on the prompt; latency and errors come from a generator
+    seeded with seed.
+    """
+
+    def __init__(self, latency_ms: float = DEFAULT_LATENCY_MS, stddev_ms: float = DEFAULT_LATENCY_STDDEV_MS,
+                 latency_distribution: str = "normal", tokens_per_second: float = DEFAULT_TOKENS_PER_SECOND,
+                 error_rate: float = 0.0, error_status: int = DEFAULT_ERROR_STATUS, seed: int = 0,
+                 sleep: Callable[[float], None] = time.sleep):
+        if latency_distribution not in LATENCY_DISTRIBUTIONS:
+            raise ValueError(f"Unknown latency distribution {latency_distribution!r}, "
+                             f"expected one of {', '.join(LATENCY_DISTRIBUTIONS)}")
+        self.latency_ms = latency_ms
+        self.stddev_ms = stddev_ms
+        self.latency_distribution = latency_distribution
+        self.tokens_per_second = tokens_per_second
+        self.error_rate = error_rate
+        self.error_status = error_status
+        self.sleep = sleep
+        self._random = random.Random(seed)
+        self._lock = threading.Lock()
+        self.requests = 0
+        self.errors = 0
+
+    @classmethod
+    def from_env(cls) -> "FakeLLMTransport":
+        return cls(
+            latency_ms=_env_float("FAKE_LLM_LATENCY_MS", DEFAULT_LATENCY_MS),
+            stddev_ms=_env_float("FAKE_LLM_LATENCY_STDDEV_MS", DEFAULT_LATENCY_STDDEV_MS),
+            latency_distribution=os.getenv("FAKE_LLM_LATENCY_DISTRIBUTION", "normal").lower(),
+            tokens_per_second=_env_float("FAKE_LLM_TOKENS_PER_SECOND", DEFAULT_TOKENS_PER_SECOND),
+            error_rate=_env_float("FAKE_LLM_ERROR_RATE", 0.0),
+            error_status=int(os.getenv("FAKE_LLM_ERROR_STATUS", DEFAULT_ERROR_STATUS)),
+            seed=int(os.getenv("FAKE_LLM_SEED", 0)),
+        )
+
+    def sample_latency(self) -> float:
+        """Seconds before the first token of the next reply"""
+        mean, spread = self.latency_ms / 1000, self.stddev_ms / 1000
+        with self._lock:
+            if self.latency_distribution == "fixed":
+                value = mean
+            elif self.latency_distribution == "uniform":
+                value = self._random.uniform(mean - spread, mean + spread)
+            elif self.latency_distribution == "normal":
+                value = self._random.gauss(mean, spread)
+            else:
+                # Long tail: lognormal with the given mean and standard deviation
+                if mean <= 0:
+                    return 0.0
+                sigma2 = math.log(1 + (spread / mean) ** 2)
+                value = self._random.lognormvariate(math.log(mean) - sigma2 / 2, math.sqrt(sigma2))
+        return max(0.0, value)
+
+    def _should_fail(self) -> bool:
+        with self._lock:
+            return self.error_rate > 0 and self._random.random() < self.error_rate
+
+    def handle_request(self, request: httpx.Request) -> httpx.Response:
+        if request.method != "POST" or not request.url.path.endswith("/chat/completions"):
+            return _error(request, 404, f"Fake LLM does not serve {request.method} {request.url.path}",
+                          "invalid_request_error")
+        try:
+            body = json.loads(request.content)
+        except ValueError:
+            return _error(request, 400, "Request body is not JSON", "invalid_request_error")
+
+        with self._lock:
+            self.requests += 1
+        latency = self.sample_latency()
+        if self._should_fail():
+            with self._lock:
+                self.errors += 1
+            self.sleep(latency)
+            headers = {"retry-after": "1"} if self.error_status == 429 else None
+            return _error(request, self.error_status, "Injected fake LLM failure", "fake_llm_error", headers)
+
+        messages = body.get("messages", [])
+        prompt = "\n".join(_content(message) for message in messages)
+        text = fake_reply(prompt)
+        model = body.get("model", FAKE_MODEL)
+        digest = hashlib.sha256(prompt.encode()).hexdigest()
+        usage = {"prompt_tokens": max(1, len(prompt) // 4), "completion_tokens": len(_tokens(text))}
+        usage["total_tokens"] = usage["prompt_tokens"] + usage["completion_tokens"]
+        completion_id = f"chatcmpl-fake-{digest[:24]}"
+
+        self.sleep(latency)
+        if not body.get("stream"):
+            return httpx.Response(200, request=request, json={
+                "id": completion_id,
+                "object": "chat.completion",
+                "created": int(time.time()),
+                "model": model,
+                "choices": [{"index": 0, "finish_reason": "stop",
+                             "message": {"role": "assistant", "content": text}}],
+                "usage": usage,
+            })
+
+        include_usage = bool((body.get("stream_options") or {}).get("include_usage"))
+        return httpx.Response(
+            200,
+            request=request,
+            headers={"content-type": "text/event-stream"},
+            stream=_EventStream(self._events(completion_id, model, text, usage if include_usage else None)),
+        )
+
+    def _events(self, completion_id: str, model: str, text: str,
+                usage: Optional[Dict[str, int]]) -> Iterator[bytes]:
+        created = int(time.time())
+
+        def chunk(choices: List[Dict[str, Any]], **extra) -> bytes:
+            data = {"id": completion_id, "object": "chat.completion.chunk", "created": created,
+                    "model": model, "choices": choices, **extra}
+            return f"data: {json.dumps(data)}\n\n".encode()
+
+        delay = 1 / self.tokens_per_second if self.tokens_per_second > 0 else 0.0
+        yield chunk([{"index": 0, "delta": {"role": "assistant", "content": ""}, "finish_reason": None}])
+        for token in _tokens(text):
+            if delay:
+                self.sleep(delay)
+            yield chunk([{"index": 0, "delta": {"content": token}, "finish_reason": None}])
+        yield chunk([{"index": 0, "delta": {}, "finish_reason": "stop"}])
+        if usage is not None:
+            yield chunk([], usage=usage)
+        yield b"data: [DONE]\n\n"
+
+    def get_stats(self) -> Dict[str, Any]:
+        return {
+            "requests": self.requests,
+            "errors": self.errors,
+            "latency_ms": self.latency_ms,
+            "latency_distribution": self.latency_distribution,
+            "tokens_per_second": self.tokens_per_second,
+            "error_rate": self.error_rate,
+        }
+
+
+class _EventStream(httpx.SyncByteStream):
+    def __init__(self, events: Iterator[bytes]):
+        self._events = events
+
+    def __iter__(self):
+        yield from self._events
+
+    def close(self):
+        self._events.close()
+
+
+def _error(request: httpx.Request, status: int, message: str, error_type: str,
+           headers: Optional[Dict[str, str]] = None) -> httpx.Response:
+    return httpx.Response(status, request=request, headers=headers,
+                          json={"error": {"message": message, "type": error_type, "code": error_type}})
+
+
+def _content(message: Dict[str, Any]) -> str:
+    content = message.get("content") or ""
+    if isinstance(content, list):
+        return "\n".join(part.get("text", "") for part in content if isinstance(part, dict))
+    return str(content)
+
+
+def _tokens(text: str) -> List[str]:
+    """Split text into streamed pieces, roughly one word each"""
+    return re.findall(r"\s*\S+", text) or [text]
+
+
+def fake_reply(prompt: str) -> str:
+    """Deterministic reply in the format the prompting agent expects"""
+    if '"ref"' in prompt and "JSON array" in prompt:
+        answer = _batch_analysis(prompt)
+    elif "sensor data:" in prompt:
+        answer = _analysis(_sensor_data(prompt, "sensor data:"), _after(prompt, "Analyze this ", " "))
+    elif "Based on this analysis:" in prompt:
+        answer = _diagnosis(prompt)
+    elif "phone conversation script" in prompt:
+        answer = _call_script(prompt)
+    elif "Book appointment for:" in prompt:
+        answer = _booking(prompt)
+    elif "satisfaction survey" in prompt:
+        answer = _survey()
+    else:
+        answer = "Acknowledged. No further details are available from the fake LLM backend."
+    if REACT_MARKER in prompt:
+        return f"Thought: I now can give a great answer\n{REACT_MARKER} {answer}"
+    return answer
+
+
+def _after(text: str, marker: str, end: str = "\n") -> str:
+    start = text.find(marker)
+    if start == -1:
+        return ""
+    start += len(marker)
+    stop = text.find(end, start)
+    return text[start:stop if stop != -1 else None].strip()
+
+
+def _sensor_data(prompt: str, marker: str) -> Dict[str, Any]:
+    try:
+        value = ast.literal_eval(_after(prompt, marker))
+    except (ValueError, SyntaxError):
+        return {}
+    return value if isinstance(value, dict) else {}
+
+
+def _analysis(sensor_data: Dict[str, Any], vehicle_type: str) -> str:
+    from agents.data_analysis_agent.rules import evaluate_vehicle
+
+    finding = evaluate_vehicle({"type": vehicle_type or "Unknown", "sensor_data": sensor_data})
+    action, time_to_failure = _ACTIONS[finding["severity"]]
+    anomalies = ", ".join(
+        f"{a['label']} {a['value']:g}{a['unit']} ({a['severity']})" for a in finding["anomalies"]
+    ) or "None"
+    return (
+        f"Anomalies Found: {anomalies}\n"
+        f"Severity Level: {finding['severity']}\n"
+        f"Recommended Action: {action}\n"
+        f"Time to Failure: {time_to_failure}"
+    )
+
+
+def _batch_analysis(prompt: str) -> str:
+    start = prompt.find('[{"ref"')
+    try:
+        batch, _ = json.JSONDecoder().raw_decode(prompt[start:]) if start != -1 else ([], 0)
+    except ValueError:
+        batch = []
+    return json.dumps([
+        {"ref": entry["ref"], "report": _analysis(entry.get("sensor_data", {}), entry.get("type", ""))}
+        for entry in batch if isinstance(entry, dict) and "ref" in entry
+    ])
+
+
+def _severity(text: str) -> str:
+    match = re.search(r"Severity Level:\W*(LOW|MEDIUM|HIGH|CRITICAL)", text)
+    return match.group(1) if match else "MEDIUM"
+
+
+def _diagnosis(prompt: str) -> str:
+    start = prompt.find("Based on this analysis:")
+    end = prompt.find("For vehicle:", start)
+    analysis = prompt[start:end if end != -1 else None]
+    lowered = analysis.lower()
+    component, cost = next(
+        ((name, price) for keywords, name, price in _COMPONENTS if any(k in lowered for k in keywords)),
+        ("General inspection", "₹1,500-3,000"),
+    )
+    severity = _severity(analysis)
+    risk, urgency = _RISK[severity]
+    probability = {"LOW": 10, "MEDIUM": 40, "HIGH": 75, "CRITICAL": 90}[severity]
+    # Stable per-prompt variation so different vehicles do not look identical
+    probability += int(hashlib.sha256(prompt.encode()).hexdigest(), 16) % 10
+    return (
+        f"1. Primary Issue: {component}\n"
+        f"2. Failure Probability: {probability}%\n"
+        f"3. Time to Failure: {_ACTIONS[severity][1]}\n"
+        f"4. Estimated Repair Cost: {cost}\n"
+        f"5. Safety Risk: {risk}\n"
+        f"6. Urgency: {urgency}"
+    )
+
+
+def _call_script(prompt: str) -> str:
+    customer = _after(prompt, "script for customer:") or "there"
+    issue = (_after(prompt, "Primary Issue:") or "a maintenance issue").lower()
+    cost = _after(prompt, "Estimated Repair Cost:") or "an affordable amount"
+    return "\n".join([
+        f"AI: Namaste {customer}, this is your vehicle care assistant calling about your car's health check.",
+        "CUSTOMER: Oh, is something wrong with my car?",
+        f"AI: Our monitoring picked up an issue with the {issue}. Fixing it early keeps you safe "
+        f"and costs around {cost}, far less than a breakdown.",
+        "CUSTOMER: I am quite busy this week.",
+        "AI: I understand. We can see you tomorrow at 10:00 AM or 2:00 PM, and the visit takes about an hour.",
+        "CUSTOMER: 10:00 AM works for me.",
+        "AI: Wonderful, you are booked for 10:00 AM tomorrow. You will receive an SMS confirmation shortly.",
+    ])
+
+
+def _booking(prompt: str) -> str:
+    name = _after(prompt, "Book appointment for:") or "Customer"
+    phone = _after(prompt, "Phone:")
+    slot = _after(prompt, "Available slots:\n").lstrip("- ") or "the next available slot"
+    return (
+        f"Appointment Confirmed\n"
+        f"Customer: {name}\n"
+        f"Phone: {phone}\n"
+        f"Slot: {slot}\n"
+        f"SMS: Dear {name}, your vehicle service is confirmed for {slot}. Reply C to cancel."
+    )
+
+
+def _survey() -> str:
+    return (
+        "Post-Service Satisfaction Survey\n"
+        "1. How would you rate the service quality? (1-5)\n"
+        "2. How satisfied were you with the wait time? (1-5)\n"
+        "3. How professional was the technician? (1-5)\n"
+        "4. Would you recommend us to friends and family? (Yes/No)"
+    )
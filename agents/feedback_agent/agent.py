@@ -3,17 +3,18 @@ Feedback Agent
 Generates post-service surveys
 """
 
-import os
 from crewai import Agent, Task, Crew
-from langchain_openai import ChatOpenAI
+from agents.callbacks import LLMUsageRecorder, TokenRelay
+from agents.llm import get_llm
 
 class FeedbackAgent:
     """Agent for customer feedback collection"""
     
     def __init__(self):
-        self.llm = ChatOpenAI(
-            model=os.getenv("OPENAI_MODEL", "gpt-4o-mini"),
-            temperature=0.3
+        self.token_relay = TokenRelay()
+        self.llm = get_llm(
+            0.3,
+            callbacks=[self.token_relay, LLMUsageRecorder("feedback")]
         )
         
         self.agent = Agent(
@@ -0,0 +1,259 @@
+"""
+Shared LLM Client
+One process-wide HTTP client for every agent's LLM: a bounded keep-alive
+connection pool, a global cap on concurrent LLM requests and a per-model
+request rate limit, so agents reuse warm connections and stop bursting
+into provider rate limits. With LLM_CACHE_MODE=record|replay, responses
+are served from the persistent cache in agents/llm_cache.py, and with
+OPENAI_MODEL=fake by the local fake backend in agents/fake_llm.py
+"""
+
+import os
+import re
+import json
+import time
+import threading
+from typing import Any, Callable, Dict, List, Optional
+
+import httpx
+
+from agents.fake_llm import FAKE_MODEL, FakeLLMTransport
+from agents.llm_cache import CachingTransport, LLMCacheMode, cache_mode, create_cache
+from utils.metrics import LLM_RATE_LIMITED, LLM_REQUESTS_IN_FLIGHT, LLM_THROTTLE_WAIT
+
+DEFAULT_MODEL = "gpt-4o-mini"
+DEFAULT_MAX_CONNECTIONS = 20
+DEFAULT_MAX_KEEPALIVE = 10
+DEFAULT_KEEPALIVE_SECONDS = 60.0
+DEFAULT_MAX_CONCURRENCY = 16
+DEFAULT_RATE_LIMIT_RPM = 500
+DEFAULT_TIMEOUT_SECONDS = 120.0
+# Used when a 429 response carries no usable Retry-After header
+DEFAULT_RETRY_AFTER_SECONDS = 1.0
+
+
+def default_model() -> str:
+    return os.getenv("OPENAI_MODEL", DEFAULT_MODEL)
+
+
+def rate_limit_for(model: str) -> float:
+    """
+    Requests per minute allowed for model (0 = unlimited)
+
+    LLM_RATE_LIMIT_RPM_<MODEL> (non-alphanumerics as underscores, e.g.
+    LLM_RATE_LIMIT_RPM_GPT_4O_MINI) overrides LLM_RATE_LIMIT_RPM.
+    """
+    override = os.getenv("LLM_RATE_LIMIT_RPM_" + re.sub(r"[^A-Z0-9]", "_", model.upper()))
+    return float(override or os.getenv("LLM_RATE_LIMIT_RPM", DEFAULT_RATE_LIMIT_RPM))
+
+
+class TokenBucket:
+    """
+    Thread-safe token bucket: rate tokens per second, bursts up to capacity
+
+    pause() empties the bucket until a point in time, e.g. when the
+    provider answered 429 with a Retry-After.
+    """
+
+    def __init__(self, rate: float, capacity: float):
+        self.rate = rate
+        self.capacity = max(1.0, capacity)
+        self._tokens = self.capacity
+        self._updated = time.monotonic()
+        self._paused_until = 0.0
+        self._lock = threading.Lock()
+
+    def _refill(self, now: float):
+        self._tokens = min(self.capacity, self._tokens + (now - self._updated) * self.rate)
+        self._updated = now
+
+    def acquire(self) -> float:
+        """Block until a token is available; returns the seconds waited"""
+        waited = 0.0
+        while True:
+            with self._lock:
+                now = time.monotonic()
+                self._refill(now)
+                if now >= self._paused_until and self._tokens >= 1:
+                    self._tokens -= 1
+                    return waited
+                delay = max(self._paused_until - now, (1 - self._tokens) / self.rate)
+            time.sleep(delay)
+            waited += delay
+
+    def pause(self, seconds: float):
+        with self._lock:
+            self._paused_until = max(self._paused_until, time.monotonic() + seconds)
+            self._tokens = 0.0
+
+
+class _ReleasingStream(httpx.SyncByteStream):
+    """Response body that gives back the request's concurrency slot once closed"""
+
+    def __init__(self, stream: httpx.SyncByteStream, release: Callable[[], None]):
+        self._stream = stream
+        self._release = release
+        self._released = False
+
+    def __iter__(self):
+        yield from self._stream
+
+    def close(self):
+        try:
+            self._stream.close()
+        finally:
+            if not self._released:
+                self._released = True
+                self._release()
+
+
+class GovernedTransport(httpx.BaseTransport):
+    """
+    Wraps an httpx transport with global concurrency and per-model rate limits
+
+    A request first waits for its model's token bucket, then for one of
+    max_concurrency slots, which it holds until the response body is
+    closed (streamed responses included). A 429 pauses the model's bucket
+    for the Retry-After period so other callers back off too.
+    """
+
+    def __init__(self, transport: httpx.BaseTransport, max_concurrency: int = DEFAULT_MAX_CONCURRENCY,
+                 rate_limit: Callable[[str], float] = rate_limit_for):
+        self.transport = transport
+        self.max_concurrency = max_concurrency
+        self.rate_limit = rate_limit
+        self._slots = threading.BoundedSemaphore(max_concurrency)
+        self._buckets: Dict[str, Optional[TokenBucket]] = {}
+        self._lock = threading.Lock()
+
+    def _bucket(self, model: str) -> Optional[TokenBucket]:
+        with self._lock:
+            if model not in self._buckets:
+                rpm = self.rate_limit(model)
+                # Allow a burst of one second's worth of requests
+                self._buckets[model] = TokenBucket(rpm / 60, rpm / 60) if rpm > 0 else None
+            return self._buckets[model]
+
+    def handle_request(self, request: httpx.Request) -> httpx.Response:
+        model = _request_model(request)
+        bucket = self._bucket(model)
+        started = time.monotonic()
+        if bucket is not None:
+            bucket.acquire()
+        self._slots.acquire()
+        LLM_THROTTLE_WAIT.observe(time.monotonic() - started, model=model)
+        LLM_REQUESTS_IN_FLIGHT.inc()
+        try:
+            response = self.transport.handle_request(request)
+        except BaseException:
+            self._release()
+            raise
+
+        if response.status_code == 429:
+            LLM_RATE_LIMITED.inc(model=model)
+            if bucket is not None:
+                bucket.pause(_retry_after(response))
+        return httpx.Response(
+            status_code=response.status_code,
+            headers=response.headers,
+            stream=_ReleasingStream(response.stream, self._release),
+            extensions=response.extensions,
+            request=request,
+        )
+
+    def _release(self):
+        LLM_REQUESTS_IN_FLIGHT.dec()
+        self._slots.release()
+
+    def close(self):
+        self.transport.close()
+
+
+def _request_model(request: httpx.Request) -> str:
+    try:
+        return json.loads(request.content).get("model") or "unknown"
+    except (ValueError, AttributeError, httpx.RequestNotRead):
+        return "unknown"
+
+
+def _retry_after(response: httpx.Response) -> float:
+    try:
+        return max(0.0, float(response.headers.get("retry-after", DEFAULT_RETRY_AFTER_SECONDS)))
+    except ValueError:
+        return DEFAULT_RETRY_AFTER_SECONDS
+
+
+def has_llm_backend() -> bool:
+    """Whether agents can get completions: an API key, a cache to replay or the fake backend"""
+    return (bool(os.getenv("OPENAI_API_KEY")) or cache_mode() is LLMCacheMode.REPLAY
+            or default_model() == FAKE_MODEL)
+
+
+def build_transport() -> httpx.BaseTransport:
+    """
+    Pooled HTTP transport with the LLM concurrency and rate limits applied
+
+    The response cache sits in front of the limits, so cache hits neither
+    wait for nor use up the rate limit. OPENAI_MODEL=fake swaps the network
+    transport for FakeLLMTransport and keeps the limits and cache around it.
+    """
+    limits = httpx.Limits(
+        max_connections=int(os.getenv("LLM_MAX_CONNECTIONS", DEFAULT_MAX_CONNECTIONS)),
+        max_keepalive_connections=int(os.getenv("LLM_MAX_KEEPALIVE", DEFAULT_MAX_KEEPALIVE)),
+        keepalive_expiry=float(os.getenv("LLM_KEEPALIVE_SECONDS", DEFAULT_KEEPALIVE_SECONDS)),
+    )
+    backend = FakeLLMTransport.from_env() if default_model() == FAKE_MODEL else httpx.HTTPTransport(limits=limits)
+    transport = GovernedTransport(
+        backend,
+        max_concurrency=int(os.getenv("LLM_MAX_CONCURRENCY", DEFAULT_MAX_CONCURRENCY)),
+    )
+    mode = cache_mode()
+    if mode is LLMCacheMode.PASSTHROUGH:
+        return transport
+    return CachingTransport(transport, create_cache(), mode)
+
+
+_http_client: Optional[httpx.Client] = None
+_http_client_lock = threading.Lock()
+
+
+def get_http_client() -> httpx.Client:
+    """Process-wide HTTP client shared by every agent's LLM"""
+    global _http_client
+    if _http_client is None:
+        with _http_client_lock:
+            if _http_client is None:
+                timeout = float(os.getenv("LLM_TIMEOUT_SECONDS", DEFAULT_TIMEOUT_SECONDS))
+                _http_client = httpx.Client(
+                    transport=build_transport(), timeout=httpx.Timeout(timeout, connect=10.0)
+                )
+    return _http_client
+
+
+def get_llm(temperature: float = 0.3, callbacks: Optional[List[Any]] = None,
+            model: Optional[str] = None):
+    """
+    CrewAI LLM for an agent: a streaming ChatOpenAI on the shared HTTP client
+
+    The ChatOpenAI is wrapped in ChatModelLLM (agents/crew_llm.py), since
+    CrewAI would otherwise rebuild it without the client or callbacks; it
+    stays reachable as .chat_model. Agents call their LLM from executor
+    threads (Crew.kickoff is sync), so only the sync client is shared.
+    Replaying the response cache or using the fake backend needs no real
+    API key.
+    """
+    from langchain_openai import ChatOpenAI
+    from agents.crew_llm import ChatModelLLM
+
+    options: Dict[str, Any] = {}
+    if not os.getenv("OPENAI_API_KEY") and has_llm_backend():
+        options["api_key"] = "offline"
+    return ChatModelLLM(ChatOpenAI(
+        model=model or default_model(),
+        temperature=temperature,
+        streaming=True,
+        stream_usage=True,
+        callbacks=callbacks or [],
+        http_client=get_http_client(),
+        **options,
+    ))
@@ -0,0 +1,269 @@
+"""
+LLM Response Cache
+Persistent prompt -> response cache shared by every agent's LLM client.
+Identical chat completion requests (same model, temperature and rendered
+prompt) are answered from a local SQLite file instead of the provider
+"""
+
+import os
+import json
+import time
+import sqlite3
+import hashlib
+import logging
+import threading
+from enum import Enum
+from typing import Any, Dict, List, Optional, Tuple
+
+import httpx
+
+from utils.metrics import LLM_CACHE_REQUESTS
+
+DEFAULT_CACHE_PATH = "llm_cache.db"
+DEFAULT_CACHE_MAX_MB = 256
+# Hits update last_used/hits in memory and are written at most this often
+DEFAULT_TOUCH_FLUSH_SECONDS = 5.0
+
+# Request body fields that decide the completion; everything else
+# (user, stream_options, ...) does not change the answer
+KEY_FIELDS = (
+    "model", "temperature", "messages", "tools", "tool_choice", "response_format",
+    "stop", "max_tokens", "max_completion_tokens", "n", "seed", "stream",
+)
+
+# Hop-by-hop or length headers that must not be replayed verbatim
+_DROPPED_HEADERS = {"content-length", "transfer-encoding", "connection", "keep-alive"}
+
+logger = logging.getLogger("llm_cache")
+
+
+class LLMCacheMode(Enum):
+    """How the cache treats LLM requests"""
+    PASSTHROUGH = "passthrough"  # cache not used
+    RECORD = "record"            # serve hits, call the provider on misses and store the answer
+    REPLAY = "replay"            # serve hits, fail misses without any network call
+
+
+def cache_mode() -> LLMCacheMode:
+    return LLMCacheMode(os.getenv("LLM_CACHE_MODE", LLMCacheMode.PASSTHROUGH.value).lower())
+
+
+def cache_key(body: Dict[str, Any]) -> str:
+    """sha256 of the request fields that determine the completion"""
+    fields = {name: body[name] for name in KEY_FIELDS if name in body}
+    canonical = json.dumps(fields, sort_keys=True, separators=(",", ":"), default=str)
+    return hashlib.sha256(canonical.encode()).hexdigest()
+
+
+class LLMResponseCache:
+    """
+    SQLite-backed store of raw LLM responses keyed by cache_key()
+
+    Bounded to max_bytes of response bodies; when a write goes over the
+    bound the least recently used entries are evicted. Hits only record
+    their access time and count in memory; those are written in one
+    transaction at most every touch_flush_seconds, and before a put (so
+    eviction sees them), get_stats or close.
+    """
+
+    def __init__(self, path: str, max_bytes: int = DEFAULT_CACHE_MAX_MB * 1024 * 1024,
+                 touch_flush_seconds: float = DEFAULT_TOUCH_FLUSH_SECONDS):
+        self.path = path
+        self.max_bytes = max_bytes
+        self.touch_flush_seconds = touch_flush_seconds
+        self._lock = threading.Lock()
+        # key -> (last_used, hits) not yet written
+        self._touched: Dict[str, Tuple[float, int]] = {}
+        self._touches_written_at = time.monotonic()
+        self._conn = sqlite3.connect(path, check_same_thread=False)
+        self._conn.execute("PRAGMA journal_mode=WAL")
+        self._conn.execute(
+            """
+            CREATE TABLE IF NOT EXISTS responses (
+                key TEXT PRIMARY KEY,
+                status INTEGER NOT NULL,
+                headers TEXT NOT NULL,
+                body BLOB NOT NULL,
+                size INTEGER NOT NULL,
+                created_at REAL NOT NULL,
+                last_used REAL NOT NULL,
+                hits INTEGER NOT NULL DEFAULT 0
+            )
+            """
+        )
+        self._conn.execute("CREATE INDEX IF NOT EXISTS responses_last_used ON responses (last_used)")
+        self._conn.commit()
+
+    def get(self, key: str) -> Optional[Tuple[int, List[Tuple[str, str]], bytes]]:
+        with self._lock:
+            row = self._conn.execute(
+                "SELECT status, headers, body FROM responses WHERE key = ?", (key,)
+            ).fetchone()
+            if row is None:
+                return None
+            hits = self._touched[key][1] if key in self._touched else 0
+            self._touched[key] = (time.time(), hits + 1)
+            if time.monotonic() - self._touches_written_at >= self.touch_flush_seconds:
+                self._write_touches()
+                self._conn.commit()
+        status, headers, body = row
+        return status, [tuple(header) for header in json.loads(headers)], body
+
+    def put(self, key: str, status: int, headers: List[Tuple[str, str]], body: bytes) -> bool:
+        """Store a response; returns False if it is too large to keep"""
+        if len(body) > self.max_bytes:
+            return False
+        now = time.time()
+        with self._lock:
+            self._write_touches()
+            self._conn.execute(
+                "INSERT OR REPLACE INTO responses (key, status, headers, body, size, created_at, last_used) "
+                "VALUES (?, ?, ?, ?, ?, ?, ?)",
+                (key, status, json.dumps(headers), body, len(body), now, now)
+            )
+            self._evict()
+            self._conn.commit()
+        return True
+
+    def _write_touches(self):
+        """Apply the buffered hits (caller commits)"""
+        if self._touched:
+            self._conn.executemany(
+                "UPDATE responses SET last_used = ?, hits = hits + ? WHERE key = ?",
+                [(last_used, hits, key) for key, (last_used, hits) in self._touched.items()]
+            )
+            self._touched.clear()
+        self._touches_written_at = time.monotonic()
+
+    def _evict(self):
+        # Keep the most recently used entries whose sizes add up to max_bytes
+        self._conn.execute(
+            "DELETE FROM responses WHERE key IN ("
+            "  SELECT key FROM (SELECT key, SUM(size) OVER (ORDER BY last_used DESC, key) AS total"
+            "                   FROM responses) WHERE total > ?)",
+            (self.max_bytes,)
+        )
+
+    def clear(self):
+        with self._lock:
+            self._touched.clear()
+            self._conn.execute("DELETE FROM responses")
+            self._conn.commit()
+
+    def get_stats(self) -> Dict[str, Any]:
+        with self._lock:
+            self._write_touches()
+            self._conn.commit()
+            entries, size, hits = self._conn.execute(
+                "SELECT COUNT(*), COALESCE(SUM(size), 0), COALESCE(SUM(hits), 0) FROM responses"
+            ).fetchone()
+        return {"path": self.path, "entries": entries, "bytes": size,
+                "max_bytes": self.max_bytes, "hits": hits}
+
+    def close(self):
+        with self._lock:
+            self._write_touches()
+            self._conn.commit()
+            self._conn.close()
+
+
+class _RecordingStream(httpx.SyncByteStream):
+    """Response body that is stored in the cache once it was read to the end"""
+
+    def __init__(self, stream: httpx.SyncByteStream, on_complete):
+        self._stream = stream
+        self._on_complete = on_complete
+        self._chunks: List[bytes] = []
+
+    def __iter__(self):
+        for chunk in self._stream:
+            self._chunks.append(chunk)
+            yield chunk
+        try:
+            self._on_complete(b"".join(self._chunks))
+        except Exception as e:
+            logger.warning(f"Could not store LLM response: {str(e)}")
+
+    def close(self):
+        self._stream.close()
+
+
+class CachingTransport(httpx.BaseTransport):
+    """
+    Answers chat completion requests from an LLMResponseCache
+
+    Only POSTed chat completions are cached; anything else goes straight
+    to the wrapped transport. In REPLAY mode a miss is answered with a 404
+    so the OpenAI client fails fast instead of retrying. In RECORD mode a
+    miss counts as "recorded" only once its response body was stored;
+    failed or uncacheable upstream calls count as "miss".
+    """
+
+    def __init__(self, transport: httpx.BaseTransport, cache: LLMResponseCache,
+                 mode: LLMCacheMode = LLMCacheMode.RECORD):
+        self.transport = transport
+        self.cache = cache
+        self.mode = mode
+
+    def handle_request(self, request: httpx.Request) -> httpx.Response:
+        key = _request_key(request) if self.mode is not LLMCacheMode.PASSTHROUGH else None
+        if key is None:
+            return self.transport.handle_request(request)
+
+        cached = self.cache.get(key)
+        if cached is not None:
+            LLM_CACHE_REQUESTS.inc(result="hit")
+            status, headers, body = cached
+            return httpx.Response(status_code=status, headers=headers, content=body, request=request)
+
+        if self.mode is LLMCacheMode.REPLAY:
+            LLM_CACHE_REQUESTS.inc(result="miss")
+            return httpx.Response(404, request=request, json={"error": {
+                "message": f"No recorded LLM response for request {key[:12]} (LLM_CACHE_MODE=replay)",
+                "type": "llm_cache_miss",
+                "code": "llm_cache_miss",
+            }})
+
+        try:
+            response = self.transport.handle_request(request)
+        except Exception:
+            LLM_CACHE_REQUESTS.inc(result="miss")
+            raise
+        if response.status_code != 200:
+            LLM_CACHE_REQUESTS.inc(result="miss")
+            return response
+
+        headers = [(name, value) for name, value in response.headers.multi_items()
+                   if name.lower() not in _DROPPED_HEADERS]
+
+        def record(body: bytes):
+            stored = self.cache.put(key, response.status_code, headers, body)
+            LLM_CACHE_REQUESTS.inc(result="recorded" if stored else "miss")
+
+        return httpx.Response(
+            status_code=response.status_code,
+            headers=response.headers,
+            stream=_RecordingStream(response.stream, record),
+            extensions=response.extensions,
+            request=request,
+        )
+
+    def close(self):
+        self.transport.close()
+        self.cache.close()
+
+
+def _request_key(request: httpx.Request) -> Optional[str]:
+    if request.method != "POST" or not request.url.path.endswith("/chat/completions"):
+        return None
+    try:
+        body = json.loads(request.content)
+    except (ValueError, httpx.RequestNotRead):
+        return None
+    return cache_key(body) if isinstance(body, dict) else None
+
+
+def create_cache() -> LLMResponseCache:
+    """Cache file and size bound from LLM_CACHE_PATH / LLM_CACHE_MAX_MB"""
+    max_mb = float(os.getenv("LLM_CACHE_MAX_MB", DEFAULT_CACHE_MAX_MB))
+    return LLMResponseCache(os.getenv("LLM_CACHE_PATH", DEFAULT_CACHE_PATH), int(max_mb * 1024 * 1024))
@@ -0,0 +1,126 @@
+"""
+Micro-Batcher
+Collects individually submitted items into batches of up to max_batch_size
+or max_wait seconds, runs one handler call per batch and hands each caller
+its own result
+"""
+
+import asyncio
+import logging
+from typing import Any, Awaitable, Callable, Dict, List, Optional, Set, Tuple
+
+DEFAULT_MAX_BATCH_SIZE = 100
+DEFAULT_MAX_WAIT_SECONDS = 0.05
+
+# list of items -> one result (or Exception instance) per item, same order
+BatchHandler = Callable[[List[Any]], Awaitable[List[Any]]]
+
+
+class MicroBatcher:
+    """
+    Turns many submit() calls into few handler calls
+
+    A batch is flushed as soon as it holds max_batch_size items or
+    max_wait seconds after its first item arrived, whichever comes first.
+    At most max_concurrent_batches handler calls run at once; items
+    submitted meanwhile accumulate into the next batch. A handler
+    exception fails every item of its batch, while an Exception returned
+    in place of a result fails only that item. Callers that stop waiting
+    (cancelled or timed out) are dropped from batches not yet sent.
+    """
+
+    def __init__(self, name: str, handler: BatchHandler,
+                 max_batch_size: int = DEFAULT_MAX_BATCH_SIZE,
+                 max_wait: float = DEFAULT_MAX_WAIT_SECONDS,
+                 max_concurrent_batches: int = 1):
+        self.name = name
+        self.handler = handler
+        self.max_batch_size = max(1, max_batch_size)
+        self.max_wait = max_wait
+        self.max_concurrent_batches = max(1, max_concurrent_batches)
+        self.logger = logging.getLogger(f"micro_batcher.{name}")
+        self._pending: List[Tuple[Any, asyncio.Future]] = []
+        self._timer: Optional[asyncio.TimerHandle] = None
+        self._slots = asyncio.Semaphore(self.max_concurrent_batches)
+        self._flushes: Set[asyncio.Task] = set()
+        self._batches = 0
+        self._items = 0
+        self._failed_batches = 0
+        self._in_flight = 0
+
+    async def submit(self, item: Any) -> Any:
+        """Add item to the current batch and wait for its result"""
+        loop = asyncio.get_running_loop()
+        future = loop.create_future()
+        self._pending.append((item, future))
+        if len(self._pending) >= self.max_batch_size:
+            self.flush()
+        elif self._timer is None:
+            self._timer = loop.call_later(self.max_wait, self.flush)
+        return await future
+
+    def flush(self):
+        """Send the current batch now"""
+        if self._timer is not None:
+            self._timer.cancel()
+            self._timer = None
+        batch = [(item, future) for item, future in self._pending if not future.done()]
+        self._pending = []
+        if not batch:
+            return
+        flush = asyncio.get_running_loop().create_task(self._run(batch))
+        self._flushes.add(flush)
+        flush.add_done_callback(self._flushes.discard)
+
+    async def _run(self, batch: List[Tuple[Any, asyncio.Future]]):
+        async with self._slots:
+            batch = [(item, future) for item, future in batch if not future.done()]
+            if not batch:
+                return
+            self._batches += 1
+            self._items += len(batch)
+            self._in_flight += 1
+            try:
+                results = await self.handler([item for item, _ in batch])
+                if len(results) != len(batch):
+                    raise ValueError(
+                        f"{self.name} batch handler returned {len(results)} results for {len(batch)} items"
+                    )
+            except Exception as e:
+                self._failed_batches += 1
+                self.logger.error(f"Batch of {len(batch)} failed: {str(e)}")
+                results = [e] * len(batch)
+            finally:
+                self._in_flight -= 1
+
+        for (_, future), result in zip(batch, results):
+            if future.done():
+                continue
+            if isinstance(result, Exception):
+                future.set_exception(result)
+            else:
+                future.set_result(result)
+
+    async def close(self):
+        """Cancel waiting items and batches still in flight"""
+        if self._timer is not None:
+            self._timer.cancel()
+            self._timer = None
+        for _, future in self._pending:
+            future.cancel()
+        self._pending = []
+        for flush in list(self._flushes):
+            flush.cancel()
+        await asyncio.gather(*self._flushes, return_exceptions=True)
+
+    def get_stats(self) -> Dict[str, Any]:
+        return {
+            "max_batch_size": self.max_batch_size,
+            "max_wait_ms": round(self.max_wait * 1000),
+            "batches": self._batches,
+            "items": self._items,
+            "avg_batch_size": round(self._items / self._batches, 2) if self._batches else 0.0,
+            "failed_batches": self._failed_batches,
+            "batches_in_flight": self._in_flight,
+            "waiting": len(self._pending),
+        }
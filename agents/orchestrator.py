@@ -2,12 +2,19 @@
 Multi-Agent Orchestrator
 Coordinates all specialized agents and manages task distribution
 """
+import uuid
 import asyncio
-from typing import Dict, List, Any, Optional
+from typing import Callable, Dict, List, Any, Optional, Set
 from datetime import datetime
 import logging
 from enum import Enum
 
+from agents.task_queue import create_task_queue
+from agents.task_results import TaskHandle, TaskResultStore
+from agents.micro_batcher import MicroBatcher
+from agents.resilience import CircuitBreaker, CircuitOpenError, retry_delay, rule_based_analysis
+from utils.config import get_setting
+
 class TaskType(Enum):
     DATA_ANALYSIS = "data_analysis"
     DIAGNOSIS = "diagnosis"
@@ -22,6 +29,22 @@ class TaskPriority(Enum):
     HIGH = 3
     CRITICAL = 4
 
+# Agent that handles each task type
+AGENT_FOR_TASK_TYPE = {
+    TaskType.DATA_ANALYSIS.value: "data_analysis",
+    TaskType.DIAGNOSIS.value: "diagnosis",
+    TaskType.SCHEDULING.value: "scheduling",
+    TaskType.CUSTOMER_ENGAGEMENT.value: "customer_engagement",
+    TaskType.FEEDBACK.value: "feedback",
+    TaskType.MANUFACTURING_INSIGHTS.value: "manufacturing_insights"
+}
+
+DEFAULT_MAX_CONCURRENT_TASKS = 10
+DEFAULT_DRAIN_TIMEOUT_SECONDS = 60
+DEFAULT_TIMEOUT_SECONDS = 300
+DEFAULT_RETRY_ATTEMPTS = 3
+DEFAULT_BATCH_MAX_WAIT_MS = 50
+
 class AgentOrchestrator:
     """
     Orchestrates multiple AI agents
@@ -29,20 +52,138 @@ class AgentOrchestrator:
     - Manages agent lifecycle
     - Monitors agent health
     - Handles inter-agent communication
+    
+    Tasks are processed by max_concurrent_tasks workers. Each agent also
+    has its own concurrency limit (bulkhead) so one slow agent cannot hold
+    every worker: workers only take tasks whose agent has a free slot, so
+    tasks for an agent at its limit stay in the priority queue (keeping
+    their priority and aging) while other agents' tasks go ahead.
+    
+    Agents that implement process_batch(tasks) -> [result per task] and
+    have telemetry_batch_size > 1 are micro-batched: their tasks are
+    handed off without holding a worker, collected for up to
+    batch_max_wait_ms, and sent to the agent together. For these agents
+    the bulkhead limit applies to concurrent batches.
     """
     
-    def __init__(self):
+    def __init__(self, max_concurrent_tasks: Optional[int] = None, shard_id: Optional[int] = None):
         self.agents: Dict[str, Any] = {}
-        self.task_queue: asyncio.Queue = asyncio.Queue()
+        self.shard_id = shard_id
+        self.max_concurrent_tasks = max_concurrent_tasks or get_setting(
+            "agents_config", "agents.orchestrator.max_concurrent_tasks", DEFAULT_MAX_CONCURRENT_TASKS
+        )
+        self.drain_timeout = get_setting(
+            "agents_config", "agents.orchestrator.drain_timeout_seconds", DEFAULT_DRAIN_TIMEOUT_SECONDS
+        )
+        self.task_queue = create_task_queue(shard_id)
         self.logger = logging.getLogger("orchestrator")
         self.is_running = False
+        self.accepting_tasks = True
+        self._workers: List[asyncio.Task] = []
+        self._agent_limits: Dict[str, int] = {}
+        self._agent_in_flight: Dict[str, int] = {}
+        self._batchers: Dict[str, MicroBatcher] = {}
+        self._batch_capacity: Dict[str, asyncio.Semaphore] = {}
+        self._batched_tasks: Set[asyncio.Task] = set()
+        self._pending_results: Dict[str, asyncio.Future] = {}
+        self.timeout_seconds = get_setting(
+            "agents_config", "agents.orchestrator.timeout_seconds", DEFAULT_TIMEOUT_SECONDS
+        )
+        self.retry_attempts = get_setting(
+            "agents_config", "agents.orchestrator.retry_attempts", DEFAULT_RETRY_ATTEMPTS
+        )
+        self.retry_base_delay = get_setting("agents_config", "agents.orchestrator.retry_base_delay_seconds", 1.0)
+        self.retry_max_delay = get_setting("agents_config", "agents.orchestrator.retry_max_delay_seconds", 30.0)
+        self.breakers: Dict[str, CircuitBreaker] = {}
+        # Used instead of the agent while its circuit is open
+        self.fallbacks: Dict[str, Callable[[Dict[str, Any]], Any]] = {
+            "data_analysis": rule_based_analysis
+        }
+        self.results = TaskResultStore(
+            max_retained=get_setting("agents_config", "agents.orchestrator.max_retained_results", 1000)
+        )
+        self.status_listeners: List[Callable[[Dict[str, Any]], None]] = []
+        self._last_status_key = None
         
         self.logger.info("Agent Orchestrator initialized")
     
     def register_agent(self, agent_type: str, agent: Any):
         """Register an agent with the orchestrator"""
         self.agents[agent_type] = agent
-        self.logger.info(f"Registered agent: {agent_type}")
+        self._agent_limits[agent_type] = get_setting(
+            "agents_config", f"agents.{agent_type}_agent.max_concurrent_tasks",
+            max(1, self.max_concurrent_tasks // 2)
+        )
+        self._agent_in_flight.setdefault(agent_type, 0)
+        self.breakers[agent_type] = CircuitBreaker(
+            agent_type, **get_setting("agents_config", "agents.orchestrator.circuit_breaker", {})
+        )
+        budget = get_setting("agents_config", f"agents.{agent_type}_agent.latency_budget_p99_seconds", None)
+        if budget is not None:
+            agent.latency_budget_seconds = budget
+        self._setup_batching(agent_type, agent)
+        self.logger.info(f"Registered agent: {agent_type} (concurrency limit: {self._agent_limits[agent_type]})")
+        self._publish_status()
+    
+    def _setup_batching(self, agent_type: str, agent: Any):
+        """Micro-batch the agent's tasks if it supports it and batching is configured"""
+        self._batchers.pop(agent_type, None)
+        self._batch_capacity.pop(agent_type, None)
+        batch_size = get_setting("agents_config", f"agents.{agent_type}_agent.telemetry_batch_size", 1)
+        if batch_size <= 1 or not hasattr(agent, "process_batch"):
+            return
+        max_wait_ms = get_setting(
+            "agents_config", f"agents.{agent_type}_agent.batch_max_wait_ms", DEFAULT_BATCH_MAX_WAIT_MS
+        )
+        limit = self._agent_limits[agent_type]
+        self._batchers[agent_type] = MicroBatcher(
+            agent_type, self._breaker_guarded(agent_type, agent.execute_batch), batch_size,
+            max_wait_ms / 1000, max_concurrent_batches=limit
+        )
+        # Enough tasks in hand to fill every concurrent batch and start the next
+        self._batch_capacity[agent_type] = asyncio.Semaphore(batch_size * (limit + 1))
+    
+    def _breaker_guarded(self, agent_type: str, handler: Callable) -> Callable:
+        """
+        Batch handler that records one circuit breaker outcome per batch
+
+        A batch counts as failed if the handler raised or every task in it
+        failed; per-task failures inside a working batch do not trip the
+        breaker, and neither do the member tasks' own retries or timeouts.
+        """
+        async def run(tasks: List[Dict[str, Any]]) -> List[Any]:
+            breaker = self.breakers[agent_type]
+            try:
+                results = await handler(tasks)
+            except Exception:
+                breaker.record_failure()
+                raise
+            if results and all(isinstance(result, Exception) for result in results):
+                breaker.record_failure()
+            else:
+                breaker.record_success()
+            return results
+        return run
+    
+    def add_status_listener(self, listener: Callable[[Dict[str, Any]], None]):
+        """Call listener(get_system_status()) whenever the orchestrator or an agent changes state"""
+        self.status_listeners.append(listener)
+    
+    def _publish_status(self):
+        """Notify status listeners if any agent status changed since the last notification"""
+        if not self.status_listeners:
+            return
+        status = self.get_system_status()
+        key = (status["orchestrator_running"],
+               tuple((agent_type, s["status"]) for agent_type, s in status["agents"].items()))
+        if key == self._last_status_key:
+            return
+        self._last_status_key = key
+        for listener in self.status_listeners:
+            try:
+                listener(status)
+            except Exception as e:
+                self.logger.error(f"Status listener failed: {str(e)}")
     
     async def start_all_agents(self):
         """Start all registered agents"""
@@ -55,12 +196,47 @@ class AgentOrchestrator:
                 self.logger.error(f"Failed to start agent {agent_type}: {str(e)}")
         
         self.is_running = True
+        self.accepting_tasks = True
         self.logger.info("All agents started successfully")
+        self._publish_status()
     
-    async def stop_all_agents(self):
-        """Stop all registered agents"""
+    async def stop_all_agents(self, drain_timeout: Optional[float] = None):
+        """
+        Drain the task queue, then stop all registered agents
+
+        New submissions are rejected straight away. Queued and running
+        tasks get up to drain_timeout seconds (default from
+        drain_timeout_seconds in agents_config.yaml) to finish; whatever is
+        left after that is abandoned when the workers are cancelled.
+        """
         self.logger.info("Stopping all agents...")
+        self.accepting_tasks = False
+        
+        if self._workers:
+            timeout = self.drain_timeout if drain_timeout is None else drain_timeout
+            try:
+                await asyncio.wait_for(self.task_queue.join(), timeout=timeout)
+                self.logger.info("Task queue drained")
+            except asyncio.TimeoutError:
+                self.logger.warning(
+                    f"Drain timed out after {timeout}s; abandoning "
+                    f"{self.task_queue.qsize()} queued tasks"
+                )
+        
         self.is_running = False
+        for worker in self._workers:
+            worker.cancel()
+        await asyncio.gather(*self._workers, return_exceptions=True)
+        self._workers = []
+        for batched in self._batched_tasks:
+            batched.cancel()
+        await asyncio.gather(*self._batched_tasks, return_exceptions=True)
+        for batcher in self._batchers.values():
+            await batcher.close()
+        for future in self._pending_results.values():
+            future.cancel()
+        self._pending_results.clear()
+        await self.task_queue.close()
         
         for agent_type, agent in self.agents.items():
             try:
@@ -70,65 +246,251 @@ class AgentOrchestrator:
                 self.logger.error(f"Failed to stop agent {agent_type}: {str(e)}")
         
         self.logger.info("All agents stopped")
+        self._publish_status()
     
     async def submit_task(self, task_type: TaskType, task_data: Dict[str, Any], 
-                          priority: TaskPriority = TaskPriority.MEDIUM):
-        """Submit a task to the appropriate agent"""
+                          priority: TaskPriority = TaskPriority.MEDIUM) -> TaskHandle:
+        """
+        Submit a task to the appropriate agent
+        
+        Returns a TaskHandle; await it for the agent's result. The outcome
+        is also kept in self.results for later lookup by task_id.
+        """
+        if not self.accepting_tasks:
+            raise RuntimeError("Orchestrator is shutting down; not accepting new tasks")
         task = {
-            "task_id": f"task_{datetime.now().timestamp()}",
+            "task_id": f"task_{uuid.uuid4().hex}",
             "task_type": task_type.value,
             "priority": priority.value,
             "data": task_data,
             "timestamp": datetime.now().isoformat()
         }
         
+        future = asyncio.get_running_loop().create_future()
+        self._pending_results[task["task_id"]] = future
         await self.task_queue.put(task)
         self.logger.info(f"Task submitted: {task['task_id']} (Type: {task_type.value})")
+        return TaskHandle(task["task_id"], future)
+    
+    def get_task_result(self, task_id: str) -> Optional[Dict[str, Any]]:
+        """Outcome of a finished task, if still retained"""
+        return self.results.get(task_id)
+    
+    def _resolve(self, task_id: str, result: Any = None, error: Optional[Exception] = None):
+        self.results.record(task_id, result, error)
+        future = self._pending_results.pop(task_id, None)
+        if future is None or future.done():
+            return
+        if error is not None:
+            future.set_exception(error)
+            # Failures are kept in self.results; don't warn if nobody awaits the handle
+            future.exception()
+        else:
+            future.set_result(result)
     
     async def process_tasks(self):
-        """Process tasks from the queue"""
+        """Process tasks from the queue with max_concurrent_tasks workers until stopped"""
+        self.task_queue.set_gate(self._has_capacity)
+        self._workers = [
+            asyncio.create_task(self._worker(worker_id))
+            for worker_id in range(self.max_concurrent_tasks)
+        ]
+        await asyncio.gather(*self._workers, return_exceptions=True)
+    
+    def _has_capacity(self, task_type: Optional[str]) -> bool:
+        """Queue gate: a task may be taken only if its agent has a free slot"""
+        agent_key = AGENT_FOR_TASK_TYPE.get(task_type)
+        if agent_key in self._batch_capacity:
+            return not self._batch_capacity[agent_key].locked()
+        if agent_key in self._agent_limits:
+            return self._agent_in_flight[agent_key] < self._agent_limits[agent_key]
+        return True
+    
+    async def _worker(self, worker_id: int):
+        """Take tasks whose agent has a free slot off the queue and run them"""
         while self.is_running:
-            try:
-                task = await asyncio.wait_for(self.task_queue.get(), timeout=1.0)
-                await self._route_task(task)
-            except asyncio.TimeoutError:
+            # The slot is claimed before the next await, so no other worker
+            # can take a task for the same slot in between
+            task = await self.task_queue.get()
+            agent_key = AGENT_FOR_TASK_TYPE.get(task["task_type"])
+            if agent_key in self._batchers:
+                await self._batch_capacity[agent_key].acquire()
+                batched = asyncio.create_task(self._run_batched(agent_key, task))
+                self._batched_tasks.add(batched)
+                batched.add_done_callback(self._batched_tasks.discard)
                 continue
-            except Exception as e:
-                self.logger.error(f"Error processing task: {str(e)}")
+            await self._run_with_bulkhead(agent_key, task)
+    
+    async def _run_with_bulkhead(self, agent_key: Optional[str], task: Dict[str, Any]):
+        """Run task holding one of its agent's slots"""
+        if agent_key in self._agent_in_flight:
+            self._agent_in_flight[agent_key] += 1
+        try:
+            await self._execute(task)
+        finally:
+            if agent_key in self._agent_in_flight:
+                self._agent_in_flight[agent_key] -= 1
+                self.task_queue.wake()
+    
+    async def _run_batched(self, agent_key: str, task: Dict[str, Any]):
+        """Run a task whose agent is micro-batched, releasing its batch capacity after"""
+        self._agent_in_flight[agent_key] += 1
+        try:
+            await self._execute(task)
+        finally:
+            self._agent_in_flight[agent_key] -= 1
+            self._batch_capacity[agent_key].release()
+            self.task_queue.wake()
+    
+    async def _execute(self, task: Dict[str, Any]):
+        """
+        Route task, then ack it and resolve its handle
+
+        A task whose handle was cancelled is dropped without calling its
+        agent; cancelling the handle while the task runs cancels the call.
+        """
+        handle_future = self._pending_results.get(task["task_id"])
+        if handle_future is not None and handle_future.cancelled():
+            self.logger.info(f"Task {task['task_id']} was cancelled before it started")
+            self.task_queue.ack(task)
+            self._resolve(task["task_id"], error=asyncio.CancelledError("Task was cancelled"))
+            self.task_queue.task_done()
+            return
+        # The lease runs from here, not from when the task was dequeued (a
+        # micro-batched task may wait for its batch to fill)
+        self.task_queue.renew_lease(task)
+        route = asyncio.ensure_future(self._route_task(task))
+        if handle_future is not None:
+            handle_future.add_done_callback(lambda future: route.cancel() if future.cancelled() else None)
+        try:
+            result = await route
+            self.task_queue.ack(task)
+            self._resolve(task["task_id"], result)
+        except asyncio.CancelledError:
+            if handle_future is None or not handle_future.cancelled():
+                raise
+            self.logger.info(f"Task {task['task_id']} was cancelled while running")
+            self.task_queue.ack(task)
+            self._resolve(task["task_id"], error=asyncio.CancelledError("Task was cancelled"))
+        except Exception as e:
+            self.task_queue.nack(task, e)
+            self._resolve(task["task_id"], error=e)
+        finally:
+            self.task_queue.task_done()
     
     async def _route_task(self, task: Dict[str, Any]):
         """Route task to the appropriate agent"""
         task_type = task["task_type"]
-        
-        agent_mapping = {
-            TaskType.DATA_ANALYSIS.value: "data_analysis",
-            TaskType.DIAGNOSIS.value: "diagnosis",
-            TaskType.SCHEDULING.value: "scheduling",
-            TaskType.CUSTOMER_ENGAGEMENT.value: "customer_engagement",
-            TaskType.FEEDBACK.value: "feedback",
-            TaskType.MANUFACTURING_INSIGHTS.value: "manufacturing_insights"
-        }
-        
-        agent_key = agent_mapping.get(task_type)
+        agent_key = AGENT_FOR_TASK_TYPE.get(task_type)
         
         if agent_key and agent_key in self.agents:
             agent = self.agents[agent_key]
             try:
                 self.logger.info(f"Routing task {task['task_id']} to {agent_key} agent")
-                result = await agent.process_task(task)
+                result = await self._call_agent(agent_key, agent, task)
                 self.logger.info(f"Task {task['task_id']} completed successfully")
                 return result
+            except CircuitOpenError:
+                fallback = self.fallbacks.get(agent_key)
+                if fallback is None:
+                    self.logger.warning(f"Circuit open for {agent_key}; failing task {task['task_id']} fast")
+                    raise
+                self.logger.warning(f"Circuit open for {agent_key}; using fallback for task {task['task_id']}")
+                return fallback(task)
             except Exception as e:
                 self.logger.error(f"Error in agent {agent_key}: {str(e)}")
                 agent.handle_error(e)
+                raise
+            finally:
+                self._publish_status()
         else:
             self.logger.error(f"No agent found for task type: {task_type}")
+            raise LookupError(f"No agent found for task type: {task_type}")
+    
+    async def _call_agent(self, agent_key: str, agent: Any, task: Dict[str, Any]):
+        """
+        Run the task through agent.execute (or the agent's micro-batcher)
+        under the task deadline, retrying failures
+        
+        All attempts share one deadline of timeout_seconds. Failed attempts
+        are retried up to retry_attempts in total with full-jitter
+        exponential backoff, as long as the backoff still fits before the
+        deadline. Every attempt is recorded by the agent's circuit breaker
+        (micro-batched agents record once per batch instead, see
+        _breaker_guarded); an open breaker raises CircuitOpenError without
+        calling the agent.
+        """
+        loop = asyncio.get_running_loop()
+        breaker = self.breakers[agent_key]
+        deadline = loop.time() + self.timeout_seconds
+        last_error: Optional[BaseException] = None
+        
+        batcher = self._batchers.get(agent_key)
+        
+        for attempt in range(max(1, self.retry_attempts)):
+            if not breaker.allow():
+                raise CircuitOpenError(f"Circuit breaker for {agent_key} is open")
+            call = batcher.submit(task) if batcher else agent.execute(task)
+            try:
+                result = await asyncio.wait_for(call, timeout=deadline - loop.time())
+            except asyncio.TimeoutError:
+                if batcher is None:
+                    breaker.record_failure()
+                raise TimeoutError(
+                    f"Task {task['task_id']} exceeded its {self.timeout_seconds}s deadline"
+                )
+            except Exception as e:
+                if batcher is None:
+                    breaker.record_failure()
+                last_error = e
+            else:
+                if batcher is None:
+                    breaker.record_success()
+                return result
+            
+            delay = retry_delay(attempt, self.retry_base_delay, self.retry_max_delay)
+            if attempt + 1 >= self.retry_attempts or loop.time() + delay >= deadline:
+                break
+            self.logger.warning(
+                f"Task {task['task_id']} attempt {attempt + 1} failed ({str(last_error)}); "
+                f"retrying in {delay:.1f}s"
+            )
+            await asyncio.sleep(delay)
+        
+        raise last_error
     
     def get_system_status(self) -> Dict[str, Any]:
         """Get status of all agents"""
+        queued: Dict[Optional[str], int] = {}
+        for task_type, count in self.task_queue.type_depths().items():
+            agent_type = AGENT_FOR_TASK_TYPE.get(task_type)
+            queued[agent_type] = queued.get(agent_type, 0) + count
         status = {
             "orchestrator_running": self.is_running,
             "task_queue_size": self.task_queue.qsize(),
+            "task_queue_backend": self.task_queue.get_stats(),
+            "max_concurrent_tasks": self.max_concurrent_tasks,
+            "active_tasks": sum(self._agent_in_flight.values()),
+            "pending_results": len(self._pending_results),
+            "retained_results": len(self.results),
+            "circuit_breakers": {
+                agent_type: breaker.get_stats() for agent_type, breaker in self.breakers.items()
+            },
+            "bulkheads": {
+                agent_type: {
+                    "limit": limit,
+                    "in_flight": self._agent_in_flight[agent_type],
+                    "queued": queued.get(agent_type, 0)
+                }
+                for agent_type, limit in self._agent_limits.items()
+            },
+            "micro_batching": {
+                agent_type: batcher.get_stats() for agent_type, batcher in self._batchers.items()
+            },
+            "task_queue_depths": {
+                TaskPriority(priority).name: depth
+                for priority, depth in self.task_queue.depths().items()
+            },
             "agents": {}
         }
         
@@ -149,31 +511,44 @@ class AgentOrchestrator:
         return all_healthy
 
 # Example usage
-async def main():
-    orchestrator = AgentOrchestrator()
+async def main(broadcaster: Optional[Any] = None):
+    """
+    Run the maintenance pipeline for one vehicle
+
+    Uses a ShardedOrchestrator when orchestrator.shards in
+    agents_config.yaml is above 1. broadcaster, if given (a
+    utils.broadcast.Broadcaster, e.g. the server's), receives every agent
+    status change on the agent_status topic; otherwise status changes are
+    logged.
+    """
+    from agents.adapters import register_crew_agents
+    from agents.pipeline import VEHICLE_MAINTENANCE_PIPELINE
+    from agents.sharding import create_orchestrator
+    from utils.mock_data import VEHICLES
     
-    # Register agents (to be implemented)
-    # orchestrator.register_agent("data_analysis", DataAnalysisAgent(...))
-    # orchestrator.register_agent("diagnosis", DiagnosisAgent(...))
-    # ... register other agents
+    orchestrator = create_orchestrator(register_crew_agents)
+    if broadcaster is not None:
+        orchestrator.add_status_listener(lambda status: broadcaster.publish("agent_status", status))
+    else:
+        orchestrator.add_status_listener(lambda status: orchestrator.logger.info(
+            "Agent status: " + ", ".join(f"{t}={s['status']}" for t, s in status["agents"].items())
+        ))
     
     await orchestrator.start_all_agents()
     
     # Start processing tasks
     task_processor = asyncio.create_task(orchestrator.process_tasks())
     
-    # Submit example tasks
-    await orchestrator.submit_task(
-        TaskType.DATA_ANALYSIS,
-        {"vehicle_id": "VIN12345", "telemetry": {...}},
-        TaskPriority.HIGH
-    )
-    
-    # Keep running
+    # Run the full workflow for one vehicle
     try:
-        await task_processor
-    except KeyboardInterrupt:
+        results = await VEHICLE_MAINTENANCE_PIPELINE.run(
+            orchestrator, {"vehicle": VEHICLES["VEH001"]}, TaskPriority.HIGH
+        )
+        for stage, result in results.items():
+            print(f"\n=== {stage} ===\n{result}")
+    finally:
         await orchestrator.stop_all_agents()
+        await task_processor
 
 if __name__ == "__main__":
     asyncio.run(main())
@@ -0,0 +1,138 @@
+"""
+Agent Pipelines
+Declarative DAGs of orchestrator tasks: each stage is submitted as soon
+as the stages it depends on have finished, so independent stages run in
+parallel
+"""
+
+import asyncio
+from dataclasses import dataclass, field
+from typing import Any, Callable, Dict, List, Optional, Tuple
+
+from agents.orchestrator import AgentOrchestrator, TaskType, TaskPriority
+
+# (pipeline input, results of the stage's dependencies) -> task data
+InputBuilder = Callable[[Dict[str, Any], Dict[str, Any]], Dict[str, Any]]
+
+
+class PipelineError(Exception):
+    """Raised when a pipeline stage fails; carries the partial results"""
+
+    def __init__(self, stage: str, error: BaseException, results: Dict[str, Any]):
+        super().__init__(f"Pipeline stage '{stage}' failed: {error}")
+        self.stage = stage
+        self.error = error
+        self.results = results
+
+
+def default_input(data: Dict[str, Any], upstream: Dict[str, Any]) -> Dict[str, Any]:
+    """Pipeline input plus the upstream results under "upstream" """
+    return {**data, "upstream": upstream}
+
+
+@dataclass
+class Stage:
+    name: str
+    task_type: TaskType
+    depends_on: Tuple[str, ...] = ()
+    build_input: InputBuilder = default_input
+    # Defaults to the priority the pipeline was submitted with
+    priority: Optional[TaskPriority] = None
+
+
+@dataclass
+class Pipeline:
+    name: str
+    stages: List[Stage] = field(default_factory=list)
+
+    def __post_init__(self):
+        self._dependents: Dict[str, List[str]] = {stage.name: [] for stage in self.stages}
+        if len(self._dependents) != len(self.stages):
+            raise ValueError(f"Pipeline {self.name} has duplicate stage names")
+        for stage in self.stages:
+            for dependency in stage.depends_on:
+                if dependency not in self._dependents:
+                    raise ValueError(f"Stage {stage.name} depends on unknown stage {dependency}")
+                self._dependents[dependency].append(stage.name)
+        self._check_acyclic()
+
+    def _check_acyclic(self):
+        remaining = {stage.name: len(stage.depends_on) for stage in self.stages}
+        ready = [name for name, count in remaining.items() if count == 0]
+        visited = 0
+        while ready:
+            name = ready.pop()
+            visited += 1
+            for dependent in self._dependents[name]:
+                remaining[dependent] -= 1
+                if remaining[dependent] == 0:
+                    ready.append(dependent)
+        if visited != len(self.stages):
+            raise ValueError(f"Pipeline {self.name} has a dependency cycle")
+
+    async def run(self, orchestrator: AgentOrchestrator, data: Dict[str, Any],
+                  priority: TaskPriority = TaskPriority.MEDIUM) -> Dict[str, Any]:
+        """
+        Run the pipeline on the orchestrator and return {stage name: result}
+
+        Stages with no unfinished dependencies are submitted together; each
+        completion submits the dependents it unblocks. The first failing
+        stage stops the pipeline: nothing further is submitted, the other
+        stages still queued or running are cancelled and a PipelineError
+        with the results so far is raised.
+        """
+        stages = {stage.name: stage for stage in self.stages}
+        waiting_on = {stage.name: set(stage.depends_on) for stage in self.stages}
+        results: Dict[str, Any] = {}
+        running: Dict[asyncio.Future, str] = {}
+
+        async def submit(name: str):
+            stage = stages[name]
+            upstream = {dependency: results[dependency] for dependency in stage.depends_on}
+            handle = await orchestrator.submit_task(
+                stage.task_type, stage.build_input(data, upstream), stage.priority or priority
+            )
+            running[handle.future] = name
+
+        try:
+            for name, dependencies in waiting_on.items():
+                if not dependencies:
+                    await submit(name)
+
+            while running:
+                done, _ = await asyncio.wait(running, return_when=asyncio.FIRST_COMPLETED)
+                for future in done:
+                    name = running.pop(future)
+                    if future.cancelled() or future.exception() is not None:
+                        error = asyncio.CancelledError() if future.cancelled() else future.exception()
+                        raise PipelineError(name, error, results)
+                    results[name] = future.result()
+                    for dependent in self._dependents[name]:
+                        waiting_on[dependent].discard(name)
+                        if not waiting_on[dependent]:
+                            await submit(dependent)
+            return results
+        finally:
+            # Siblings of a failed stage (or everything, if run was cancelled)
+            for future in running:
+                future.cancel()
+
+
+def diagnosis_input(data: Dict[str, Any], upstream: Dict[str, Any]) -> Dict[str, Any]:
+    return {**data, "analysis": upstream["analysis"]}
+
+
+def engagement_input(data: Dict[str, Any], upstream: Dict[str, Any]) -> Dict[str, Any]:
+    return {**data, "diagnosis": upstream["diagnosis"]}
+
+
+# Orchestrator equivalent of backend_server's complete workflow, with
+# customer outreach and appointment scheduling running in parallel
+VEHICLE_MAINTENANCE_PIPELINE = Pipeline("vehicle_maintenance", [
+    Stage("analysis", TaskType.DATA_ANALYSIS),
+    Stage("diagnosis", TaskType.DIAGNOSIS, depends_on=("analysis",), build_input=diagnosis_input),
+    Stage("customer_engagement", TaskType.CUSTOMER_ENGAGEMENT,
+          depends_on=("diagnosis",), build_input=engagement_input),
+    Stage("scheduling", TaskType.SCHEDULING,
+          depends_on=("diagnosis",), build_input=engagement_input),
+])
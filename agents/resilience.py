@@ -0,0 +1,148 @@
+"""
+Agent Resilience
+Circuit breaker, jittered retry backoff and rule-based fallbacks used by
+the orchestrator when routing tasks to agents
+"""
+
+import time
+import random
+import threading
+from collections import deque
+from enum import Enum
+from typing import Any, Dict, Optional
+
+DEFAULT_FAILURE_RATE_THRESHOLD = 0.5
+DEFAULT_WINDOW_SIZE = 20
+DEFAULT_MIN_CALLS = 5
+DEFAULT_RESET_TIMEOUT_SECONDS = 30.0
+
+
+class CircuitOpenError(Exception):
+    """Raised instead of calling an agent whose circuit breaker is open"""
+
+
+class BreakerState(Enum):
+    CLOSED = "closed"
+    OPEN = "open"
+    HALF_OPEN = "half_open"
+
+
+class CircuitBreaker:
+    """
+    Error-rate circuit breaker for one agent
+
+    Tracks the outcome of the last window_size calls. Once at least
+    min_calls are recorded and the failure rate reaches the threshold the
+    breaker opens and allow() returns False for reset_timeout seconds.
+    Then a single trial call is let through (half-open): success closes
+    the breaker, failure opens it again.
+    """
+
+    def __init__(self, name: str,
+                 failure_rate_threshold: float = DEFAULT_FAILURE_RATE_THRESHOLD,
+                 window_size: int = DEFAULT_WINDOW_SIZE,
+                 min_calls: int = DEFAULT_MIN_CALLS,
+                 reset_timeout: float = DEFAULT_RESET_TIMEOUT_SECONDS):
+        self.name = name
+        self.failure_rate_threshold = failure_rate_threshold
+        self.min_calls = min_calls
+        self.reset_timeout = reset_timeout
+        self.state = BreakerState.CLOSED
+        self._outcomes = deque(maxlen=window_size)
+        self._opened_at: Optional[float] = None
+        self._trial_in_flight = False
+        self._trial_started = 0.0
+        self._times_opened = 0
+        self._rejected = 0
+        self._lock = threading.Lock()
+
+    def allow(self) -> bool:
+        """Whether a call may go ahead now"""
+        with self._lock:
+            if self.state == BreakerState.OPEN:
+                if time.monotonic() - self._opened_at < self.reset_timeout:
+                    self._rejected += 1
+                    return False
+                self.state = BreakerState.HALF_OPEN
+            if self.state == BreakerState.HALF_OPEN:
+                # A trial that never reported back (e.g. cancelled) is abandoned after reset_timeout
+                now = time.monotonic()
+                if self._trial_in_flight and now - self._trial_started < self.reset_timeout:
+                    self._rejected += 1
+                    return False
+                self._trial_in_flight = True
+                self._trial_started = now
+            return True
+
+    def record_success(self):
+        with self._lock:
+            if self.state == BreakerState.HALF_OPEN:
+                self.state = BreakerState.CLOSED
+                self._outcomes.clear()
+                self._trial_in_flight = False
+            self._outcomes.append(True)
+
+    def record_failure(self):
+        with self._lock:
+            self._outcomes.append(False)
+            if self.state == BreakerState.HALF_OPEN or self._failure_rate_exceeded():
+                self._open()
+
+    def _failure_rate_exceeded(self) -> bool:
+        if self.state != BreakerState.CLOSED or len(self._outcomes) < self.min_calls:
+            return False
+        return self._failure_rate() >= self.failure_rate_threshold
+
+    def _failure_rate(self) -> float:
+        if not self._outcomes:
+            return 0.0
+        return self._outcomes.count(False) / len(self._outcomes)
+
+    def _open(self):
+        self.state = BreakerState.OPEN
+        self._opened_at = time.monotonic()
+        self._trial_in_flight = False
+        self._times_opened += 1
+
+    def get_stats(self) -> Dict[str, Any]:
+        with self._lock:
+            return {
+                "state": self.state.value,
+                "failure_rate": round(self._failure_rate(), 3),
+                "window_calls": len(self._outcomes),
+                "times_opened": self._times_opened,
+                "rejected_calls": self._rejected,
+            }
+
+
+def retry_delay(attempt: int, base: float, cap: float) -> float:
+    """Full-jitter exponential backoff: uniform(0, min(cap, base * 2**attempt))"""
+    return random.uniform(0, min(cap, base * (2 ** attempt)))
+
+
+def rule_based_analysis(task: Dict[str, Any]) -> Dict[str, Any]:
+    """
+    Fallback data-analysis result from the threshold rules
+
+    Used while the data_analysis circuit is open. Needs the vehicle dict
+    under task["data"]["vehicle"].
+    """
+    from agents.data_analysis_agent.rules import evaluate_vehicle, healthy_report
+
+    vehicle = task["data"].get("vehicle")
+    if not vehicle:
+        raise CircuitOpenError("data_analysis circuit is open and the task has no vehicle data")
+    finding = evaluate_vehicle(vehicle)
+    if finding["anomalies"]:
+        lines = [f"- {a['label']}: {a['value']:g}{a['unit']} ({a['severity']})"
+                 for a in finding["anomalies"]]
+        analysis = "Anomalies Found:\n" + "\n".join(lines) + f"\nSeverity Level: {finding['severity']}"
+    else:
+        analysis = healthy_report()
+    return {
+        "vehicle_id": finding["vehicle_id"],
+        "analysis": analysis,
+        "severity": finding["severity"],
+        "anomalies": finding["anomalies"],
+        "source": "rules_fallback",
+    }
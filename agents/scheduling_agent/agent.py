@@ -3,18 +3,19 @@ Scheduling Agent
 Books maintenance appointments
 """
 
-import os
 from crewai import Agent, Task, Crew
-from langchain_openai import ChatOpenAI
+from agents.callbacks import LLMUsageRecorder, TokenRelay
+from agents.llm import get_llm
 from datetime import datetime, timedelta
 
 class SchedulingAgent:
     """Agent for appointment scheduling"""
     
     def __init__(self):
-        self.llm = ChatOpenAI(
-            model=os.getenv("OPENAI_MODEL", "gpt-4o-mini"),
-            temperature=0.3
+        self.token_relay = TokenRelay()
+        self.llm = get_llm(
+            0.3,
+            callbacks=[self.token_relay, LLMUsageRecorder("scheduling")]
         )
         
         self.agent = Agent(
@@ -0,0 +1,545 @@
+"""
+Sharded Orchestrator
+Runs K AgentOrchestrator processes so prompt building, JSON parsing and
+result post-processing use K cores instead of one event loop. Tasks are
+routed by a consistent hash of their vehicle_id, and tasks of the same
+type for the same vehicle run one at a time in submission order. Each
+shard gets an equal share of the process-wide LLM and executor limits,
+so K shards together stay within the configured budget.
+"""
+
+import os
+import uuid
+import pickle
+import asyncio
+import bisect
+import hashlib
+import itertools
+import logging
+import threading
+import multiprocessing
+from multiprocessing.connection import Connection, wait
+from collections import deque
+from typing import Any, Callable, Deque, Dict, Hashable, Iterable, List, Optional, Set, Tuple
+
+from agents.llm import DEFAULT_MAX_CONCURRENCY, DEFAULT_RATE_LIMIT_RPM
+from agents.orchestrator import AgentOrchestrator, TaskType, TaskPriority
+from agents.task_results import TaskHandle
+from utils.agent_executor import DEFAULT_MAX_WORKERS
+from utils.config import get_setting
+
+DEFAULT_RING_REPLICAS = 100
+DEFAULT_STOP_TIMEOUT_SECONDS = 10
+# How often each shard reports its status to the front-end
+STATUS_INTERVAL_SECONDS = 1.0
+
+# Per-process limits (env var, default) that would be multiplied by the
+# number of shards; each shard process gets 1/K of them
+SHARED_LIMITS = (
+    ("LLM_MAX_CONCURRENCY", DEFAULT_MAX_CONCURRENCY),
+    ("LLM_RATE_LIMIT_RPM", DEFAULT_RATE_LIMIT_RPM),
+    ("AGENT_EXECUTOR_WORKERS", DEFAULT_MAX_WORKERS),
+)
+RATE_LIMIT_OVERRIDE_PREFIX = "LLM_RATE_LIMIT_RPM_"
+
+# Worst first: the status an agent reports across shards
+AGENT_STATUS_ORDER = ("error", "blocked", "running", "idle")
+
+# Registers agents on a fresh orchestrator; runs inside every shard process,
+# so it must be a module-level function
+AgentFactory = Callable[[AgentOrchestrator], None]
+
+# Totals reported by get_system_status() across shards
+SUMMED_STATUS_FIELDS = (
+    "task_queue_size", "max_concurrent_tasks", "active_tasks", "pending_results", "retained_results"
+)
+
+
+class ShardUnavailableError(RuntimeError):
+    """Raised for requests to a shard process that has exited"""
+
+
+def share_process_limits(num_shards: int):
+    """
+    Scale this process's LLM concurrency, LLM rate limits (including the
+    per-model overrides) and executor workers down to 1/num_shards
+
+    Called in each shard process before any agent or LLM client is built.
+    Limits are kept at one or more, so tiny budgets over many shards can
+    still exceed the total.
+    """
+    if num_shards <= 1:
+        return
+    for name, default in SHARED_LIMITS:
+        total = os.getenv(name, str(default))
+        if name.startswith("LLM_RATE_LIMIT_RPM"):
+            os.environ[name] = str(float(total) / num_shards)
+        else:
+            os.environ[name] = str(max(1, int(total) // num_shards))
+    for name, value in list(os.environ.items()):
+        if name.startswith(RATE_LIMIT_OVERRIDE_PREFIX) and value:
+            os.environ[name] = str(float(value) / num_shards)
+
+
+def shard_key(task_data: Dict[str, Any]) -> Optional[str]:
+    """Vehicle id a task belongs to, from data["vehicle_id"] or data["vehicle"]["vehicle_id"]"""
+    vehicle_id = task_data.get("vehicle_id")
+    if vehicle_id is None and isinstance(task_data.get("vehicle"), dict):
+        vehicle_id = task_data["vehicle"].get("vehicle_id")
+    return None if vehicle_id is None else str(vehicle_id)
+
+
+class HashRing:
+    """
+    Consistent hash ring
+
+    Each node owns `replicas` points on the ring; a key belongs to the
+    first point clockwise of its hash. Adding or removing a node only
+    moves the keys of that node.
+    """
+
+    def __init__(self, nodes: Iterable[Hashable], replicas: int = DEFAULT_RING_REPLICAS):
+        self._ring: List[Tuple[int, Hashable]] = sorted(
+            (self._hash(f"{node}#{replica}"), node) for node in nodes for replica in range(replicas)
+        )
+        if not self._ring:
+            raise ValueError("HashRing needs at least one node")
+        self._points = [point for point, _ in self._ring]
+
+    @staticmethod
+    def _hash(value: str) -> int:
+        return int.from_bytes(hashlib.md5(value.encode("utf-8")).digest()[:8], "big")
+
+    def node_for(self, key: str) -> Hashable:
+        index = bisect.bisect(self._points, self._hash(key)) % len(self._points)
+        return self._ring[index][1]
+
+
+class _Shard:
+    """
+    Serves one shard process: an AgentOrchestrator fed from a request queue
+
+    Requests are (op, request_id, *args); every request except "cancel"
+    gets exactly one (request_id, ok, pickled payload) reply on the
+    shard's own response pipe, so a shard that dies mid-write cannot block
+    the others. The shard also sends its status unprompted, with request_id
+    None, whenever it changes and every STATUS_INTERVAL_SECONDS.
+    """
+
+    def __init__(self, shard_id: int, agent_factory: AgentFactory, max_concurrent_tasks: Optional[int],
+                 requests: multiprocessing.Queue, responses: Connection):
+        self.shard_id = shard_id
+        self.requests = requests
+        self.responses = responses
+        self.orchestrator = AgentOrchestrator(max_concurrent_tasks, shard_id=shard_id)
+        agent_factory(self.orchestrator)
+        # (vehicle id, task type) -> submissions waiting for the running one
+        self._serial: Dict[Tuple[str, str], Deque[Tuple[str, str, Dict[str, Any], int]]] = {}
+        # request id -> handle of a submitted task; ids still being submitted
+        self._handles: Dict[str, TaskHandle] = {}
+        self._starting: Set[str] = set()
+        self._cancelled: Set[str] = set()
+        self._background: Set[asyncio.Task] = set()
+        self._processor: Optional[asyncio.Task] = None
+        self._reporter: Optional[asyncio.Task] = None
+        self.orchestrator.add_status_listener(self._send_status)
+
+    def _reply(self, request_id: str, ok: bool, payload: Any):
+        try:
+            data = pickle.dumps(payload)
+        except Exception:
+            ok, data = False, pickle.dumps(RuntimeError(f"Unpicklable shard reply: {payload!r}"))
+        self.responses.send((request_id, ok, data))
+
+    def _send_status(self, status: Dict[str, Any]):
+        self._reply(None, True, status)
+
+    async def _report_status(self):
+        while True:
+            await asyncio.sleep(STATUS_INTERVAL_SECONDS)
+            self._send_status(self.orchestrator.get_system_status())
+
+    async def serve(self):
+        loop = asyncio.get_running_loop()
+        while True:
+            op, request_id, *args = await loop.run_in_executor(None, self.requests.get)
+            try:
+                if op == "submit":
+                    self._submit(request_id, *args)
+                elif op == "cancel":
+                    self._cancel(request_id)
+                elif op == "start":
+                    await self.orchestrator.start_all_agents()
+                    self._processor = asyncio.create_task(self.orchestrator.process_tasks())
+                    self._reporter = asyncio.create_task(self._report_status())
+                    self._send_status(self.orchestrator.get_system_status())
+                    self._reply(request_id, True, None)
+                elif op == "status":
+                    self._reply(request_id, True, self.orchestrator.get_system_status())
+                elif op == "health":
+                    self._reply(request_id, True, await self.orchestrator.health_check())
+                elif op == "stop":
+                    if self._reporter is not None:
+                        self._reporter.cancel()
+                    await self._stop(*args)
+                    if self._processor is not None:
+                        await self._processor
+                    self._reply(request_id, True, None)
+                    return
+                else:
+                    raise ValueError(f"Unknown shard request: {op}")
+            except Exception as e:
+                self._reply(request_id, False, e)
+
+    async def _stop(self, drain_timeout: Optional[float] = None):
+        """Let tasks still waiting on their vehicle reach the queue, then drain and stop"""
+        loop = asyncio.get_running_loop()
+        timeout = self.orchestrator.drain_timeout if drain_timeout is None else drain_timeout
+        deadline = loop.time() + timeout
+        while any(self._serial.values()) and loop.time() < deadline:
+            await asyncio.sleep(0.05)
+        await self.orchestrator.stop_all_agents(max(0.0, deadline - loop.time()))
+
+    def _submit(self, request_id: str, task_type: str, data: Dict[str, Any], priority: int):
+        # Serialized per vehicle and task type: independent pipeline stages
+        # for one vehicle (e.g. scheduling and feedback) still run in parallel
+        vehicle_id = shard_key(data)
+        key = None if vehicle_id is None else (vehicle_id, task_type)
+        if key is not None:
+            if key in self._serial:
+                self._serial[key].append((request_id, task_type, data, priority))
+                return
+            self._serial[key] = deque()
+        self._spawn(self._start(request_id, task_type, data, priority, key))
+
+    def _cancel(self, request_id: str):
+        """Cancel a submitted task, or drop it if it is still waiting on its vehicle"""
+        handle = self._handles.get(request_id)
+        if handle is not None:
+            handle.cancel()
+            return
+        if request_id in self._starting:
+            self._cancelled.add(request_id)
+            return
+        for waiting in self._serial.values():
+            for entry in waiting:
+                if entry[0] == request_id:
+                    waiting.remove(entry)
+                    return
+
+    def _spawn(self, coro):
+        task = asyncio.get_running_loop().create_task(coro)
+        self._background.add(task)
+        task.add_done_callback(self._background.discard)
+
+    async def _start(self, request_id: str, task_type: str, data: Dict[str, Any],
+                     priority: int, key: Optional[Tuple[str, str]]):
+        self._starting.add(request_id)
+        try:
+            handle = await self.orchestrator.submit_task(TaskType(task_type), data, TaskPriority(priority))
+        except Exception as e:
+            self._reply(request_id, False, e)
+            self._next(key)
+            return
+        finally:
+            self._starting.discard(request_id)
+        self._handles[request_id] = handle
+        handle.future.add_done_callback(lambda future: self._finished(request_id, key, future))
+        if request_id in self._cancelled:
+            self._cancelled.discard(request_id)
+            handle.cancel()
+
+    def _finished(self, request_id: str, key: Optional[Tuple[str, str]], future: asyncio.Future):
+        self._handles.pop(request_id, None)
+        if future.cancelled():
+            self._reply(request_id, False, RuntimeError("Task was cancelled"))
+        elif future.exception() is not None:
+            self._reply(request_id, False, future.exception())
+        else:
+            self._reply(request_id, True, future.result())
+        self._next(key)
+
+    def _next(self, key: Optional[Tuple[str, str]]):
+        """Start the next waiting task of the same vehicle and type, if any"""
+        if key is None:
+            return
+        waiting = self._serial[key]
+        if waiting:
+            self._spawn(self._start(*waiting.popleft(), key))
+        else:
+            del self._serial[key]
+
+
+def _run_shard(shard_id: int, num_shards: int, agent_factory: AgentFactory,
+               max_concurrent_tasks: Optional[int], requests: multiprocessing.Queue, responses: Connection):
+    """Entry point of a shard process"""
+    logging.basicConfig(level=logging.INFO)
+    share_process_limits(num_shards)
+    shard = _Shard(shard_id, agent_factory, max_concurrent_tasks, requests, responses)
+    asyncio.run(shard.serve())
+
+
+class ShardedOrchestrator:
+    """
+    AgentOrchestrator front-end spread over num_shards processes
+
+    Each shard is a full AgentOrchestrator (worker pool, bulkheads,
+    breakers) whose agents are registered by agent_factory in the shard
+    process. Tasks carrying a vehicle_id always go to the same shard, and
+    tasks of one type for one vehicle run one at a time in submission
+    order; different task types for a vehicle may run concurrently, as
+    the pipeline DAG expects. Tasks without a vehicle_id are spread
+    round-robin.
+
+    It has the same interface as AgentOrchestrator. get_system_status()
+    combines the status each shard last reported (at most
+    STATUS_INTERVAL_SECONDS old), cancelling a TaskHandle cancels the task
+    in its shard, and process_tasks() just waits for stop_all_agents()
+    because the shards process their own queues.
+    """
+
+    def __init__(self, agent_factory: AgentFactory, num_shards: Optional[int] = None,
+                 max_concurrent_tasks: Optional[int] = None, replicas: int = DEFAULT_RING_REPLICAS):
+        self.agent_factory = agent_factory
+        self.num_shards = num_shards or get_setting(
+            "agents_config", "agents.orchestrator.shards", None
+        ) or os.cpu_count() or 1
+        self.max_concurrent_tasks = max_concurrent_tasks
+        self.ring = HashRing(range(self.num_shards), replicas)
+        self.logger = logging.getLogger("orchestrator.sharded")
+        self.is_running = False
+        self.accepting_tasks = False
+        self._context = multiprocessing.get_context("spawn")
+        self._requests: List[multiprocessing.Queue] = []
+        self._responses: List[Connection] = []
+        self._processes: List[multiprocessing.Process] = []
+        self._pending: Dict[str, Tuple[int, asyncio.Future]] = {}
+        self._round_robin = itertools.cycle(range(self.num_shards))
+        self._loop: Optional[asyncio.AbstractEventLoop] = None
+        self._reader: Optional[threading.Thread] = None
+        self._wakeup: Optional[Connection] = None
+        self._wakeup_receiver: Optional[Connection] = None
+        self._shard_status: Dict[int, Dict[str, Any]] = {}
+        self._stopped: Optional[asyncio.Event] = None
+        self.status_listeners: List[Callable[[Dict[str, Any]], None]] = []
+        self._last_status_key = None
+
+    def shard_for(self, task_data: Dict[str, Any]) -> int:
+        key = shard_key(task_data)
+        return next(self._round_robin) if key is None else self.ring.node_for(key)
+
+    async def start_all_agents(self):
+        """Spawn the shard processes and start their agents"""
+        self._loop = asyncio.get_running_loop()
+        self._stopped = asyncio.Event()
+        self._shard_status = {}
+        self._requests = [self._context.Queue() for _ in range(self.num_shards)]
+        self._responses, self._processes = [], []
+        for shard_id in range(self.num_shards):
+            receiver, sender = self._context.Pipe(duplex=False)
+            process = self._context.Process(
+                target=_run_shard,
+                args=(shard_id, self.num_shards, self.agent_factory, self.max_concurrent_tasks,
+                      self._requests[shard_id], sender),
+                name=f"orchestrator-shard-{shard_id}",
+                daemon=True,
+            )
+            process.start()
+            # Only the shard keeps the sending end, so its exit shows up as EOF
+            sender.close()
+            self._responses.append(receiver)
+            self._processes.append(process)
+        self._wakeup_receiver, self._wakeup = self._context.Pipe(duplex=False)
+        self._reader = threading.Thread(target=self._read_responses, name="shard-responses", daemon=True)
+        self._reader.start()
+
+        await asyncio.gather(*(self._call(shard_id, "start") for shard_id in range(self.num_shards)))
+        self.is_running = True
+        self.accepting_tasks = True
+        self.logger.info(f"Started {self.num_shards} orchestrator shards")
+
+    async def stop_all_agents(self, drain_timeout: Optional[float] = None):
+        """Drain and stop every shard, then wait for the processes to exit"""
+        self.accepting_tasks = False
+        results = await asyncio.gather(
+            *(self._call(shard_id, "stop", drain_timeout) for shard_id in self._live_shards()),
+            return_exceptions=True
+        )
+        for error in results:
+            if isinstance(error, Exception):
+                self.logger.error(f"Shard failed to stop cleanly: {str(error)}")
+        for process in self._processes:
+            await asyncio.to_thread(process.join, DEFAULT_STOP_TIMEOUT_SECONDS)
+            if process.is_alive():
+                process.terminate()
+        self.is_running = False
+        if self._reader is not None:
+            self._wakeup.send(None)
+            await asyncio.to_thread(self._reader.join)
+            self._reader = None
+            self._wakeup.close()
+            self._wakeup_receiver.close()
+        for connection in self._responses:
+            connection.close()
+        pending, self._pending = self._pending, {}
+        for _, future in pending.values():
+            future.cancel()
+        if self._stopped is not None:
+            self._stopped.set()
+        self._publish_status()
+        self.logger.info("All orchestrator shards stopped")
+
+    async def process_tasks(self):
+        """Wait until stopped; each shard runs its own workers"""
+        await self._stopped.wait()
+
+    def add_status_listener(self, listener: Callable[[Dict[str, Any]], None]):
+        """Call listener(get_system_status()) whenever the orchestrator or a shard's agent changes state"""
+        self.status_listeners.append(listener)
+
+    def _publish_status(self):
+        if not self.status_listeners:
+            return
+        status = self.get_system_status()
+        key = (status["orchestrator_running"],
+               tuple((agent_type, s["status"]) for agent_type, s in status["agents"].items()))
+        if key == self._last_status_key:
+            return
+        self._last_status_key = key
+        for listener in self.status_listeners:
+            try:
+                listener(status)
+            except Exception as e:
+                self.logger.error(f"Status listener failed: {str(e)}")
+
+    async def submit_task(self, task_type: TaskType, task_data: Dict[str, Any],
+                          priority: TaskPriority = TaskPriority.MEDIUM) -> TaskHandle:
+        """Send a task to its shard; await the returned handle for the result"""
+        if not self.accepting_tasks:
+            raise RuntimeError("Sharded orchestrator is not accepting tasks")
+        request_id = f"task_{uuid.uuid4().hex}"
+        shard_id = self.shard_for(task_data)
+        future = self._call(shard_id, "submit", task_type.value, task_data,
+                            priority.value, request_id=request_id)
+        future.add_done_callback(
+            lambda future: self._forward_cancel(shard_id, request_id) if future.cancelled() else None
+        )
+        return TaskHandle(request_id, future)
+
+    def _forward_cancel(self, shard_id: int, request_id: str):
+        """The caller cancelled the handle; cancel the task in its shard too"""
+        if self._pending.pop(request_id, None) is None:
+            return
+        if self._processes[shard_id].is_alive():
+            self._requests[shard_id].put(("cancel", request_id))
+
+    def _call(self, shard_id: int, op: str, *args, request_id: Optional[str] = None) -> asyncio.Future:
+        request_id = request_id or uuid.uuid4().hex
+        future = self._loop.create_future()
+        if not self._processes[shard_id].is_alive():
+            future.set_exception(ShardUnavailableError(f"Orchestrator shard {shard_id} has exited"))
+            future.exception()
+            return future
+        self._pending[request_id] = (shard_id, future)
+        self._requests[shard_id].put((op, request_id, *args))
+        return future
+
+    def _live_shards(self) -> List[int]:
+        return [shard_id for shard_id, process in enumerate(self._processes) if process.is_alive()]
+
+    def _read_responses(self):
+        """Reader thread: hand shard replies to the event loop until woken for shutdown"""
+        wakeup = self._wakeup_receiver
+        shards = {connection: shard_id for shard_id, connection in enumerate(self._responses)}
+        while True:
+            for connection in wait([wakeup, *shards]):
+                if connection is wakeup:
+                    return
+                try:
+                    message = connection.recv()
+                except EOFError:
+                    shard_id = shards.pop(connection)
+                    self._loop.call_soon_threadsafe(self._fail_shard, shard_id)
+                    continue
+                self._loop.call_soon_threadsafe(self._settle, shards[connection], *message)
+
+    def _settle(self, shard_id: int, request_id: Optional[str], ok: bool, data: bytes):
+        if request_id is None:
+            self._shard_status[shard_id] = pickle.loads(data)
+            self._publish_status()
+            return
+        _, future = self._pending.pop(request_id, (None, None))
+        if future is None or future.done():
+            return
+        payload = pickle.loads(data)
+        if ok:
+            future.set_result(payload)
+        else:
+            future.set_exception(payload)
+            # Don't warn if nobody awaits the handle
+            future.exception()
+
+    def _fail_shard(self, shard_id: int):
+        self._shard_status[shard_id] = {
+            "error": f"Orchestrator shard {shard_id} has exited", "orchestrator_running": False
+        }
+        self._publish_status()
+        for request_id, (owner, future) in list(self._pending.items()):
+            if owner != shard_id:
+                continue
+            del self._pending[request_id]
+            if not future.done():
+                future.set_exception(ShardUnavailableError(f"Orchestrator shard {shard_id} has exited"))
+                future.exception()
+
+    def get_system_status(self) -> Dict[str, Any]:
+        """Totals across shards, every agent's worst status and each shard's last reported status"""
+        shards = {
+            shard_id: self._shard_status.get(shard_id, {"orchestrator_running": False})
+            for shard_id in range(self.num_shards)
+        }
+        status = {
+            "orchestrator_running": self.is_running and all(s["orchestrator_running"] for s in shards.values()),
+            "num_shards": self.num_shards,
+            "live_shards": len(self._live_shards()),
+        }
+        for field in SUMMED_STATUS_FIELDS:
+            status[field] = sum(s.get(field, 0) for s in shards.values())
+        agents: Dict[str, Dict[str, Any]] = {}
+        for shard_id, shard in shards.items():
+            for agent_type, agent in shard.get("agents", {}).items():
+                entry = agents.setdefault(agent_type, {
+                    "status": agent["status"], "task_count": 0, "error_count": 0, "in_flight": 0, "shards": {}
+                })
+                for field in ("task_count", "error_count", "in_flight"):
+                    entry[field] += agent.get(field, 0)
+                entry["shards"][shard_id] = agent["status"]
+                if AGENT_STATUS_ORDER.index(agent["status"]) < AGENT_STATUS_ORDER.index(entry["status"]):
+                    entry["status"] = agent["status"]
+        status["agents"] = agents
+        status["shards"] = shards
+        return status
+
+    async def health_check(self) -> bool:
+        """Healthy when every shard process is alive and reports healthy agents"""
+        replies = await asyncio.gather(
+            *(self._call(shard_id, "health") for shard_id in range(self.num_shards)),
+            return_exceptions=True
+        )
+        return all(reply is True for reply in replies)
+
+
+def create_orchestrator(agent_factory: AgentFactory, max_concurrent_tasks: Optional[int] = None):
+    """
+    Orchestrator for agents_config.yaml's orchestrator.shards setting
+
+    shards > 1 gives a ShardedOrchestrator with that many processes;
+    otherwise a single in-process AgentOrchestrator with the agents of
+    agent_factory registered.
+    """
+    num_shards = get_setting("agents_config", "agents.orchestrator.shards", 1)
+    if num_shards > 1:
+        return ShardedOrchestrator(agent_factory, num_shards, max_concurrent_tasks)
+    orchestrator = AgentOrchestrator(max_concurrent_tasks)
+    agent_factory(orchestrator)
+    return orchestrator
@@ -0,0 +1,512 @@
+"""
+Priority Task Queue
+Queue backends for the orchestrator: higher-priority tasks first, FIFO
+within a priority, with aging so low-priority tasks cannot starve; kept
+in memory or durably in SQLite
+"""
+
+import json
+import time
+import sqlite3
+import asyncio
+import logging
+import threading
+from collections import deque
+from pathlib import Path
+from typing import Any, Callable, Deque, Dict, List, Optional, Tuple
+
+from utils.config import get_setting
+
+logger = logging.getLogger("task_queue")
+
+DEFAULT_AGING_SECONDS = 30.0
+DEFAULT_VISIBILITY_TIMEOUT_SECONDS = 360.0
+DEFAULT_MAX_DELIVERIES = 5
+DEFAULT_COMMIT_INTERVAL_SECONDS = 0.005
+DEFAULT_COMMIT_BATCH_SIZE = 100
+
+
+class PriorityTaskQueue(asyncio.Queue):
+    """
+    Drop-in replacement for asyncio.Queue holding orchestrator task dicts
+
+    Tasks are bucketed by their integer "priority" and "task_type" into
+    one FIFO deque per (priority, task type). get() takes the head of the
+    bucket with the highest effective priority:
+
+        effective = priority + seconds_waited / aging_seconds
+
+    so a waiting task gains one priority level every aging_seconds. Ties
+    go to the task that has waited longest. Only bucket heads are
+    compared, so get() costs O(priorities x task types).
+
+    With set_gate(gate), get() only takes tasks whose task type the gate
+    admits (e.g. whose agent has a free slot); the rest stay queued in
+    order. Call wake() when the gate may admit more, so a blocked get()
+    looks again.
+    """
+
+    def __init__(self, maxsize: int = 0, aging_seconds: float = DEFAULT_AGING_SECONDS):
+        self.aging_seconds = aging_seconds
+        self._gate: Optional[Callable[[Optional[str]], bool]] = None
+        super().__init__(maxsize)
+
+    def qsize(self) -> int:
+        return self._size
+
+    def empty(self) -> bool:
+        return self._size == 0
+
+    # asyncio.Queue storage hooks, as overridden by asyncio.PriorityQueue
+
+    def _init(self, maxsize: int):
+        self._buckets: Dict[Tuple[int, Optional[str]], Deque[Tuple[float, Dict[str, Any]]]] = {}
+        self._size = 0
+
+    def _put(self, task: Dict[str, Any]):
+        self._add(task, time.monotonic())
+
+    def _add(self, task: Dict[str, Any], enqueued_at: float):
+        bucket = self._buckets.setdefault((task["priority"], task.get("task_type")), deque())
+        bucket.append((enqueued_at, task))
+        self._size += 1
+
+    def _get(self) -> Dict[str, Any]:
+        bucket = self._next_bucket(time.monotonic())
+        _, task = self._buckets[bucket].popleft()
+        self._size -= 1
+        return task
+
+    def _next_bucket(self, now: float, gated: bool = True) -> Optional[Tuple[int, Optional[str]]]:
+        best_bucket, best_key = None, None
+        admitted: Dict[Optional[str], bool] = {}
+        for bucket_key, bucket in self._buckets.items():
+            if not bucket:
+                continue
+            priority, task_type = bucket_key
+            if gated and self._gate is not None:
+                if task_type not in admitted:
+                    admitted[task_type] = self._gate(task_type)
+                if not admitted[task_type]:
+                    continue
+            enqueued_at = bucket[0][0]
+            key = (priority + (now - enqueued_at) / self.aging_seconds, -enqueued_at)
+            if best_key is None or key > best_key:
+                best_bucket, best_key = bucket_key, key
+        return best_bucket
+
+    def put_waited(self, task: Dict[str, Any], waited: float):
+        """
+        put_nowait() for a task that has already waited `waited` seconds,
+        so it keeps its aging; tasks must be added oldest first
+        """
+        enqueued_at = time.monotonic() - max(0.0, waited)
+        bucket = self._buckets.get((task["priority"], task.get("task_type")))
+        if bucket and bucket[-1][0] > enqueued_at:
+            raise ValueError("put_waited() would put a task behind newer ones")
+        self._add(task, enqueued_at)
+        self._unfinished_tasks += 1
+        self._finished.clear()
+        self._wakeup_next(self._getters)
+
+    def set_gate(self, gate: Optional[Callable[[Optional[str]], bool]]):
+        """Only hand out tasks whose task type gate(task_type) admits"""
+        self._gate = gate
+        self.wake()
+
+    def wake(self):
+        """Let a get() blocked on the gate look for an admitted task again"""
+        if self._next_bucket(time.monotonic()) is not None:
+            self._wakeup_next(self._getters)
+
+    async def get(self) -> Dict[str, Any]:
+        """Remove and return the next admitted task, waiting until there is one"""
+        while self._next_bucket(time.monotonic()) is None:
+            getter = self._get_loop().create_future()
+            self._getters.append(getter)
+            try:
+                await getter
+            except BaseException:
+                getter.cancel()
+                if getter in self._getters:
+                    self._getters.remove(getter)
+                elif not getter.cancelled():
+                    # Woken but not taking the task; pass the wakeup on
+                    self.wake()
+                raise
+        return self.get_nowait()
+
+    def get_nowait(self) -> Dict[str, Any]:
+        if self._next_bucket(time.monotonic()) is None:
+            raise asyncio.QueueEmpty
+        task = self._get()
+        self._wakeup_next(self._putters)
+        return task
+
+    def depths(self) -> Dict[int, Dict[str, Any]]:
+        """Queued task count and oldest wait (seconds) per priority"""
+        now = time.monotonic()
+        depths: Dict[int, Dict[str, Any]] = {}
+        for (priority, _), bucket in sorted(self._buckets.items(), key=lambda item: item[0][0], reverse=True):
+            entry = depths.setdefault(priority, {"depth": 0, "oldest_wait_seconds": 0.0})
+            entry["depth"] += len(bucket)
+            if bucket:
+                entry["oldest_wait_seconds"] = max(entry["oldest_wait_seconds"], round(now - bucket[0][0], 3))
+        return depths
+
+    def type_depths(self) -> Dict[Optional[str], int]:
+        """Queued task count per task type"""
+        counts: Dict[Optional[str], int] = {}
+        for (_, task_type), bucket in self._buckets.items():
+            counts[task_type] = counts.get(task_type, 0) + len(bucket)
+        return counts
+
+    def peek(self) -> Optional[Dict[str, Any]]:
+        """The task get() would return next, without removing it"""
+        bucket = self._next_bucket(time.monotonic())
+        if bucket is None:
+            return None
+        return self._buckets[bucket][0][1]
+
+    # Delivery acknowledgement and leases; nothing to record for an in-memory queue
+
+    def hold_lease(self, task: Dict[str, Any]):
+        pass
+
+    def renew_lease(self, task: Dict[str, Any]):
+        pass
+
+    def ack(self, task: Dict[str, Any]):
+        pass
+
+    def nack(self, task: Dict[str, Any], error: BaseException):
+        pass
+
+    async def close(self):
+        pass
+
+    def get_stats(self) -> Dict[str, Any]:
+        return {"backend": "memory"}
+
+
+class SQLiteTaskQueue:
+    """
+    Durable priority queue persisted to a local SQLite file (WAL mode)
+
+    Same interface as PriorityTaskQueue plus at-least-once delivery:
+
+    - put() returns once the task is committed. Concurrent writes are
+      group-committed: they are collected for commit_interval seconds (or
+      until commit_batch_size) and written in one transaction.
+    - get() leases the task for visibility_timeout seconds. ack() deletes
+      it; nack() moves it to the dead-letter state with the error.
+      hold_lease() pauses the lease while the consumer keeps the task
+      waiting and renew_lease() restarts it once the task runs.
+    - A lease that expires without an ack (crashed or hung worker) makes
+      the task available again, even if no other get() or put() happens.
+      After max_deliveries it is dead-lettered instead.
+    - On startup, tasks that were ready or leased when the previous
+      process exited are queued again in their original order, keeping
+      the aging they built up since they were first put.
+
+    Ready tasks are mirrored in an in-memory PriorityTaskQueue, which does
+    the ordering and waiting; SQLite is only written, never polled.
+    """
+
+    def __init__(self, path: str, aging_seconds: float = DEFAULT_AGING_SECONDS,
+                 visibility_timeout: float = DEFAULT_VISIBILITY_TIMEOUT_SECONDS,
+                 max_deliveries: int = DEFAULT_MAX_DELIVERIES,
+                 commit_interval: float = DEFAULT_COMMIT_INTERVAL_SECONDS,
+                 commit_batch_size: int = DEFAULT_COMMIT_BATCH_SIZE):
+        self.path = path
+        self.visibility_timeout = visibility_timeout
+        self.max_deliveries = max_deliveries
+        self.commit_interval = commit_interval
+        self.commit_batch_size = commit_batch_size
+        self._ready = PriorityTaskQueue(aging_seconds=aging_seconds)
+        # task_id -> (lease expiry, deliveries so far, task)
+        self._leases: Dict[str, Tuple[float, int, Dict[str, Any]]] = {}
+        # Leases paused with hold_lease(), same layout
+        self._held: Dict[str, Tuple[float, int, Dict[str, Any]]] = {}
+        self._reaper: Optional[asyncio.Future] = None
+        self._deliveries: Dict[str, int] = {}
+        self._batch: List[Tuple[str, tuple]] = []
+        self._batch_future: Optional[asyncio.Future] = None
+        self._batch_timer: Optional[asyncio.TimerHandle] = None
+        self._commit_lock: Optional[asyncio.Lock] = None
+        self._commits = 0
+        self._dead = 0
+
+        self._db_lock = threading.Lock()
+        self._conn = sqlite3.connect(path, check_same_thread=False)
+        self._conn.execute("PRAGMA journal_mode=WAL")
+        self._conn.execute("PRAGMA synchronous=NORMAL")
+        self._conn.execute(
+            """
+            CREATE TABLE IF NOT EXISTS tasks (
+                task_id TEXT PRIMARY KEY,
+                priority INTEGER NOT NULL,
+                enqueued_at REAL NOT NULL,
+                status TEXT NOT NULL,
+                deliveries INTEGER NOT NULL DEFAULT 0,
+                lease_expires REAL,
+                error TEXT,
+                data TEXT NOT NULL
+            )
+            """
+        )
+        self._conn.execute("CREATE INDEX IF NOT EXISTS tasks_status ON tasks (status, enqueued_at)")
+        self._resume()
+        self._conn.commit()
+        self._dead = self._conn.execute("SELECT COUNT(*) FROM tasks WHERE status = 'dead'").fetchone()[0]
+
+    def _resume(self):
+        """Queue again every task that was ready or leased when the last process exited"""
+        rows = self._conn.execute(
+            "SELECT task_id, enqueued_at, deliveries, data FROM tasks WHERE status IN ('ready', 'leased') "
+            "ORDER BY enqueued_at"
+        ).fetchall()
+        now = time.time()
+        for task_id, enqueued_at, deliveries, data in rows:
+            if deliveries >= self.max_deliveries:
+                self._conn.execute(
+                    "UPDATE tasks SET status = 'dead', error = ? WHERE task_id = ?",
+                    (f"Exceeded {self.max_deliveries} deliveries", task_id)
+                )
+                continue
+            self._conn.execute(
+                "UPDATE tasks SET status = 'ready', lease_expires = NULL WHERE task_id = ?", (task_id,)
+            )
+            self._deliveries[task_id] = deliveries
+            self._ready.put_waited(json.loads(data), now - enqueued_at)
+        if rows:
+            logger.info(f"Resumed {len(self._deliveries)} queued tasks from {self.path}")
+
+    # Group commit
+
+    def _write(self, sql: str, params: tuple) -> asyncio.Future:
+        """Add a statement to the current batch; the future resolves once it is committed"""
+        loop = asyncio.get_running_loop()
+        self._batch.append((sql, params))
+        if self._batch_future is None:
+            self._batch_future = loop.create_future()
+            self._batch_timer = loop.call_later(self.commit_interval, self._flush)
+        future = self._batch_future
+        if len(self._batch) >= self.commit_batch_size:
+            self._batch_timer.cancel()
+            self._flush()
+        return future
+
+    def _write_in_background(self, sql: str, params: tuple):
+        """Batched write nobody waits for; failures are logged"""
+        def log_failure(future: asyncio.Future):
+            if not future.cancelled() and future.exception() is not None:
+                logger.error(f"Task queue write failed: {str(future.exception())}")
+        self._write(sql, params).add_done_callback(log_failure)
+
+    def _flush(self):
+        batch, future = self._batch, self._batch_future
+        self._batch, self._batch_future, self._batch_timer = [], None, None
+        if self._commit_lock is None:
+            self._commit_lock = asyncio.Lock()
+        asyncio.ensure_future(self._commit(batch, future))
+
+    async def _commit(self, batch: List[Tuple[str, tuple]], future: asyncio.Future):
+        # Batches commit one at a time, in order, so an ack never lands before its insert
+        async with self._commit_lock:
+            try:
+                await asyncio.to_thread(self._execute_batch, batch)
+                future.set_result(None)
+            except Exception as e:
+                future.set_exception(e)
+
+    def _execute_batch(self, batch: List[Tuple[str, tuple]]):
+        with self._db_lock:
+            with self._conn:
+                for sql, params in batch:
+                    self._conn.execute(sql, params)
+            self._commits += 1
+
+    # Queue interface
+
+    async def put(self, task: Dict[str, Any]):
+        await self._write(
+            "INSERT OR REPLACE INTO tasks (task_id, priority, enqueued_at, status, data) "
+            "VALUES (?, ?, ?, 'ready', ?)",
+            (task["task_id"], task["priority"], time.time(), json.dumps(task, default=str))
+        )
+        self._deliveries[task["task_id"]] = 0
+        self._ready.put_nowait(task)
+
+    async def get(self) -> Dict[str, Any]:
+        return self._lease(await self._ready.get())
+
+    def get_nowait(self) -> Dict[str, Any]:
+        """Lease the next ready task; raises asyncio.QueueEmpty if there is none"""
+        return self._lease(self._ready.get_nowait())
+
+    def _lease(self, task: Dict[str, Any]) -> Dict[str, Any]:
+        task_id = task["task_id"]
+        deliveries = self._deliveries.get(task_id, 0) + 1
+        self._deliveries[task_id] = deliveries
+        self._start_lease(task_id, deliveries, task)
+        return task
+
+    def _start_lease(self, task_id: str, deliveries: int, task: Dict[str, Any]):
+        expires = time.time() + self.visibility_timeout
+        self._leases[task_id] = (expires, deliveries, task)
+        self._write_in_background(
+            "UPDATE tasks SET status = 'leased', lease_expires = ?, deliveries = ? WHERE task_id = ?",
+            (expires, deliveries, task_id)
+        )
+        if self._reaper is None:
+            self._reaper = asyncio.ensure_future(self._reap())
+
+    def hold_lease(self, task: Dict[str, Any]):
+        """
+        Stop the lease clock while the consumer keeps the task waiting
+        (e.g. for a micro-batch to fill)
+        """
+        lease = self._leases.pop(task["task_id"], None)
+        if lease is not None:
+            self._held[task["task_id"]] = lease
+
+    def renew_lease(self, task: Dict[str, Any]):
+        """Restart the lease clock, e.g. when the task actually starts running"""
+        task_id = task["task_id"]
+        lease = self._held.pop(task_id, None) or self._leases.get(task_id)
+        if lease is not None:
+            _, deliveries, task = lease
+            self._start_lease(task_id, deliveries, task)
+
+    async def _reap(self):
+        """Redeliver expired leases, sleeping until the earliest one runs out"""
+        try:
+            while self._leases:
+                earliest = min(expires for expires, _, _ in self._leases.values())
+                await asyncio.sleep(max(0.0, earliest - time.time()))
+                self._requeue_expired()
+        finally:
+            self._reaper = None
+
+    def _requeue_expired(self):
+        now = time.time()
+        for task_id, (expires, deliveries, task) in list(self._leases.items()):
+            if expires > now:
+                continue
+            del self._leases[task_id]
+            if deliveries >= self.max_deliveries:
+                logger.warning(f"Task {task_id} dead-lettered after {deliveries} deliveries")
+                self._dead_letter(task_id, f"Lease expired after {deliveries} deliveries")
+            else:
+                logger.warning(f"Lease on task {task_id} expired; redelivering")
+                self._write_in_background(
+                    "UPDATE tasks SET status = 'ready', lease_expires = NULL WHERE task_id = ?", (task_id,)
+                )
+                self._ready.put_nowait(task)
+
+    def ack(self, task: Dict[str, Any]):
+        """The task finished; forget it"""
+        task_id = task["task_id"]
+        self._leases.pop(task_id, None)
+        self._held.pop(task_id, None)
+        self._deliveries.pop(task_id, None)
+        self._write_in_background("DELETE FROM tasks WHERE task_id = ?", (task_id,))
+
+    def nack(self, task: Dict[str, Any], error: BaseException):
+        """The task failed for good; keep it as a dead letter"""
+        task_id = task["task_id"]
+        self._leases.pop(task_id, None)
+        self._held.pop(task_id, None)
+        self._dead_letter(task_id, str(error))
+
+    def _dead_letter(self, task_id: str, error: str):
+        self._deliveries.pop(task_id, None)
+        self._dead += 1
+        self._write_in_background(
+            "UPDATE tasks SET status = 'dead', lease_expires = NULL, error = ? WHERE task_id = ?",
+            (error, task_id)
+        )
+
+    def dead_letters(self, limit: int = 50) -> List[Dict[str, Any]]:
+        with self._db_lock:
+            rows = self._conn.execute(
+                "SELECT data, deliveries, error FROM tasks WHERE status = 'dead' "
+                "ORDER BY enqueued_at DESC LIMIT ?", (limit,)
+            ).fetchall()
+        return [{"task": json.loads(data), "deliveries": deliveries, "error": error}
+                for data, deliveries, error in rows]
+
+    def set_gate(self, gate: Optional[Callable[[Optional[str]], bool]]):
+        self._ready.set_gate(gate)
+
+    def wake(self):
+        self._ready.wake()
+
+    def task_done(self):
+        self._ready.task_done()
+
+    async def join(self):
+        await self._ready.join()
+
+    def qsize(self) -> int:
+        return self._ready.qsize()
+
+    def empty(self) -> bool:
+        return self._ready.empty()
+
+    def depths(self) -> Dict[int, Dict[str, Any]]:
+        return self._ready.depths()
+
+    def type_depths(self) -> Dict[Optional[str], int]:
+        return self._ready.type_depths()
+
+    async def close(self):
+        """Commit any pending writes and close the database"""
+        if self._reaper is not None:
+            self._reaper.cancel()
+        if self._batch:
+            self._batch_timer.cancel()
+            future = self._batch_future
+            self._flush()
+            await future
+        if self._commit_lock is not None:
+            async with self._commit_lock:
+                pass
+        with self._db_lock:
+            self._conn.close()
+
+    def get_stats(self) -> Dict[str, Any]:
+        return {
+            "backend": "sqlite",
+            "path": self.path,
+            "leased": len(self._leases) + len(self._held),
+            "dead_letters": self._dead,
+            "commits": self._commits,
+        }
+
+
+def create_task_queue(shard_id: Optional[int] = None):
+    """
+    Build the queue backend selected by orchestrator.queue.backend in agents_config.yaml
+
+    Each orchestrator shard gets its own SQLite file (tasks.shard<N>.db)
+    so shard processes never contend for the same database.
+    """
+    def setting(key: str, default: Any) -> Any:
+        return get_setting("agents_config", f"agents.orchestrator.{key}", default)
+
+    aging = setting("priority_aging_seconds", DEFAULT_AGING_SECONDS)
+    if setting("queue.backend", "memory") == "sqlite":
+        path = Path(setting("queue.path", "tasks.db"))
+        if shard_id is not None:
+            path = path.with_name(f"{path.stem}.shard{shard_id}{path.suffix}")
+        return SQLiteTaskQueue(
+            str(path),
+            aging_seconds=aging,
+            visibility_timeout=setting("queue.visibility_timeout_seconds", DEFAULT_VISIBILITY_TIMEOUT_SECONDS),
+            max_deliveries=setting("queue.max_deliveries", DEFAULT_MAX_DELIVERIES),
+            commit_interval=setting("queue.commit_interval_ms", DEFAULT_COMMIT_INTERVAL_SECONDS * 1000) / 1000,
+            commit_batch_size=setting("queue.commit_batch_size", DEFAULT_COMMIT_BATCH_SIZE),
+        )
+    return PriorityTaskQueue(aging_seconds=aging)
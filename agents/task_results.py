@@ -0,0 +1,83 @@
+"""
+Task Results
+Awaitable handles for submitted orchestrator tasks and a bounded store of
+recently finished results
+"""
+
+import time
+import asyncio
+from collections import OrderedDict
+from typing import Any, Dict, Generator, Optional
+
+DEFAULT_MAX_RETAINED = 1000
+DEFAULT_RETENTION_SECONDS = 3600
+
+
+class TaskHandle:
+    """
+    Returned by AgentOrchestrator.submit_task
+
+    Await it for the agent's result; it raises whatever the agent raised.
+    """
+
+    def __init__(self, task_id: str, future: asyncio.Future):
+        self.task_id = task_id
+        self.future = future
+
+    def __await__(self) -> Generator[Any, None, Any]:
+        return self.future.__await__()
+
+    def done(self) -> bool:
+        return self.future.done()
+
+    def result(self) -> Any:
+        return self.future.result()
+
+    def cancel(self) -> bool:
+        """Give up on the task: it is skipped if not yet started, else its agent call is cancelled"""
+        return self.future.cancel()
+
+    def __repr__(self) -> str:
+        state = "done" if self.done() else "pending"
+        return f"<TaskHandle {self.task_id} {state}>"
+
+
+class TaskResultStore:
+    """
+    Outcome of finished tasks, keyed by task_id
+
+    Entries older than retention_seconds are dropped, and the oldest
+    entries are evicted beyond max_retained.
+    """
+
+    def __init__(self, max_retained: int = DEFAULT_MAX_RETAINED,
+                 retention_seconds: float = DEFAULT_RETENTION_SECONDS):
+        self.max_retained = max_retained
+        self.retention_seconds = retention_seconds
+        self._results: "OrderedDict[str, Dict[str, Any]]" = OrderedDict()
+
+    def record(self, task_id: str, result: Any = None, error: Optional[BaseException] = None):
+        self._results[task_id] = {
+            "task_id": task_id,
+            "status": "failed" if error is not None else "succeeded",
+            "result": result,
+            "error": str(error) if error is not None else None,
+            "finished_at": time.time(),
+        }
+        self._results.move_to_end(task_id)
+        self._prune()
+
+    def get(self, task_id: str) -> Optional[Dict[str, Any]]:
+        self._prune()
+        return self._results.get(task_id)
+
+    def _prune(self):
+        cutoff = time.time() - self.retention_seconds
+        while self._results:
+            oldest = next(iter(self._results.values()))
+            if len(self._results) <= self.max_retained and oldest["finished_at"] >= cutoff:
+                break
+            self._results.popitem(last=False)
+
+    def __len__(self) -> int:
+        return len(self._results)
@@ -4,28 +4,327 @@ FastAPI server connecting AI agents to frontend
 """
 
 import os
-from fastapi import FastAPI, HTTPException
+import asyncio
+import hashlib
+from contextlib import asynccontextmanager
+from fastapi import FastAPI, HTTPException, Query, Request
 from fastapi.middleware.cors import CORSMiddleware
+from fastapi.responses import JSONResponse, Response, StreamingResponse
 from pydantic import BaseModel
-from typing import Optional
+from typing import Callable, List, Literal, Optional, Union
 from dotenv import load_dotenv
-import uvicorn
 
 load_dotenv()
 
-from agents.data_analysis_agent.agent import DataAnalysisAgent
-from agents.diagnosis_agent.agent import DiagnosisAgent
-from agents.customer_engagement_agent.agent import CustomerEngagementAgent
-from agents.scheduling_agent.agent import SchedulingAgent
-from agents.feedback_agent.agent import FeedbackAgent
-from utils.mock_data import get_vehicle, get_all_vehicles
+# Agent modules pull in crewai/langchain, which take seconds to import.
+# They are loaded lazily (see AGENT_FACTORIES) so the server can answer
+# /api/health immediately after start-up.
+from utils.vehicle_store import (
+    DEFAULT_PAGE_SIZE, MAX_PAGE_SIZE, InvalidCursorError, get_vehicle_store
+)
+from utils.alert_store import get_alert_store
+from utils.change_log import ResyncRequiredError, etag_headers, etag_matches
+from utils.broadcast import Broadcaster, add_event_stream
+from utils.agent_pool import AgentRegistry, PoolExhaustedError, lazy_factory
+from utils.agent_executor import AgentExecutor, ExecutorSaturatedError
+from utils.streaming import sse_event, ndjson_line
+from utils.result_cache import result_cache
+from utils.jobs import JobManager
+from utils.single_flight import SingleFlight
+from utils.metrics import (
+    AGENT_CALL_DURATION, AGENT_CALL_ERRORS, AGENT_CALLS_IN_FLIGHT, instrument_app,
+    registry as metrics_registry
+)
+from agents.llm import default_model
+
+AGENT_FACTORIES = {
+    "data_analysis": lazy_factory("agents.data_analysis_agent.agent:DataAnalysisAgent"),
+    "diagnosis": lazy_factory("agents.diagnosis_agent.agent:DiagnosisAgent"),
+    "customer_engagement": lazy_factory(
+        "agents.customer_engagement_agent.agent:CustomerEngagementAgent"),
+    "scheduling": lazy_factory("agents.scheduling_agent.agent:SchedulingAgent"),
+    "feedback": lazy_factory("agents.feedback_agent.agent:FeedbackAgent"),
+}
+
+# Warm the agent pools in the background after start-up (AGENT_PREWARM=false
+# defers agent construction to the first request instead)
+AGENT_PREWARM = os.getenv("AGENT_PREWARM", "true").lower() == "true"
+
+# Raised when the server is out of agent capacity; surfaced as 503
+OVERLOAD_ERRORS = (ExecutorSaturatedError, PoolExhaustedError)
+
+# Upper bound on concurrent analyses per /api/analyze/batch request
+BATCH_ANALYSIS_CONCURRENCY = int(os.getenv("BATCH_ANALYSIS_CONCURRENCY", "4"))
+
+
+@asynccontextmanager
+async def lifespan(app: FastAPI):
+    """
+    Create the agent executor and start pre-warming the agent pools
+
+    Warming runs in a background thread so the server starts serving
+    (and answering liveness checks) straight away; /api/ready reports
+    when the pools are warm.
+    """
+    agent_registry = AgentRegistry(AGENT_FACTORIES)
+    app.state.agent_registry = agent_registry
+
+    # Pushed after warm-up and whenever an agent type fails, recovers or loses an agent
+    def publish_agent_status(registry: AgentRegistry):
+        event_broadcaster.publish("agent_status", agent_status(registry))
+    agent_registry.add_listener(publish_agent_status)
+    app.state.prewarm_task = None
+    if AGENT_PREWARM:
+        app.state.prewarm_task = asyncio.create_task(asyncio.to_thread(agent_registry.warm_all))
+    app.state.agent_executor = AgentExecutor()
+    app.state.job_manager = JobManager()
+    app.state.single_flight = SingleFlight()
+
+    def publish_alert(action: str, alert: dict):
+        event_broadcaster.publish("alerts", {"action": action, "alert": alert})
+    alert_store = get_alert_store()
+    alert_store.add_listener(publish_alert)
+    yield
+    alert_store.remove_listener(publish_alert)
+    agent_registry.remove_listener(publish_agent_status)
+    await app.state.job_manager.shutdown()
+    app.state.agent_executor.shutdown(wait=False)
+
+
+def agent_status(agent_registry: AgentRegistry) -> dict:
+    """Agent readiness as pushed on the agent_status event topic"""
+    return {
+        "ready": agent_registry.is_warm,
+        "warm_errors": agent_registry.warm_errors,
+        "agent_pools": agent_registry.get_stats()
+    }
+
+
+async def run_agent(agent_type: str, method: str, *args,
+                    on_token: Optional[Callable[[str], None]] = None, **kwargs):
+    """
+    Call a pooled agent method on the agent executor
+
+    Agent calls block on Crew.kickoff(), so they must never run on the
+    event loop directly. The call waits for a free agent of its type on
+    the event loop before taking an executor thread, so a busy pool never
+    parks threads that other agent types need. on_token, if given,
+    receives each streamed LLM token from the worker thread.
+    """
+    agent_registry = app.state.agent_registry
+
+    def call():
+        with AGENT_CALLS_IN_FLIGHT.track_in_progress(agent=agent_type), \
+                AGENT_CALL_DURATION.time(agent=agent_type, method=method):
+            try:
+                with agent_registry.agent(agent_type) as agent:
+                    relay = getattr(agent, "token_relay", None)
+                    if relay is not None:
+                        relay.sink = on_token
+                    try:
+                        return getattr(agent, method)(*args, **kwargs)
+                    finally:
+                        if relay is not None:
+                            relay.sink = None
+            except Exception:
+                AGENT_CALL_ERRORS.inc(agent=agent_type, method=method)
+                raise
+
+    async with agent_registry.slot(agent_type):
+        return await app.state.agent_executor.run(call)
+
+
+def workflow_vehicle_info(vehicle: dict) -> dict:
+    """Vehicle fields echoed back by the workflow endpoints"""
+    return {
+        "model": vehicle["model"],
+        "year": vehicle["year"],
+        "owner": vehicle["owner"],
+        "type": vehicle["type"]
+    }
+
+
+def vehicle_summary(vehicle: dict) -> dict:
+    """Vehicle fields passed to the diagnosis agent"""
+    return {
+        "model": vehicle["model"],
+        "year": vehicle["year"],
+        "type": vehicle["type"]
+    }
+
+
+def record_findings(vehicle: dict, **results):
+    """
+    Refresh a vehicle's alerts from its readings and attach agent results
+
+    results (analysis=..., diagnosis=...) are stored on the vehicle's
+    alerts, so every new finding is pushed on the alerts event topic.
+    """
+    from agents.data_analysis_agent.rules import evaluate_vehicle
+
+    get_alert_store().sync_vehicle(
+        vehicle["vehicle_id"], evaluate_vehicle(vehicle)["anomalies"], details=results
+    )
+
+
+async def workflow_stages(vehicle: dict,
+                          on_token: Optional[Callable[[str, str], None]] = None,
+                          use_cache: bool = True):
+    """
+    Run analysis -> diagnosis -> call script, yielding (stage, result)
+    as soon as each stage finishes
+
+    on_token, if given, is called as on_token(stage, token) for every
+    streamed LLM token.
+    """
+    def stage_tokens(stage):
+        if on_token is None:
+            return None
+        return lambda token: on_token(stage, token)
+
+    print(f"Analyzing vehicle {vehicle['vehicle_id']}...")
+    analysis = await run_agent(
+        "data_analysis", "analyze", vehicle,
+        on_token=stage_tokens("analysis"), use_cache=use_cache
+    )
+    record_findings(vehicle, analysis=analysis)
+    yield "analysis", analysis
+
+    print(f"Generating diagnosis...")
+    diagnosis = await run_agent(
+        "diagnosis", "diagnose", analysis, vehicle_summary(vehicle),
+        on_token=stage_tokens("diagnosis"), use_cache=use_cache
+    )
+    record_findings(vehicle, diagnosis=diagnosis)
+    yield "diagnosis", diagnosis
+
+    print(f"Generating call script...")
+    call_script = await run_agent(
+        "customer_engagement", "generate_call_script", vehicle["owner"], diagnosis,
+        on_token=stage_tokens("call_script")
+    )
+    yield "call_script", call_script
+
+
+def resolve_vehicle_ids(vehicle_ids: Union[List[str], str]) -> List[str]:
+    """Expand "all" to every known vehicle and drop duplicate IDs"""
+    if vehicle_ids == "all":
+        return list(get_vehicle_store().all())
+    return list(dict.fromkeys(vehicle_ids))
+
+
+def batch_concurrency(requested: Optional[int]) -> int:
+    """Requested batch concurrency, capped at BATCH_ANALYSIS_CONCURRENCY"""
+    if requested:
+        return max(1, min(requested, BATCH_ANALYSIS_CONCURRENCY))
+    return BATCH_ANALYSIS_CONCURRENCY
+
+
+async def analyze_fleet(vehicle_ids: List[str], concurrency: int, use_cache: bool = True):
+    """
+    Analyze vehicles concurrently, yielding one result dict per vehicle
+    in completion order
+
+    The whole fleet is screened with the threshold rules first; only
+    vehicles with anomalies are escalated to the LLM. Failures (unknown
+    vehicle, agent errors) are reported per vehicle rather than aborting
+    the whole batch.
+    """
+    from agents.data_analysis_agent.rules import evaluate_fleet, healthy_report
+    
+    semaphore = asyncio.Semaphore(concurrency)
+    vehicles = {vid: get_vehicle_store().get(vid) for vid in vehicle_ids}
+    known = [vehicle for vehicle in vehicles.values() if vehicle]
+    findings = {vehicle["vehicle_id"]: f for vehicle, f in zip(known, evaluate_fleet(known))}
+
+    async def analyze_one(vehicle_id: str) -> dict:
+        vehicle = vehicles[vehicle_id]
+        if not vehicle:
+            return {"vehicle_id": vehicle_id, "success": False, "error": "Vehicle not found"}
+        screening = findings[vehicle_id]
+        result = {
+            "vehicle_id": vehicle_id,
+            "severity": screening["severity"],
+            "escalated": screening["needs_llm"]
+        }
+        if not screening["needs_llm"]:
+            get_alert_store().sync_vehicle(vehicle_id, screening["anomalies"])
+            return {**result, "success": True, "analysis": healthy_report()}
+        async with semaphore:
+            try:
+                analysis = await run_agent(
+                    "data_analysis", "analyze", vehicle, use_cache=use_cache, use_rules=False
+                )
+            except Exception as e:
+                return {**result, "success": False, "error": str(e)}
+        get_alert_store().sync_vehicle(vehicle_id, screening["anomalies"], details={"analysis": analysis})
+        return {**result, "success": True, "analysis": analysis}
+
+    tasks = [asyncio.create_task(analyze_one(vid)) for vid in vehicle_ids]
+    try:
+        for next_done in asyncio.as_completed(tasks):
+            yield await next_done
+    finally:
+        for task in tasks:
+            task.cancel()
+
+
+def fleet_summary(vehicle_ids: List[str], failed: List[str], concurrency: int) -> dict:
+    return {
+        "total": len(vehicle_ids),
+        "succeeded": len(vehicle_ids) - len(failed),
+        "failed": len(failed),
+        "failed_vehicle_ids": failed,
+        "concurrency": concurrency
+    }
+
+
+def not_modified(request: Request, etag: str) -> Optional[Response]:
+    """304 response if the client's If-None-Match already matches etag"""
+    if etag_matches(request.headers.get("if-none-match"), etag):
+        return Response(status_code=304, headers=etag_headers(etag))
+    return None
+
 
 app = FastAPI(
     title="AI Predictive Maintenance API",
     description="Backend API for Automotive Predictive Maintenance System",
-    version="1.0.0"
+    version="1.0.0",
+    lifespan=lifespan
 )
 
+instrument_app(app)
+
+# Pushes alert changes and agent status to dashboards over /ws/events
+event_broadcaster = Broadcaster()
+add_event_stream(app, event_broadcaster)
+
+EXECUTOR_QUEUE_DEPTH = metrics_registry.gauge(
+    "agent_executor_queue_depth", "Agent calls waiting for an executor thread")
+EXECUTOR_RUNNING = metrics_registry.gauge(
+    "agent_executor_running", "Agent calls running on executor threads")
+POOL_IN_USE = metrics_registry.gauge(
+    "agent_pool_in_use", "Pooled agents currently checked out", ["agent"])
+POOL_IDLE = metrics_registry.gauge(
+    "agent_pool_idle", "Pooled agents idle and ready", ["agent"])
+
+
+def collect_server_gauges():
+    """Copy executor and pool state into gauges at scrape time"""
+    executor = getattr(app.state, "agent_executor", None)
+    if executor is not None:
+        stats = executor.get_stats()
+        EXECUTOR_QUEUE_DEPTH.set(stats["queue_depth"])
+        EXECUTOR_RUNNING.set(stats["running"])
+    agent_registry = getattr(app.state, "agent_registry", None)
+    if agent_registry is not None:
+        for agent_type, stats in agent_registry.get_stats().items():
+            POOL_IN_USE.set(stats["in_use"], agent=agent_type)
+            POOL_IDLE.set(stats["idle"], agent=agent_type)
+
+
+metrics_registry.on_collect(collect_server_gauges)
+
 # CORS middleware
 app.add_middleware(
     CORSMiddleware,
@@ -38,15 +337,29 @@ app.add_middleware(
 # Request models
 class VehicleAnalysisRequest(BaseModel):
     vehicle_id: str
+    bypass_cache: bool = False
+
+class BatchAnalysisRequest(BaseModel):
+    vehicle_ids: Union[List[str], Literal["all"]] = "all"
+    max_concurrency: Optional[int] = None
+    bypass_cache: bool = False
 
 class DiagnosisRequest(BaseModel):
     vehicle_id: str
     analysis: str
+    bypass_cache: bool = False
 
 class CallScriptRequest(BaseModel):
     customer_name: str
     diagnosis: str
 
+class JobRequest(BaseModel):
+    job_type: Literal["complete_workflow", "analyze", "batch_analysis"]
+    vehicle_id: Optional[str] = None
+    vehicle_ids: Union[List[str], Literal["all"]] = "all"
+    max_concurrency: Optional[int] = None
+    bypass_cache: bool = False
+
 class AppointmentRequest(BaseModel):
     name: str
     phone: str
@@ -63,35 +376,109 @@ def root():
         "version": "1.0.0",
         "endpoints": {
             "health": "/api/health",
+            "ready": "/api/ready",
             "vehicles": "/api/vehicles",
+            "alerts": "/api/alerts",
+            "events": "/ws/events",
             "docs": "/docs"
         }
     }
 
+@app.get("/api/ready")
+def readiness_check():
+    """
+    Readiness probe: 200 once the agent pools are warm, 503 before
+
+    Use /api/health for liveness; it answers as soon as the process is up.
+    """
+    agent_registry = app.state.agent_registry
+    ready = agent_registry.is_warm or not AGENT_PREWARM
+    return JSONResponse(
+        status_code=200 if ready else 503,
+        content={
+            "ready": ready,
+            "prewarm": AGENT_PREWARM,
+            "warmed_at": agent_registry.warmed_at,
+            "warm_errors": agent_registry.warm_errors
+        }
+    )
+
 @app.get("/api/health")
 def health_check():
-    """Health check endpoint"""
+    """Health (liveness) check endpoint"""
     api_key_status = "configured" if os.getenv("OPENAI_API_KEY") else "missing"
     return {
         "status": "healthy",
         "api_key": api_key_status,
-        "agents": ["data_analysis", "diagnosis", "customer_engagement", "scheduling", "feedback"]
+        "llm_model": default_model(),
+        "agents": list(AGENT_FACTORIES),
+        "agent_pools": app.state.agent_registry.get_stats(),
+        "agent_executor": app.state.agent_executor.get_stats(),
+        "result_cache": result_cache.get_stats(),
+        "jobs": app.state.job_manager.get_stats(),
+        "coalescing": app.state.single_flight.get_stats(),
+        "events": event_broadcaster.get_stats()
     }
 
 @app.get("/api/vehicles")
-def list_vehicles():
-    """Get all available vehicles"""
-    vehicles = get_all_vehicles()
-    return {
+def list_vehicles(
+    request: Request,
+    limit: int = Query(DEFAULT_PAGE_SIZE, ge=1, le=MAX_PAGE_SIZE),
+    cursor: Optional[str] = None,
+    fields: Optional[str] = Query(None, description="Comma-separated fields, e.g. vehicle_id,model,type"),
+    type: Optional[str] = None,
+    model: Optional[str] = None,
+    year: Optional[int] = None,
+    severity: Optional[str] = None,
+    since: Optional[str] = Query(None, description="Return only changes after this version token")
+):
+    """
+    List vehicles one page at a time
+
+    Pages are ordered by vehicle_id; pass next_cursor back as cursor to
+    fetch the following page. Filters use the store's indexes.
+
+    With since=<version> (the version token of a previous response, or 0)
+    only the vehicles changed since then and the IDs deleted since then
+    are returned; a token the server can no longer serve (e.g. from
+    before a restart) gets 410. Responses carry an ETag; a matching
+    If-None-Match gets 304.
+    """
+    store = get_vehicle_store()
+    etag = store.etag(request.url.query)
+    cached = not_modified(request, etag)
+    if cached:
+        return cached
+
+    projection = [f.strip() for f in fields.split(",") if f.strip()] if fields else None
+    filters = {"type": type, "model": model, "year": year, "severity": severity}
+
+    if since is not None:
+        if cursor or any(value is not None for value in filters.values()):
+            raise HTTPException(status_code=400, detail="since cannot be combined with cursor or filters")
+        try:
+            delta = store.changes_since(since, fields=projection)
+        except ResyncRequiredError as e:
+            raise HTTPException(status_code=410, detail=str(e))
+        return JSONResponse({"success": True, **delta}, headers=etag_headers(etag))
+
+    try:
+        page = store.query(filters, cursor=cursor, limit=limit, fields=projection)
+    except InvalidCursorError as e:
+        raise HTTPException(status_code=400, detail=str(e))
+    return JSONResponse({
         "success": True,
-        "count": len(vehicles),
-        "vehicles": vehicles
-    }
+        "version": page["version"],
+        "count": len(page["vehicles"]),
+        "total": page["total"],
+        "next_cursor": page["next_cursor"],
+        "vehicles": page["vehicles"]
+    }, headers=etag_headers(etag))
 
 @app.get("/api/vehicles/{vehicle_id}")
 def get_vehicle_details(vehicle_id: str):
     """Get specific vehicle information"""
-    vehicle = get_vehicle(vehicle_id)
+    vehicle = get_vehicle_store().get(vehicle_id)
     if not vehicle:
         raise HTTPException(status_code=404, detail="Vehicle not found")
     return {
@@ -99,43 +486,112 @@ def get_vehicle_details(vehicle_id: str):
         "vehicle": vehicle
     }
 
+@app.get("/api/alerts")
+def list_alerts(
+    request: Request,
+    vehicle_id: Optional[str] = None,
+    since: Optional[str] = Query(None, description="Return only changes after this version token")
+):
+    """
+    Active threshold alerts, newest first
+
+    Supports the same ETag / If-None-Match and since=<version> delta
+    sync as /api/vehicles.
+    """
+    store = get_alert_store()
+    etag = store.etag(request.url.query)
+    cached = not_modified(request, etag)
+    if cached:
+        return cached
+
+    if since is not None:
+        if vehicle_id:
+            raise HTTPException(status_code=400, detail="since cannot be combined with vehicle_id")
+        try:
+            delta = store.changes_since(since)
+        except ResyncRequiredError as e:
+            raise HTTPException(status_code=410, detail=str(e))
+        return JSONResponse({"success": True, **delta}, headers=etag_headers(etag))
+
+    alerts = store.list(vehicle_id)
+    return JSONResponse({
+        "success": True,
+        "version": store.version,
+        "count": len(alerts),
+        "alerts": alerts
+    }, headers=etag_headers(etag))
+
 @app.post("/api/analyze")
 async def analyze_vehicle(request: VehicleAnalysisRequest):
     """Analyze vehicle sensor data"""
-    vehicle = get_vehicle(request.vehicle_id)
+    vehicle = get_vehicle_store().get(request.vehicle_id)
     if not vehicle:
         raise HTTPException(status_code=404, detail="Vehicle not found")
     
     try:
-        agent = DataAnalysisAgent()
-        analysis = agent.analyze(vehicle)
+        use_cache = not request.bypass_cache
+        analysis = await app.state.single_flight.do(
+            f"analyze:{request.vehicle_id}:{use_cache}",
+            lambda: run_agent("data_analysis", "analyze", vehicle, use_cache=use_cache)
+        )
+        record_findings(vehicle, analysis=analysis)
         return {
             "success": True,
             "vehicle_id": request.vehicle_id,
             "analysis": analysis
         }
+    except OVERLOAD_ERRORS as e:
+        raise HTTPException(status_code=503, detail=str(e))
     except Exception as e:
         raise HTTPException(status_code=500, detail=str(e))
 
+@app.post("/api/analyze/batch")
+async def analyze_vehicle_batch(request: BatchAnalysisRequest):
+    """
+    Analyze many vehicles concurrently, streaming NDJSON results
+
+    One line per vehicle in completion order, each with success and either
+    analysis or error, followed by a final summary line.
+    """
+    vehicle_ids = resolve_vehicle_ids(request.vehicle_ids)
+    concurrency = batch_concurrency(request.max_concurrency)
+    
+    async def results():
+        failed = []
+        async for result in analyze_fleet(
+            vehicle_ids, concurrency, use_cache=not request.bypass_cache
+        ):
+            if not result["success"]:
+                failed.append(result["vehicle_id"])
+            yield ndjson_line(result)
+        yield ndjson_line({"summary": fleet_summary(vehicle_ids, failed, concurrency)})
+    
+    return StreamingResponse(results(), media_type="application/x-ndjson")
+
 @app.post("/api/diagnose")
 async def diagnose_vehicle(request: DiagnosisRequest):
     """Generate diagnosis from analysis"""
-    vehicle = get_vehicle(request.vehicle_id)
+    vehicle = get_vehicle_store().get(request.vehicle_id)
     if not vehicle:
         raise HTTPException(status_code=404, detail="Vehicle not found")
     
     try:
-        agent = DiagnosisAgent()
-        vehicle_info = {
-            "model": vehicle["model"],
-            "year": vehicle["year"],
-            "type": vehicle["type"]
-        }
-        diagnosis = agent.diagnose(request.analysis, vehicle_info)
+        use_cache = not request.bypass_cache
+        analysis_digest = hashlib.sha256(request.analysis.encode("utf-8")).hexdigest()
+        diagnosis = await app.state.single_flight.do(
+            f"diagnose:{request.vehicle_id}:{analysis_digest}:{use_cache}",
+            lambda: run_agent(
+                "diagnosis", "diagnose", request.analysis, vehicle_summary(vehicle),
+                use_cache=use_cache
+            )
+        )
+        record_findings(vehicle, diagnosis=diagnosis)
         return {
             "success": True,
             "diagnosis": diagnosis
         }
+    except OVERLOAD_ERRORS as e:
+        raise HTTPException(status_code=503, detail=str(e))
     except Exception as e:
         raise HTTPException(status_code=500, detail=str(e))
 
@@ -143,12 +599,16 @@ async def diagnose_vehicle(request: DiagnosisRequest):
 async def generate_call_script(request: CallScriptRequest):
     """Generate customer call script"""
     try:
-        agent = CustomerEngagementAgent()
-        script = agent.generate_call_script(request.customer_name, request.diagnosis)
+        script = await run_agent(
+            "customer_engagement", "generate_call_script",
+            request.customer_name, request.diagnosis
+        )
         return {
             "success": True,
             "script": script
         }
+    except OVERLOAD_ERRORS as e:
+        raise HTTPException(status_code=503, detail=str(e))
     except Exception as e:
         raise HTTPException(status_code=500, detail=str(e))
 
@@ -156,8 +616,7 @@ async def generate_call_script(request: CallScriptRequest):
 async def schedule_appointment(request: AppointmentRequest):
     """Schedule maintenance appointment"""
     try:
-        agent = SchedulingAgent()
-        booking = agent.schedule_appointment({
+        booking = await run_agent("scheduling", "schedule_appointment", {
             "name": request.name,
             "phone": request.phone,
             "preferred_time": request.preferred_time
@@ -166,6 +625,8 @@ async def schedule_appointment(request: AppointmentRequest):
             "success": True,
             "booking": booking
         }
+    except OVERLOAD_ERRORS as e:
+        raise HTTPException(status_code=503, detail=str(e))
     except Exception as e:
         raise HTTPException(status_code=500, detail=str(e))
 
@@ -173,61 +634,223 @@ async def schedule_appointment(request: AppointmentRequest):
 async def get_feedback_survey():
     """Get customer feedback survey"""
     try:
-        agent = FeedbackAgent()
-        survey = agent.generate_survey()
+        survey = await run_agent("feedback", "generate_survey")
         return {
             "success": True,
             "survey": survey
         }
+    except OVERLOAD_ERRORS as e:
+        raise HTTPException(status_code=503, detail=str(e))
     except Exception as e:
         raise HTTPException(status_code=500, detail=str(e))
 
 @app.post("/api/complete-workflow/{vehicle_id}")
-async def complete_workflow(vehicle_id: str):
+async def complete_workflow(vehicle_id: str, bypass_cache: bool = False):
     """Run complete maintenance workflow"""
-    vehicle = get_vehicle(vehicle_id)
+    vehicle = get_vehicle_store().get(vehicle_id)
     if not vehicle:
         raise HTTPException(status_code=404, detail="Vehicle not found")
     
     try:
-        # Step 1: Analysis
-        print(f"Analyzing vehicle {vehicle_id}...")
-        analysis_agent = DataAnalysisAgent()
-        analysis = analysis_agent.analyze(vehicle)
+        async def run_workflow():
+            return {
+                stage: result
+                async for stage, result in workflow_stages(vehicle, use_cache=not bypass_cache)
+            }
         
-        # Step 2: Diagnosis
-        print(f"Generating diagnosis...")
-        diagnosis_agent = DiagnosisAgent()
-        vehicle_info = {
-            "model": vehicle["model"],
-            "year": vehicle["year"],
-            "type": vehicle["type"]
-        }
-        diagnosis = diagnosis_agent.diagnose(analysis, vehicle_info)
-        
-        # Step 3: Call Script
-        print(f"Generating call script...")
-        engagement_agent = CustomerEngagementAgent()
-        call_script = engagement_agent.generate_call_script(vehicle["owner"], diagnosis)
+        results = await app.state.single_flight.do(
+            f"complete-workflow:{vehicle_id}:{not bypass_cache}", run_workflow
+        )
         
         return {
             "success": True,
             "vehicle_id": vehicle_id,
-            "vehicle_info": {
-                "model": vehicle["model"],
-                "year": vehicle["year"],
-                "owner": vehicle["owner"],
-                "type": vehicle["type"]
-            },
-            "analysis": analysis,
-            "diagnosis": diagnosis,
-            "call_script": call_script
+            "vehicle_info": workflow_vehicle_info(vehicle),
+            **results
         }
+    except OVERLOAD_ERRORS as e:
+        raise HTTPException(status_code=503, detail=str(e))
     except Exception as e:
         raise HTTPException(status_code=500, detail=str(e))
 
+@app.get("/api/complete-workflow/{vehicle_id}/stream")
+async def stream_complete_workflow(vehicle_id: str, bypass_cache: bool = False):
+    """
+    Run the complete workflow as a Server-Sent Events stream
+
+    Events: vehicle_info, then token events while each stage generates,
+    an analysis / diagnosis / call_script event as each stage finishes,
+    and finally done (or error).
+    """
+    vehicle = get_vehicle_store().get(vehicle_id)
+    if not vehicle:
+        raise HTTPException(status_code=404, detail="Vehicle not found")
+    
+    loop = asyncio.get_running_loop()
+    events: asyncio.Queue = asyncio.Queue()
+    
+    def on_token(stage: str, token: str):
+        # Called from the agent worker thread
+        loop.call_soon_threadsafe(
+            events.put_nowait, ("token", {"stage": stage, "token": token})
+        )
+    
+    async def produce():
+        try:
+            async for stage, result in workflow_stages(
+                vehicle, on_token, use_cache=not bypass_cache
+            ):
+                events.put_nowait((stage, {"stage": stage, "result": result}))
+            events.put_nowait(("done", {"success": True, "vehicle_id": vehicle_id}))
+        except Exception as e:
+            events.put_nowait(("error", {"success": False, "detail": str(e)}))
+        finally:
+            events.put_nowait(None)
+    
+    async def event_source():
+        yield sse_event("vehicle_info", workflow_vehicle_info(vehicle))
+        producer = asyncio.create_task(produce())
+        try:
+            while True:
+                item = await events.get()
+                if item is None:
+                    break
+                yield sse_event(*item)
+        finally:
+            producer.cancel()
+    
+    return StreamingResponse(
+        event_source(),
+        media_type="text/event-stream",
+        headers={"Cache-Control": "no-cache", "X-Accel-Buffering": "no"}
+    )
+
+
+def workflow_job(vehicle: dict, use_cache: bool):
+    """Job runner for the complete workflow; progress counts finished stages"""
+    async def runner(report_progress):
+        results = {}
+        report_progress({"completed_stages": 0, "total_stages": 3})
+        async for stage, result in workflow_stages(vehicle, use_cache=use_cache):
+            results[stage] = result
+            report_progress({
+                "completed_stages": len(results),
+                "total_stages": 3,
+                "last_stage": stage
+            })
+        return {
+            "vehicle_id": vehicle["vehicle_id"],
+            "vehicle_info": workflow_vehicle_info(vehicle),
+            **results
+        }
+    return runner
+
+
+def analysis_job(vehicle: dict, use_cache: bool):
+    """Job runner for a single vehicle analysis"""
+    async def runner(report_progress):
+        analysis = await run_agent("data_analysis", "analyze", vehicle, use_cache=use_cache)
+        record_findings(vehicle, analysis=analysis)
+        return {"vehicle_id": vehicle["vehicle_id"], "analysis": analysis}
+    return runner
+
+
+def batch_analysis_job(vehicle_ids: List[str], concurrency: int, use_cache: bool):
+    """Job runner for a fleet analysis; progress counts finished vehicles"""
+    async def runner(report_progress):
+        results, failed = [], []
+        report_progress({"completed": 0, "failed": 0, "total": len(vehicle_ids)})
+        async for result in analyze_fleet(vehicle_ids, concurrency, use_cache=use_cache):
+            results.append(result)
+            if not result["success"]:
+                failed.append(result["vehicle_id"])
+            report_progress({
+                "completed": len(results),
+                "failed": len(failed),
+                "total": len(vehicle_ids)
+            })
+        return {
+            "results": results,
+            "summary": fleet_summary(vehicle_ids, failed, concurrency)
+        }
+    return runner
+
+
+@app.post("/api/jobs", status_code=202)
+async def submit_job(request: JobRequest):
+    """
+    Queue a long-running workflow and return immediately
+
+    Poll GET /api/jobs/{job_id} for status, progress and result.
+    """
+    use_cache = not request.bypass_cache
+    if request.job_type == "batch_analysis":
+        vehicle_ids = resolve_vehicle_ids(request.vehicle_ids)
+        concurrency = batch_concurrency(request.max_concurrency)
+        params = {"vehicle_ids": vehicle_ids, "max_concurrency": concurrency}
+        runner = batch_analysis_job(vehicle_ids, concurrency, use_cache)
+    else:
+        vehicle = get_vehicle_store().get(request.vehicle_id) if request.vehicle_id else None
+        if not vehicle:
+            raise HTTPException(status_code=404, detail="Vehicle not found")
+        params = {"vehicle_id": request.vehicle_id}
+        if request.job_type == "complete_workflow":
+            runner = workflow_job(vehicle, use_cache)
+        else:
+            runner = analysis_job(vehicle, use_cache)
+    
+    job = app.state.job_manager.submit(request.job_type, params, runner)
+    return JSONResponse(
+        status_code=202,
+        content={
+            "success": True,
+            "job_id": job.job_id,
+            "status": job.status.value,
+            "status_url": f"/api/jobs/{job.job_id}"
+        },
+        headers={"Location": f"/api/jobs/{job.job_id}"}
+    )
+
+@app.get("/api/jobs")
+def list_jobs(limit: int = 50):
+    """List the most recent jobs"""
+    jobs = app.state.job_manager.list(limit)
+    return {
+        "success": True,
+        "count": len(jobs),
+        "jobs": [job.to_dict() for job in jobs]
+    }
+
+@app.get("/api/jobs/{job_id}")
+def get_job(job_id: str):
+    """Get job status, progress and (once finished) result"""
+    job = app.state.job_manager.get(job_id)
+    if not job:
+        raise HTTPException(status_code=404, detail="Job not found")
+    return {
+        "success": True,
+        "job": job.to_dict()
+    }
+
+@app.delete("/api/jobs/{job_id}")
+def cancel_job(job_id: str):
+    """Cancel a pending or running job"""
+    manager = app.state.job_manager
+    job = manager.get(job_id)
+    if not job:
+        raise HTTPException(status_code=404, detail="Job not found")
+    if not manager.cancel(job_id):
+        raise HTTPException(status_code=409, detail=f"Job already {job.status.value}")
+    return {
+        "success": True,
+        "job_id": job_id,
+        "cancelled": True
+    }
+
 
 if __name__ == "__main__":
+    import uvicorn
+    
     print("\n" + "="*70)
     print("🚗 AI PREDICTIVE MAINTENANCE - BACKEND SERVER")
     print("="*70)
@@ -2,12 +2,20 @@
 Simplified FastAPI backend for deployment
 Agents functionality will be added in future updates
 """
-from fastapi import FastAPI
+from fastapi import FastAPI, HTTPException, Query, Request
 from fastapi.middleware.cors import CORSMiddleware
+from fastapi.responses import JSONResponse, Response
+from typing import Optional
 from datetime import datetime
 import os
 
+from utils.metrics import instrument_app
+from utils.alert_store import AlertStore
+from utils.change_log import ResyncRequiredError, etag_headers, etag_matches
+from utils.broadcast import Broadcaster, add_event_stream
+
 app = FastAPI(title="AI Predictive Maintenance API")
+instrument_app(app)
 
 # CORS configuration
 app.add_middleware(
@@ -45,14 +53,33 @@ async def get_vehicles():
         ]
     }
 
+alert_store = AlertStore([
+    {"id": 1, "type": "critical", "message": "Brake temperature spike", "vehicle_id": "VEH001"},
+    {"id": 2, "type": "warning", "message": "Battery degradation", "vehicle_id": "VEH002"}
+], timestamps=False)
+
+# Pushes alert changes over /ws/events so dashboards need not poll /api/alerts
+event_broadcaster = Broadcaster()
+
+def publish_alert(action: str, alert: dict):
+    event_broadcaster.publish("alerts", {"action": action, "alert": alert})
+
+alert_store.add_listener(publish_alert)
+add_event_stream(app, event_broadcaster)
+
 @app.get("/api/alerts")
-async def get_alerts():
-    return {
-        "alerts": [
-            {"id": 1, "type": "critical", "message": "Brake temperature spike", "vehicle_id": "VEH001"},
-            {"id": 2, "type": "warning", "message": "Battery degradation", "vehicle_id": "VEH002"}
-        ]
-    }
+async def get_alerts(request: Request, since: Optional[str] = Query(None)):
+    etag = alert_store.etag(request.url.query)
+    if etag_matches(request.headers.get("if-none-match"), etag):
+        return Response(status_code=304, headers=etag_headers(etag))
+    if since is not None:
+        try:
+            delta = alert_store.changes_since(since)
+        except ResyncRequiredError as e:
+            raise HTTPException(status_code=410, detail=str(e))
+        return JSONResponse(delta, headers=etag_headers(etag))
+    # Full list keeps its original shape; sync with since=0 to get a version
+    return JSONResponse({"alerts": alert_store.list(newest_first=False)}, headers=etag_headers(etag))
 
 if __name__ == "__main__":
     import uvicorn
@@ -9,11 +9,45 @@ export const api = {
   },
 
   // Get all vehicles
-  async getVehicles() {
-    const response = await fetch(`${API_BASE_URL}/api/vehicles`);
+  // params: { limit, cursor, fields, type, model, year, severity }
+  async getVehicles(params = {}) {
+    const query = new URLSearchParams(
+      Object.entries(params).filter(([, value]) => value !== undefined && value !== null)
+    ).toString();
+    const response = await fetch(`${API_BASE_URL}/api/vehicles${query ? `?${query}` : ''}`);
     return response.json();
   },
 
+  // Vehicles changed/deleted since a previous response's version token.
+  // Responds 410 when the token is too old or from before a server restart;
+  // reload with getVehicles() then.
+  async getVehicleChanges(since, fields) {
+    const query = new URLSearchParams({ since, ...(fields ? { fields } : {}) });
+    const response = await fetch(`${API_BASE_URL}/api/vehicles?${query}`);
+    return response.json();
+  },
+
+  // Active alerts; pass since for a delta like getVehicleChanges
+  async getAlerts(since) {
+    const query = since !== undefined ? `?since=${since}` : '';
+    const response = await fetch(`${API_BASE_URL}/api/alerts${query}`);
+    return response.json();
+  },
+
+  // Push channel for alert changes and agent status.
+  // handlers: { onEvent(event), onClose(closeEvent) }; events carry { seq, topic, data }.
+  // Close code 1013 means the client fell behind: resync with getAlerts() and reconnect.
+  subscribeEvents(handlers = {}, topics = ['alerts', 'agent_status']) {
+    const wsBase = API_BASE_URL.replace(/^http/, 'ws');
+    const socket = new WebSocket(`${wsBase}/ws/events?topics=${topics.join(',')}`);
+    socket.onmessage = (message) => {
+      const payload = JSON.parse(message.data);
+      if (Array.isArray(payload)) payload.forEach((event) => handlers.onEvent?.(event));
+    };
+    socket.onclose = (closeEvent) => handlers.onClose?.(closeEvent);
+    return socket;
+  },
+
   // Get specific vehicle
   async getVehicle(vehicleId) {
     const response = await fetch(`${API_BASE_URL}/api/vehicles/${vehicleId}`);
@@ -29,6 +63,31 @@ export const api = {
     return response.json();
   },
 
+  // Complete workflow as a Server-Sent Events stream.
+  // handlers: { onVehicleInfo, onToken(stage, token), onStage(stage, result), onDone, onError }
+  streamCompleteWorkflow(vehicleId, handlers = {}) {
+    const source = new EventSource(`${API_BASE_URL}/api/complete-workflow/${vehicleId}/stream`);
+    const parse = (event) => JSON.parse(event.data);
+
+    source.addEventListener('vehicle_info', (e) => handlers.onVehicleInfo?.(parse(e)));
+    source.addEventListener('token', (e) => {
+      const { stage, token } = parse(e);
+      handlers.onToken?.(stage, token);
+    });
+    ['analysis', 'diagnosis', 'call_script'].forEach((stage) => {
+      source.addEventListener(stage, (e) => handlers.onStage?.(stage, parse(e).result));
+    });
+    source.addEventListener('done', (e) => {
+      source.close();
+      handlers.onDone?.(parse(e));
+    });
+    source.addEventListener('error', (e) => {
+      source.close();
+      handlers.onError?.(e.data ? parse(e) : { success: false, detail: 'Connection lost' });
+    });
+    return source;
+  },
+
   // Analyze vehicle
   async analyzeVehicle(vehicleId) {
     const response = await fetch(`${API_BASE_URL}/api/analyze`, {
@@ -0,0 +1,72 @@
+"""
+Import-time report for the backend
+
+Runs `python -X importtime -c "import <module>"` in a fresh interpreter and
+summarises where start-up time goes, so regressions in cold-start time
+(e.g. an agent module imported eagerly again) are easy to spot.
+
+Usage:
+    python scripts/import_time_report.py                 # backend_server
+    python scripts/import_time_report.py agents.data_analysis_agent.agent --top 30
+"""
+
+import argparse
+import subprocess
+import sys
+from collections import defaultdict
+from pathlib import Path
+
+PROJECT_ROOT = Path(__file__).parent.parent
+
+
+def measure(module: str):
+    """Return [(module, self_us, cumulative_us, depth)] from -X importtime"""
+    proc = subprocess.run(
+        [sys.executable, "-X", "importtime", "-c", f"import {module}"],
+        cwd=PROJECT_ROOT,
+        capture_output=True,
+        text=True,
+    )
+    if proc.returncode != 0:
+        tail = "\n".join(proc.stderr.strip().splitlines()[-5:])
+        raise SystemExit(f"Importing {module} failed:\n{tail}")
+
+    rows = []
+    for line in proc.stderr.splitlines():
+        if not line.startswith("import time:") or "self [us]" in line:
+            continue
+        self_us, cumulative_us, name = line[len("import time:"):].split("|")
+        depth = (len(name) - len(name.lstrip())) // 2
+        rows.append((name.strip(), int(self_us), int(cumulative_us), depth))
+    return rows
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Summarise import time of a module")
+    parser.add_argument("module", nargs="?", default="backend_server")
+    parser.add_argument("--top", type=int, default=15, help="rows to show per table")
+    args = parser.parse_args()
+
+    rows = measure(args.module)
+    total_us = next((cum for name, _, cum, _ in rows if name == args.module), 0)
+
+    by_package = defaultdict(int)
+    for name, self_us, _, _ in rows:
+        by_package[name.split(".")[0]] += self_us
+
+    print("=" * 70)
+    print(f"IMPORT TIME REPORT: {args.module}")
+    print("=" * 70)
+    print(f"Total: {total_us / 1000:.1f} ms across {len(rows)} modules\n")
+
+    print(f"Top {args.top} top-level packages (self time):")
+    for package, self_us in sorted(by_package.items(), key=lambda kv: -kv[1])[:args.top]:
+        print(f"  {self_us / 1000:9.1f} ms  {package}")
+
+    print(f"\nTop {args.top} modules (cumulative time):")
+    for name, _, cumulative_us, _ in sorted(rows, key=lambda r: -r[2])[:args.top]:
+        print(f"  {cumulative_us / 1000:9.1f} ms  {name}")
+
+
+if __name__ == "__main__":
+    main()
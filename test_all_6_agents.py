@@ -2,13 +2,14 @@
 Complete Test for All 6 AI Agents
 """
 
-import os
 from dotenv import load_dotenv
 
 load_dotenv()
 
-# Check API key
-if not os.getenv("OPENAI_API_KEY"):
+from agents.llm import has_llm_backend
+
+# Check API key (or LLM_CACHE_MODE=replay with a recorded cache)
+if not has_llm_backend():
     print("❌ ERROR: OpenAI API key not found!")
     exit(1)
 
@@ -0,0 +1,153 @@
+"""Tests for the async BaseAgent adapters around the CrewAI agents"""
+
+import sys
+import asyncio
+import threading
+from pathlib import Path
+
+project_root = Path(__file__).parent.parent
+sys.path.insert(0, str(project_root))
+
+import pytest
+
+from agents.adapters import (
+    CustomerEngagementAdapter, DataAnalysisAdapter, DiagnosisAdapter, SchedulingAdapter
+)
+from agents.orchestrator import AgentOrchestrator, TaskType
+from agents.pipeline import VEHICLE_MAINTENANCE_PIPELINE
+from utils.agent_executor import AgentExecutor
+from utils.mock_data import VEHICLES
+
+
+class FakeCrewAgent:
+    """Stands in for the sync CrewAI agents; records the thread it ran on"""
+
+    created = 0
+
+    def __init__(self):
+        FakeCrewAgent.created += 1
+        self.threads = set()
+        self.batches = []
+
+    def _seen(self):
+        self.threads.add(threading.current_thread().name)
+
+    def analyze(self, vehicle, use_cache=True):
+        self._seen()
+        return f"analysis of {vehicle['vehicle_id']}"
+
+    def analyze_batch(self, vehicles, use_cache=True):
+        self._seen()
+        self.batches.append(len(vehicles))
+        prefix = "analysis" if use_cache else "fresh analysis"
+        return [f"{prefix} of {v['vehicle_id']}" for v in vehicles]
+
+    def diagnose(self, analysis, vehicle, use_cache=True):
+        self._seen()
+        return f"diagnosis from {analysis}"
+
+    def generate_call_script(self, owner, diagnosis):
+        self._seen()
+        return f"call {owner} about {diagnosis}"
+
+    def schedule_appointment(self, customer):
+        self._seen()
+        return f"booked {customer['name']}"
+
+
+def adapters(executor):
+    return [adapter_class(executor=executor, factory=FakeCrewAgent, pool_size=2)
+            for adapter_class in (DataAnalysisAdapter, DiagnosisAdapter,
+                                  CustomerEngagementAdapter, SchedulingAdapter)]
+
+
+async def started_orchestrator(executor):
+    orchestrator = AgentOrchestrator(max_concurrent_tasks=4)
+    orchestrator.retry_base_delay = 0
+    for adapter in adapters(executor):
+        orchestrator.register_agent(adapter.agent_type, adapter)
+    await orchestrator.start_all_agents()
+    return orchestrator, asyncio.create_task(orchestrator.process_tasks())
+
+
+class TestCrewAgentAdapters:
+    def test_initialize_warms_pool_and_shutdown_releases_it(self):
+        async def main():
+            adapter = DiagnosisAdapter(executor=AgentExecutor(max_workers=1), factory=FakeCrewAgent, pool_size=3)
+            with pytest.raises(RuntimeError):
+                await adapter.process_task({"data": {}})
+            before = FakeCrewAgent.created
+            await adapter.start()
+            warmed = FakeCrewAgent.created - before
+            stats = adapter.pool.get_stats()
+            await adapter.stop()
+            return warmed, stats, adapter
+
+        warmed, stats, adapter = asyncio.run(main())
+        assert warmed == 3 and stats["idle"] == 3
+        assert adapter.pool is None
+
+    def test_pipeline_runs_on_executor_threads(self):
+        async def main():
+            executor = AgentExecutor(max_workers=2)
+            orchestrator, processor = await started_orchestrator(executor)
+            results = await VEHICLE_MAINTENANCE_PIPELINE.run(orchestrator, {"vehicle": VEHICLES["VEH001"]})
+            threads = set()
+            for adapter in orchestrator.agents.values():
+                while not adapter.pool._idle.empty():
+                    threads |= adapter.pool._idle.get_nowait().threads
+            await orchestrator.stop_all_agents(drain_timeout=1)
+            await processor
+            return results, threads, orchestrator
+
+        results, threads, orchestrator = asyncio.run(main())
+        assert results["analysis"]["analysis"] == "analysis of VEH001"
+        assert results["diagnosis"]["diagnosis"] == "diagnosis from analysis of VEH001"
+        assert results["customer_engagement"]["call_script"].startswith("call Mr. Rajesh Sharma")
+        assert results["scheduling"]["booking"] == "booked Mr. Rajesh Sharma"
+        assert threads and all(name.startswith("agent-worker") for name in threads)
+        assert orchestrator.agents["diagnosis"].get_status()["task_count"] == 1
+
+    def test_data_analysis_tasks_are_batched(self):
+        async def main():
+            orchestrator, processor = await started_orchestrator(AgentExecutor(max_workers=2))
+            handles = [
+                await orchestrator.submit_task(TaskType.DATA_ANALYSIS, {"vehicle": vehicle})
+                for vehicle in VEHICLES.values()
+            ]
+            missing = await orchestrator.submit_task(TaskType.DATA_ANALYSIS, {})
+            results = await asyncio.gather(*handles)
+            with pytest.raises(ValueError):
+                await missing
+            pool = orchestrator.agents["data_analysis"].pool
+            batches = []
+            while not pool._idle.empty():
+                batches += pool._idle.get_nowait().batches
+            await orchestrator.stop_all_agents(drain_timeout=1)
+            await processor
+            return results, batches
+
+        results, batches = asyncio.run(main())
+        assert [r["vehicle_id"] for r in results] == list(VEHICLES)
+        # Every vehicle went out in the first batch; the task without one failed on its own
+        assert batches[0] == len(VEHICLES)
+
+    def test_batch_honors_use_cache_per_task(self):
+        async def main():
+            adapter = DataAnalysisAdapter(executor=AgentExecutor(max_workers=1), factory=FakeCrewAgent, pool_size=1)
+            await adapter.start()
+            vehicles = list(VEHICLES.values())
+            results = await adapter.process_batch([
+                {"data": {"vehicle": vehicles[0]}},
+                {"data": {"vehicle": vehicles[1], "use_cache": False}},
+                {"data": {"vehicle": vehicles[2]}},
+            ])
+            await adapter.stop()
+            return results, vehicles
+
+        results, vehicles = asyncio.run(main())
+        assert [r["analysis"] for r in results] == [
+            f"analysis of {vehicles[0]['vehicle_id']}",
+            f"fresh analysis of {vehicles[1]['vehicle_id']}",
+            f"analysis of {vehicles[2]['vehicle_id']}",
+        ]
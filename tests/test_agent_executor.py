@@ -0,0 +1,61 @@
+"""Tests for the bounded agent executor"""
+
+import sys
+import asyncio
+import threading
+from pathlib import Path
+
+project_root = Path(__file__).parent.parent
+sys.path.insert(0, str(project_root))
+
+import pytest
+
+from utils.agent_executor import AgentExecutor, ExecutorSaturatedError
+
+
+class TestAgentExecutor:
+    def test_runs_off_event_loop(self):
+        executor = AgentExecutor(max_workers=2, max_queue=0)
+
+        async def main():
+            loop_thread = threading.get_ident()
+            worker_thread = await executor.run(threading.get_ident)
+            return loop_thread, worker_thread
+
+        loop_thread, worker_thread = asyncio.run(main())
+        assert loop_thread != worker_thread
+        assert executor.get_stats()["completed"] == 1
+        executor.shutdown()
+
+    def test_rejects_when_saturated(self):
+        executor = AgentExecutor(max_workers=1, max_queue=1)
+        release = threading.Event()
+
+        async def main():
+            first = asyncio.ensure_future(executor.run(release.wait))
+            second = asyncio.ensure_future(executor.run(release.wait))
+            await asyncio.sleep(0.05)
+            with pytest.raises(ExecutorSaturatedError):
+                await executor.run(release.wait)
+            stats = executor.get_stats()
+            release.set()
+            await asyncio.gather(first, second)
+            return stats
+
+        stats = asyncio.run(main())
+        assert stats["running"] == 1
+        assert stats["queue_depth"] == 1
+        assert stats["saturation"] == 1.0
+        assert executor.get_stats()["rejected"] == 1
+        executor.shutdown()
+
+    def test_failures_are_counted(self):
+        executor = AgentExecutor(max_workers=1, max_queue=0)
+
+        def boom():
+            raise ValueError("bad")
+
+        with pytest.raises(ValueError):
+            asyncio.run(executor.run(boom))
+        assert executor.get_stats()["failed"] == 1
+        executor.shutdown()
@@ -0,0 +1,206 @@
+"""Tests for the pre-warmed agent pool"""
+
+import sys
+import asyncio
+import threading
+from pathlib import Path
+
+project_root = Path(__file__).parent.parent
+sys.path.insert(0, str(project_root))
+
+import pytest
+
+from utils.agent_pool import (
+    AgentPool, AgentRegistry, AgentStateError, PoolExhaustedError, lazy_factory, pool_size_for
+)
+
+
+class DummyAgent:
+    pass
+
+
+class TestAgentPool:
+    def test_warm_fills_pool(self):
+        pool = AgentPool("dummy", DummyAgent, max_size=3)
+        assert pool.warm() == 3
+        stats = pool.get_stats()
+        assert stats["created"] == 3
+        assert stats["idle"] == 3
+
+    def test_checkout_reuses_instances(self):
+        pool = AgentPool("dummy", DummyAgent, max_size=1)
+        with pool.agent() as first:
+            pass
+        with pool.agent() as second:
+            assert pool.get_stats()["in_use"] == 1
+        assert first is second
+        assert pool.get_stats()["created"] == 1
+
+    def test_checkout_times_out_when_exhausted(self):
+        pool = AgentPool("dummy", DummyAgent, max_size=1)
+        held = pool.checkout()
+        with pytest.raises(PoolExhaustedError):
+            pool.checkout(timeout=0.01)
+        pool.checkin(held)
+        assert pool.get_stats()["timeouts"] == 1
+
+    def test_waiter_receives_checked_in_agent(self):
+        pool = AgentPool("dummy", DummyAgent, max_size=1)
+        held = pool.checkout()
+        received = []
+        waiter = threading.Thread(target=lambda: received.append(pool.checkout(timeout=2)))
+        waiter.start()
+        pool.checkin(held)
+        waiter.join()
+        assert received == [held]
+
+    def test_failed_factory_frees_slot(self):
+        calls = []
+
+        def flaky():
+            calls.append(1)
+            if len(calls) == 1:
+                raise RuntimeError("boom")
+            return DummyAgent()
+
+        pool = AgentPool("dummy", flaky, max_size=1)
+        with pytest.raises(RuntimeError):
+            pool.checkout()
+        assert isinstance(pool.checkout(), DummyAgent)
+
+
+class TestAgentRegistry:
+    def test_pool_size_env_override(self, monkeypatch):
+        monkeypatch.setenv("AGENT_POOL_SIZE", "4")
+        monkeypatch.setenv("AGENT_POOL_SIZE_DIAGNOSIS", "1")
+        assert pool_size_for("data_analysis") == 4
+        assert pool_size_for("diagnosis") == 1
+
+    def test_stats_per_agent_type(self):
+        registry = AgentRegistry({"a": DummyAgent, "b": DummyAgent}, sizes={"a": 1, "b": 2})
+        registry.warm_all()
+        stats = registry.get_stats()
+        assert stats["a"]["created"] == 1
+        assert stats["b"]["created"] == 2
+
+    def test_lazy_factory_defers_import(self):
+        sys.modules.pop("json.tool", None)
+        factory = lazy_factory("json.tool:main")
+        assert "json.tool" not in sys.modules
+        registry = AgentRegistry({"a": lazy_factory("collections:OrderedDict")}, sizes={"a": 1})
+        registry.warm_all()
+        assert registry.is_warm
+        with registry.agent("a") as agent:
+            assert type(agent).__name__ == "OrderedDict"
+
+    def test_warm_errors_block_readiness(self):
+        def broken():
+            raise RuntimeError("no api key")
+
+        registry = AgentRegistry({"a": broken}, sizes={"a": 1})
+        registry.warm_all()
+        assert not registry.is_warm
+        assert registry.warm_errors == {"a": "no api key"}
+
+    def test_unknown_agent_type(self):
+        registry = AgentRegistry({"a": DummyAgent})
+        with pytest.raises(KeyError):
+            registry.agent("missing")
+
+
+class TestDiscardOnError:
+    def test_failed_call_returns_the_agent(self):
+        pool = AgentPool("dummy", DummyAgent, max_size=1)
+        with pytest.raises(ValueError):
+            with pool.agent() as first:
+                raise ValueError("LLM returned no report")
+        with pool.agent() as second:
+            assert second is first
+        assert pool.get_stats()["discarded"] == 0
+
+    def test_agent_that_raised_is_replaced(self):
+        pool = AgentPool("dummy", DummyAgent, max_size=1)
+        with pytest.raises(AgentStateError):
+            with pool.agent() as broken:
+                raise AgentStateError("crew left in a bad state")
+        assert pool.get_stats()["discarded"] == 1
+        assert pool.get_stats()["idle"] == 0
+        with pool.agent() as fresh:
+            assert fresh is not broken
+        assert pool.get_stats()["created"] == 1
+
+    def test_waiter_gets_a_replacement_for_a_discarded_agent(self):
+        pool = AgentPool("dummy", DummyAgent, max_size=1)
+        held = pool.checkout()
+        received = []
+        waiter = threading.Thread(target=lambda: received.append(pool.checkout(timeout=2)))
+        waiter.start()
+        pool.checkin(held, discard=True)
+        waiter.join()
+        assert isinstance(received[0], DummyAgent) and received[0] is not held
+
+
+class TestRegistryListeners:
+    def test_status_changes_are_reported(self):
+        broken = [True]
+
+        def flaky():
+            if broken[0]:
+                raise RuntimeError("no api key")
+            return DummyAgent()
+
+        registry = AgentRegistry({"a": flaky}, sizes={"a": 1})
+        seen = []
+        registry.add_listener(lambda r: seen.append(dict(r.warm_errors)))
+
+        registry.warm_all()
+        with pytest.raises(RuntimeError):
+            with registry.agent("a"):
+                pass
+        broken[0] = False
+        with registry.agent("a"):
+            pass
+        with registry.agent("a"):
+            pass  # nothing changed, no notification
+        with pytest.raises(ValueError):
+            with registry.agent("a"):
+                raise ValueError("agent call failed")  # agent kept, no notification
+        with pytest.raises(AgentStateError):
+            with registry.agent("a"):
+                raise AgentStateError("crew left in a bad state")
+
+        assert seen == [{"a": "no api key"}, {}, {}]
+        assert registry.is_warm
+        assert registry.get_stats()["a"]["discarded"] == 1
+
+
+class TestAgentSlots:
+    def test_slot_waits_on_the_event_loop(self):
+        registry = AgentRegistry({"a": DummyAgent, "b": DummyAgent}, sizes={"a": 1, "b": 1})
+        order = []
+
+        async def use(agent_type, name, hold):
+            async with registry.slot(agent_type):
+                order.append(f"{name} start")
+                await asyncio.sleep(hold)
+                order.append(f"{name} end")
+
+        async def run():
+            await asyncio.gather(use("a", "a1", 0.05), use("a", "a2", 0), use("b", "b1", 0))
+
+        asyncio.run(run())
+        # b is not held up by a's full pool; a2 waits for a1
+        assert order == ["a1 start", "b1 start", "b1 end", "a1 end", "a2 start", "a2 end"]
+        assert registry.get_stats()["a"]["waits"] == 1
+
+    def test_slot_times_out_when_pool_is_busy(self):
+        registry = AgentRegistry({"a": DummyAgent}, sizes={"a": 1})
+
+        async def run():
+            async with registry.slot("a"):
+                with pytest.raises(PoolExhaustedError):
+                    async with registry.slot("a", timeout=0.01):
+                        pass
+
+        asyncio.run(run())
+        assert registry.get_stats()["a"]["timeouts"] == 1
@@ -12,7 +12,10 @@ from dotenv import load_dotenv
 
 load_dotenv()
 
-if not os.getenv("OPENAI_API_KEY"):
+from agents.llm import has_llm_backend
+
+# Runs offline against a recorded cache with LLM_CACHE_MODE=replay
+if not has_llm_backend():
     pytest.skip("OpenAI API key not found", allow_module_level=True)
 
 
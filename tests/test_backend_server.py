@@ -0,0 +1,48 @@
+"""Tests for the API server's alert updates"""
+
+import sys
+import asyncio
+from pathlib import Path
+
+project_root = Path(__file__).parent.parent
+sys.path.insert(0, str(project_root))
+
+import pytest
+from fastapi.testclient import TestClient
+
+import backend_server
+from utils.alert_store import get_alert_store
+
+
+@pytest.fixture
+def client(monkeypatch):
+    monkeypatch.setattr(backend_server, "AGENT_PREWARM", False)
+    with TestClient(backend_server.app) as client:
+        yield client
+
+
+def alert_events(since: int):
+    async def read():
+        subscription = backend_server.event_broadcaster.subscribe(topics=["alerts"], since=since)
+        return await asyncio.wait_for(subscription.next_batch(), timeout=2)
+    return asyncio.run(read())
+
+
+class TestAlertUpdates:
+    def test_analyze_pushes_alert_event(self, client, monkeypatch):
+        async def fake_run_agent(agent_type, method, *args, **kwargs):
+            return "Brake wear critical, replace pads"
+
+        monkeypatch.setattr(backend_server, "run_agent", fake_run_agent)
+        vehicle_id = get_alert_store().list()[0]["vehicle_id"]
+        head = backend_server.event_broadcaster.head
+
+        response = client.post("/api/analyze", json={"vehicle_id": vehicle_id, "bypass_cache": True})
+        assert response.status_code == 200
+
+        events = alert_events(head)
+        assert events and {event["data"]["alert"]["vehicle_id"] for event in events} == {vehicle_id}
+        assert all(event["data"]["alert"]["analysis"] == "Brake wear critical, replace pads"
+                   for event in events)
+        assert all(alert["analysis"] == "Brake wear critical, replace pads"
+                   for alert in get_alert_store().list(vehicle_id))
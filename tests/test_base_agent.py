@@ -0,0 +1,74 @@
+"""Tests for BaseAgent task timing and health"""
+
+import sys
+import asyncio
+from datetime import datetime, timedelta
+from pathlib import Path
+
+project_root = Path(__file__).parent.parent
+sys.path.insert(0, str(project_root))
+
+import pytest
+
+from agents.base_agent import BaseAgent, MIN_LATENCY_SAMPLES
+
+
+class EchoAgent(BaseAgent):
+    def __init__(self, delay=0.0, **kwargs):
+        super().__init__(agent_id="echo", agent_name="echo", **kwargs)
+        self.delay = delay
+        self.peak_in_flight = 0
+
+    async def initialize(self):
+        return True
+
+    async def shutdown(self):
+        return True
+
+    async def process_task(self, task):
+        self.peak_in_flight = max(self.peak_in_flight, self.in_flight)
+        await asyncio.sleep(self.delay)
+        if task.get("fail"):
+            raise ValueError("boom")
+        return {"ok": True}
+
+
+def submitted(seconds_ago):
+    return {"timestamp": (datetime.now() - timedelta(seconds=seconds_ago)).isoformat()}
+
+
+class TestAgentTiming:
+    def test_execute_records_latency_queue_wait_and_in_flight(self):
+        async def main():
+            agent = EchoAgent(delay=0.02)
+            await agent.start()
+            await asyncio.gather(*(agent.execute(submitted(3)) for _ in range(4)))
+            with pytest.raises(ValueError):
+                await agent.execute({"fail": True})
+            return agent
+
+        agent = asyncio.run(main())
+        status = agent.get_status()
+        assert agent.peak_in_flight == 4 and status["in_flight"] == 0
+        assert status["task_count"] == 5
+        assert agent.latency.count() == 5
+        assert 0.01 <= status["latency_seconds"]["p50"] <= 0.05
+        assert status["latency_seconds"]["ewma"] >= 0.02
+        # The failed task had no timestamp, so only four waits were recorded
+        assert agent.queue_wait.count() == 4
+        assert 2.5 <= status["queue_wait_seconds"]["p99"] <= 5
+
+    def test_unhealthy_when_p99_exceeds_budget(self):
+        async def main():
+            agent = EchoAgent(delay=0.03, latency_budget_seconds=0.01)
+            await agent.start()
+            for _ in range(MIN_LATENCY_SAMPLES - 1):
+                await agent.execute({})
+            before = agent.is_healthy()
+            await agent.execute({})
+            return before, agent
+
+        before, agent = asyncio.run(main())
+        assert before  # too few samples to judge
+        assert not agent.is_healthy()
+        assert agent.get_status()["latency_seconds"]["budget_p99"] == 0.01
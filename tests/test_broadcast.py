@@ -0,0 +1,71 @@
+"""Tests for ring-buffer event fan-out"""
+
+import sys
+import asyncio
+import threading
+from pathlib import Path
+
+project_root = Path(__file__).parent.parent
+sys.path.insert(0, str(project_root))
+
+import pytest
+
+from utils.broadcast import Broadcaster, SlowConsumerError
+
+
+class TestBroadcaster:
+    def test_every_subscriber_sees_every_event(self):
+        async def main():
+            broadcaster = Broadcaster(capacity=16, max_lag=16)
+            subscriptions = [broadcaster.subscribe() for _ in range(3)]
+            waiting = [asyncio.ensure_future(s.next_batch()) for s in subscriptions]
+            await asyncio.sleep(0)
+            broadcaster.publish("alerts", {"id": 1})
+            broadcaster.publish("alerts", {"id": 2})
+            return await asyncio.gather(*waiting)
+
+        for batch in asyncio.run(main()):
+            assert [event["data"]["id"] for event in batch] == [1, 2]
+            assert [event["seq"] for event in batch] == [0, 1]
+
+    def test_topic_filter(self):
+        async def main():
+            broadcaster = Broadcaster(capacity=16)
+            subscription = broadcaster.subscribe(topics=["agent_status"])
+            broadcaster.publish("alerts", {})
+            broadcaster.publish("agent_status", {"ready": True})
+            return await subscription.next_batch()
+
+        batch = asyncio.run(main())
+        assert [event["topic"] for event in batch] == ["agent_status"]
+
+    def test_slow_consumer_is_dropped(self):
+        async def main():
+            broadcaster = Broadcaster(capacity=8, max_lag=4)
+            subscription = broadcaster.subscribe()
+            for i in range(5):
+                broadcaster.publish("alerts", {"id": i})
+            await subscription.next_batch()
+
+        with pytest.raises(SlowConsumerError):
+            asyncio.run(main())
+
+    def test_replay_since(self):
+        async def main():
+            broadcaster = Broadcaster(capacity=8, max_lag=8)
+            for i in range(3):
+                broadcaster.publish("alerts", {"id": i})
+            return await broadcaster.subscribe(since=1).next_batch()
+
+        assert [event["seq"] for event in asyncio.run(main())] == [1, 2]
+
+    def test_publish_from_another_thread_wakes_subscriber(self):
+        async def main():
+            broadcaster = Broadcaster(capacity=8)
+            subscription = broadcaster.subscribe()
+            waiting = asyncio.ensure_future(subscription.next_batch())
+            await asyncio.sleep(0)
+            threading.Thread(target=broadcaster.publish, args=("alerts", {"id": 1})).start()
+            return await asyncio.wait_for(waiting, timeout=2)
+
+        assert asyncio.run(main())[0]["data"] == {"id": 1}
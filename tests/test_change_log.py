@@ -0,0 +1,121 @@
+"""Tests for change versions, delta sync and the alert store"""
+
+import sys
+from pathlib import Path
+
+project_root = Path(__file__).parent.parent
+sys.path.insert(0, str(project_root))
+
+import pytest
+
+from utils.change_log import ChangeLog, ResyncRequiredError, etag_matches
+from utils.alert_store import AlertStore
+
+
+class TestChangeLog:
+    def test_changes_since_returns_latest_state_per_key(self):
+        log = ChangeLog()
+        log.record("a")
+        log.record("b")
+        since = log.token
+        log.record("c")
+        log.record("a")
+        log.record("b", deleted=True)
+
+        changed, deleted = log.changes_since(since)
+        assert changed == ["c", "a"]
+        assert deleted == ["b"]
+        assert log.changes_since(log.token) == ([], [])
+        assert log.changes_since("0") == (["c", "a"], ["b"])
+
+    def test_evicted_tombstones_require_resync(self):
+        log = ChangeLog(max_tombstones=2)
+        for key in "abc":
+            log.record(key)
+        for key in "abc":
+            log.record(key, deleted=True)
+
+        with pytest.raises(ResyncRequiredError):
+            log.changes_since(f"{log.epoch}-3")
+        assert log.changes_since(f"{log.epoch}-4") == ([], ["b", "c"])
+
+    def test_future_version_requires_resync(self):
+        log = ChangeLog()
+        log.record("a")
+        with pytest.raises(ResyncRequiredError):
+            log.changes_since(f"{log.epoch}-5")
+
+    def test_token_from_another_epoch_requires_resync(self):
+        before_restart = ChangeLog()
+        for key in "abc":
+            before_restart.record(key)
+        log = ChangeLog()
+        log.record("a")
+        # An older server run's token at a version this run has reached
+        with pytest.raises(ResyncRequiredError):
+            log.changes_since(f"{before_restart.epoch}-1")
+        for token in ("1", "junk", f"{log.epoch}-x"):
+            with pytest.raises(ResyncRequiredError):
+                log.changes_since(token)
+
+    def test_etag_changes_with_version_and_variant(self):
+        log = ChangeLog()
+        first = log.etag("limit=10")
+        assert log.etag("limit=10") == first
+        assert log.etag("limit=20") != first
+        log.record("a")
+        assert log.etag("limit=10") != first
+
+    def test_etag_matches(self):
+        assert etag_matches('"x", W/"abc"', '"abc"')
+        assert etag_matches("*", '"abc"')
+        assert not etag_matches(None, '"abc"')
+        assert not etag_matches('"abd"', '"abc"')
+
+
+class TestAlertStore:
+    def anomaly(self, metric, severity, value=1.0):
+        return {"metric": metric, "label": metric, "value": value, "unit": "%", "severity": severity}
+
+    def test_unchanged_upsert_does_not_bump_version(self):
+        store = AlertStore([{"id": 1, "vehicle_id": "VEH001", "message": "x"}])
+        version = store.changes.version
+        assert not store.upsert({"id": 1, "vehicle_id": "VEH001", "message": "x"})
+        assert store.changes.version == version
+        assert store.upsert({"id": 1, "vehicle_id": "VEH001", "message": "y"})
+        assert store.changes.version == version + 1
+        assert store.version == f"{store.changes.epoch}-{version + 1}"
+
+    def test_untimestamped_store_lists_in_insertion_order(self):
+        alerts = [{"id": 1, "vehicle_id": "VEH001", "message": "x"},
+                  {"id": 2, "vehicle_id": "VEH002", "message": "y"}]
+        store = AlertStore(alerts, timestamps=False)
+        assert store.list(newest_first=False) == alerts
+        assert [a["id"] for a in store.list()] == [2, 1]
+        assert not store.upsert(alerts[0])
+        assert store.changes_since("0")["changed"] == alerts
+
+    def test_sync_vehicle_raises_and_clears_rule_alerts(self):
+        store = AlertStore()
+        raised = store.sync_vehicle("VEH001", [self.anomaly("brake_wear", "CRITICAL"),
+                                               self.anomaly("engine_temp", "MEDIUM")])
+        assert {a["type"] for a in raised} == {"critical", "warning"}
+        version = store.version
+
+        store.sync_vehicle("VEH001", [self.anomaly("brake_wear", "CRITICAL")])
+        delta = store.changes_since(version)
+        assert delta["changed"] == []
+        assert delta["deleted"] == ["VEH001:engine_temp"]
+        assert [a["id"] for a in store.list("VEH001")] == ["VEH001:brake_wear"]
+
+    def test_sync_vehicle_attaches_details(self):
+        store = AlertStore()
+        store.sync_vehicle("VEH001", [self.anomaly("brake_wear", "CRITICAL")])
+        changed = store.sync_vehicle("VEH001", [self.anomaly("brake_wear", "CRITICAL")],
+                                     details={"analysis": "replace pads"})
+        assert [a["analysis"] for a in changed] == ["replace pads"]
+        store.sync_vehicle("VEH001", [self.anomaly("brake_wear", "CRITICAL")],
+                           details={"diagnosis": "worn pads"})
+        alert = store.get("VEH001:brake_wear")
+        assert (alert["analysis"], alert["diagnosis"]) == ("replace pads", "worn pads")
+        assert store.sync_vehicle("VEH001", [self.anomaly("brake_wear", "CRITICAL")]) == []
@@ -0,0 +1,155 @@
+"""Tests for the local fake LLM backend"""
+
+import sys
+import json
+import time
+from pathlib import Path
+
+project_root = Path(__file__).parent.parent
+sys.path.insert(0, str(project_root))
+
+import httpx
+import openai
+import pytest
+
+from agents.fake_llm import FakeLLMTransport, fake_reply
+from agents.data_analysis_agent.agent import parse_batch_reports
+from utils.mock_data import VEHICLES
+
+
+def client_for(transport):
+    return openai.OpenAI(api_key="offline", max_retries=0,
+                         http_client=httpx.Client(transport=transport))
+
+
+def ask(client, prompt, **kwargs):
+    return client.chat.completions.create(
+        model="fake", messages=[{"role": "user", "content": prompt}], **kwargs
+    )
+
+
+def instant(**kwargs):
+    return FakeLLMTransport(latency_ms=0, stddev_ms=0, latency_distribution="fixed",
+                            tokens_per_second=0, **kwargs)
+
+
+class TestFakeReplies:
+    def test_analysis_follows_the_thresholds(self):
+        reply = fake_reply(
+            "Analyze this ICE vehicle's sensor data: {'engine_temp': 105, 'oil_pressure': 45}\n"
+        )
+        assert "Anomalies Found: Engine Temp 105°C (CRITICAL)" in reply
+        assert "Severity Level: CRITICAL" in reply
+        assert "Recommended Action:" in reply and "Time to Failure:" in reply
+
+    def test_batch_analysis_parses_as_batch_reply(self):
+        batch = [{"ref": ref, "type": v["type"], "sensor_data": v["sensor_data"]}
+                 for ref, v in enumerate(VEHICLES.values())]
+        prompt = f"Analyze each vehicle:\n{json.dumps(batch)}\nReply with only a JSON array [{{\"ref\": <ref>}}]"
+        reports = parse_batch_reports(fake_reply(prompt), len(batch))
+        assert sorted(reports) == list(range(len(batch)))
+        assert all("Severity Level:" in report for report in reports.values())
+
+    def test_downstream_agent_formats(self):
+        diagnosis = fake_reply(
+            "Based on this analysis: Anomalies Found: Brake Wear 80% (CRITICAL)\nSeverity Level: CRITICAL\n"
+            "For vehicle: Maruti Swift (2020) - ICE"
+        )
+        assert "Primary Issue: Front brake pads" in diagnosis
+        assert "Safety Risk: HIGH" in diagnosis and "Urgency: Immediate" in diagnosis
+
+        script = fake_reply(f"Create a natural phone conversation script for customer: Mr. Sharma\n{diagnosis}")
+        lines = script.splitlines()
+        assert lines[0].startswith("AI: Namaste Mr. Sharma") and "front brake pads" in script
+        assert all(line.startswith(("AI:", "CUSTOMER:")) for line in lines)
+
+        booking = fake_reply("Book appointment for: Asha\nPhone: 98765\nAvailable slots:\n  - 2026-01-02 10:00 AM\n")
+        assert "Slot: 2026-01-02 10:00 AM" in booking
+
+    def test_crewai_prompts_get_a_final_answer(self):
+        reply = fake_reply("Use this format:\nFinal Answer: the answer\n\nGenerate a satisfaction survey")
+        assert reply.startswith("Thought:") and "\nFinal Answer: Post-Service Satisfaction Survey" in reply
+
+
+class TestFakeLLMTransport:
+    def test_openai_client_streams_and_gets_usage(self):
+        client = client_for(instant())
+        prompt = "Generate a post-service satisfaction survey"
+        full = ask(client, prompt)
+        chunks = list(ask(client, prompt, stream=True, stream_options={"include_usage": True}))
+        streamed = "".join(c.choices[0].delta.content or "" for c in chunks if c.choices)
+
+        assert streamed == full.choices[0].message.content == fake_reply(prompt)
+        assert chunks[-1].usage.completion_tokens == full.usage.completion_tokens > 10
+        assert ask(client, prompt).choices[0].message.content == streamed  # deterministic
+
+    def test_streams_at_token_rate_after_latency(self):
+        transport = FakeLLMTransport(latency_ms=50, latency_distribution="fixed", tokens_per_second=500)
+        client = client_for(transport)
+        started = time.monotonic()
+        chunks = list(ask(client, "Generate a post-service satisfaction survey", stream=True))
+        tokens = len(chunks) - 2  # role and finish chunks carry no tokens
+        assert time.monotonic() - started >= 0.05 + tokens / 500 * 0.9
+
+    def test_error_injection(self):
+        client = client_for(instant(error_rate=1.0, error_status=503))
+        with pytest.raises(openai.InternalServerError):
+            ask(client, "hello")
+
+        transport = instant(error_rate=0.3, seed=7)
+        client = client_for(transport)
+        for _ in range(200):
+            try:
+                ask(client, "hello")
+            except openai.InternalServerError:
+                pass
+        assert 40 <= transport.errors <= 80
+
+    def test_latency_distributions(self):
+        for distribution in ("uniform", "normal", "lognormal"):
+            transport = FakeLLMTransport(latency_ms=100, stddev_ms=20, latency_distribution=distribution)
+            samples = [transport.sample_latency() for _ in range(2000)]
+            assert 0.09 < sum(samples) / len(samples) < 0.11
+        assert FakeLLMTransport(latency_ms=30, latency_distribution="fixed").sample_latency() == 0.03
+        with pytest.raises(ValueError):
+            FakeLLMTransport(latency_distribution="bimodal")
+
+
+class TestFakeModelSelection:
+    def test_openai_model_fake_needs_no_network_or_key(self, monkeypatch):
+        from agents import llm
+
+        monkeypatch.setenv("OPENAI_MODEL", "fake")
+        monkeypatch.delenv("OPENAI_API_KEY", raising=False)
+        monkeypatch.delenv("LLM_CACHE_MODE", raising=False)
+        monkeypatch.setenv("FAKE_LLM_LATENCY_MS", "0")
+        transport = llm.build_transport()
+        assert isinstance(transport.transport, FakeLLMTransport)
+        assert llm.has_llm_backend()
+
+        monkeypatch.setattr(llm, "_http_client", httpx.Client(transport=transport))
+        reply = llm.get_llm(0.3).call("Generate a post-service satisfaction survey")
+        assert reply == fake_reply("Generate a post-service satisfaction survey")
+
+    def test_crew_agent_runs_end_to_end(self, monkeypatch):
+        from agents import llm
+        from agents.data_analysis_agent.agent import DataAnalysisAgent
+        from utils.metrics import LLM_TOKENS
+
+        monkeypatch.setenv("OPENAI_MODEL", "fake")
+        monkeypatch.delenv("OPENAI_API_KEY", raising=False)
+        monkeypatch.delenv("LLM_CACHE_MODE", raising=False)
+        transport = instant()
+        monkeypatch.setattr(llm, "_http_client", httpx.Client(transport=transport))
+
+        agent = DataAnalysisAgent()
+        tokens = []
+        agent.token_relay.sink = tokens.append
+        completion_tokens = LLM_TOKENS.value(agent="data_analysis", kind="completion")
+        vehicle = next(v for v in VEHICLES.values() if v["type"] == "EV")
+        report = agent.analyze(vehicle, use_cache=False, use_rules=False)
+
+        assert transport.requests == 1
+        assert "Severity Level:" in report
+        assert "".join(tokens).strip().endswith(report.strip())
+        assert LLM_TOKENS.value(agent="data_analysis", kind="completion") > completion_tokens
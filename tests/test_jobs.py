@@ -0,0 +1,92 @@
+"""Tests for the background job subsystem"""
+
+import sys
+import time
+import asyncio
+from pathlib import Path
+
+project_root = Path(__file__).parent.parent
+sys.path.insert(0, str(project_root))
+
+import pytest
+
+from utils.jobs import InMemoryJobStore, Job, JobManager, JobStatus, SQLiteJobStore
+
+
+def finished_job(job_id: str, created_at: float, finished_at: float) -> Job:
+    job = Job(job_id=job_id, job_type="test", params={}, created_at=created_at)
+    job.status = JobStatus.SUCCEEDED
+    job.finished_at = finished_at
+    return job
+
+
+class TestJobStores:
+    @pytest.mark.parametrize("make_store", [
+        lambda: InMemoryJobStore(max_retained=2),
+        lambda: SQLiteJobStore(":memory:", max_retained=2),
+    ])
+    def test_max_retained_evicts_oldest_finished(self, make_store):
+        store = make_store()
+        now = time.time()
+        for i in range(4):
+            store.save(finished_job(str(i), created_at=now + i, finished_at=now + i))
+        assert store.count() == 2
+        assert store.get("0") is None
+        assert store.get("3").status == JobStatus.SUCCEEDED
+
+    def test_retention_drops_expired_jobs(self):
+        store = InMemoryJobStore(retention_seconds=60)
+        old = time.time() - 120
+        store.save(finished_job("old", created_at=old, finished_at=old))
+        store.save(finished_job("new", created_at=time.time(), finished_at=time.time()))
+        assert store.get("old") is None
+        assert store.get("new") is not None
+
+    def test_sqlite_marks_interrupted_jobs_failed(self, tmp_path):
+        path = str(tmp_path / "jobs.db")
+        SQLiteJobStore(path).save(Job(job_id="a", job_type="test", params={}))
+        job = SQLiteJobStore(path).get("a")
+        assert job.status == JobStatus.FAILED
+        assert "restart" in job.error
+
+
+class TestJobManager:
+    def test_job_runs_and_reports_progress(self):
+        async def main():
+            manager = JobManager(store=InMemoryJobStore(), max_running=1)
+
+            async def runner(report_progress):
+                report_progress({"step": 1})
+                return "done"
+
+            job = manager.submit("test", {}, runner)
+            await asyncio.sleep(0.01)
+            return manager.get(job.job_id)
+
+        job = asyncio.run(main())
+        assert job.status == JobStatus.SUCCEEDED
+        assert job.result == "done"
+        assert job.progress == {"step": 1}
+
+    def test_failed_and_cancelled_jobs(self):
+        async def main():
+            manager = JobManager(store=InMemoryJobStore(), max_running=2)
+
+            async def boom(report_progress):
+                raise RuntimeError("agent down")
+
+            async def slow(report_progress):
+                await asyncio.sleep(10)
+
+            failed = manager.submit("test", {}, boom)
+            cancelled = manager.submit("test", {}, slow)
+            await asyncio.sleep(0.01)
+            assert manager.cancel(cancelled.job_id)
+            await asyncio.sleep(0.01)
+            assert not manager.cancel(cancelled.job_id)
+            return manager.get(failed.job_id), manager.get(cancelled.job_id)
+
+        failed, cancelled = asyncio.run(main())
+        assert failed.status == JobStatus.FAILED
+        assert failed.error == "agent down"
+        assert cancelled.status == JobStatus.CANCELLED
@@ -0,0 +1,106 @@
+"""Tests for the shared, governed LLM HTTP client"""
+
+import sys
+import json
+import time
+import threading
+from concurrent.futures import ThreadPoolExecutor
+from pathlib import Path
+
+project_root = Path(__file__).parent.parent
+sys.path.insert(0, str(project_root))
+
+import httpx
+
+from agents.llm import GovernedTransport, TokenBucket, get_http_client, get_llm
+
+
+def completion(model="gpt-4o-mini"):
+    return {"model": model, "messages": [{"role": "user", "content": "hi"}]}
+
+
+class SlowBackend:
+    """MockTransport handler recording how many requests overlap"""
+
+    def __init__(self, delay=0.02, status=200, headers=None):
+        self.delay = delay
+        self.status = status
+        self.headers = headers or {}
+        self.running = 0
+        self.peak = 0
+        self.calls = 0
+        self._lock = threading.Lock()
+
+    def __call__(self, request):
+        with self._lock:
+            self.running += 1
+            self.calls += 1
+            self.peak = max(self.peak, self.running)
+        time.sleep(self.delay)
+        with self._lock:
+            self.running -= 1
+        return httpx.Response(self.status, json={"ok": True}, headers=self.headers)
+
+
+def client_for(backend, max_concurrency=16, rpm=0):
+    transport = GovernedTransport(httpx.MockTransport(backend), max_concurrency, rate_limit=lambda model: rpm)
+    return httpx.Client(transport=transport, base_url="https://llm.test"), transport
+
+
+class TestGovernedTransport:
+    def test_global_concurrency_cap(self):
+        backend = SlowBackend()
+        client, _ = client_for(backend, max_concurrency=3)
+        with ThreadPoolExecutor(max_workers=10) as pool:
+            list(pool.map(lambda _: client.post("/chat", json=completion()).json(), range(20)))
+        assert backend.calls == 20
+        assert backend.peak == 3
+
+    def test_slot_held_until_streamed_body_is_closed(self):
+        backend = SlowBackend(delay=0)
+        client, transport = client_for(backend, max_concurrency=1)
+        with client.stream("POST", "/chat", json=completion()) as response:
+            assert not transport._slots.acquire(blocking=False)
+            response.read()
+        # Released on close, so the next request goes through
+        assert client.post("/chat", json=completion()).status_code == 200
+
+    def test_rate_limit_is_per_model(self):
+        backend = SlowBackend(delay=0)
+        client, _ = client_for(backend, rpm=600)  # 10/s, burst of 10
+        started = time.monotonic()
+        for _ in range(12):
+            client.post("/chat", json=completion("a"))
+        limited = time.monotonic() - started
+        started = time.monotonic()
+        for _ in range(5):
+            client.post("/chat", json=completion("b"))
+        assert limited >= 0.15
+        assert time.monotonic() - started < 0.1
+
+    def test_429_pauses_the_model(self):
+        backend = SlowBackend(delay=0, status=429, headers={"retry-after": "0.2"})
+        client, transport = client_for(backend, rpm=6000)
+        assert client.post("/chat", json=completion()).status_code == 429
+        started = time.monotonic()
+        transport._bucket("gpt-4o-mini").acquire()
+        assert time.monotonic() - started >= 0.15
+
+
+class TestTokenBucket:
+    def test_refills_at_rate(self):
+        bucket = TokenBucket(rate=100, capacity=2)
+        waits = [bucket.acquire() for _ in range(4)]
+        assert waits[:2] == [0.0, 0.0]
+        assert 0 < waits[3] <= 0.05
+
+
+class TestSharedClient:
+    def test_agents_share_one_http_client(self, monkeypatch):
+        monkeypatch.setenv("OPENAI_API_KEY", "test-key")
+        monkeypatch.delenv("OPENAI_MODEL", raising=False)
+        first, second = get_llm(0.3), get_llm(0.7, model="gpt-4o")
+        assert first.chat_model.http_client is second.chat_model.http_client is get_http_client()
+        assert isinstance(get_http_client()._transport, GovernedTransport)
+        assert (first.model, second.model) == ("gpt-4o-mini", "gpt-4o")
+        assert (first.temperature, second.temperature) == (0.3, 0.7)
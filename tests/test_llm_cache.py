@@ -0,0 +1,130 @@
+"""Tests for the persistent LLM response cache"""
+
+import sys
+import json
+from pathlib import Path
+
+project_root = Path(__file__).parent.parent
+sys.path.insert(0, str(project_root))
+
+import httpx
+import pytest
+
+from agents.llm_cache import CachingTransport, LLMCacheMode, LLMResponseCache, cache_key
+from utils.metrics import LLM_CACHE_REQUESTS
+
+SSE_REPLY = b'data: {"choices": [{"delta": {"content": "ok"}}]}\n\ndata: [DONE]\n\n'
+
+
+def completion(content="hi", temperature=0.3, **extra):
+    return {"model": "gpt-4o-mini", "temperature": temperature, "stream": True,
+            "messages": [{"role": "user", "content": content}], **extra}
+
+
+class Provider:
+    def __init__(self, status=200):
+        self.status = status
+        self.calls = 0
+
+    def __call__(self, request):
+        self.calls += 1
+        return httpx.Response(self.status, content=SSE_REPLY, headers={"content-type": "text/event-stream"})
+
+
+def client_for(tmp_path, mode, provider=None, max_bytes=1024 * 1024):
+    provider = provider or Provider()
+    cache = LLMResponseCache(str(tmp_path / "llm_cache.db"), max_bytes)
+    transport = CachingTransport(httpx.MockTransport(provider), cache, mode)
+    return httpx.Client(transport=transport, base_url="https://llm.test/v1"), provider, cache
+
+
+class TestCacheKey:
+    def test_depends_on_model_temperature_and_prompt_only(self):
+        base = cache_key(completion())
+        assert cache_key(completion(user="someone", stream_options={"include_usage": True})) == base
+        assert cache_key(completion(temperature=0.7)) != base
+        assert cache_key(completion("bye")) != base
+        assert cache_key({**completion(), "model": "gpt-4o"}) != base
+
+
+class TestCachingTransport:
+    def test_record_then_replay_offline(self, tmp_path):
+        client, provider, _ = client_for(tmp_path, LLMCacheMode.RECORD)
+        with client.stream("POST", "/chat/completions", json=completion()) as response:
+            first = b"".join(response.iter_bytes())
+        second = client.post("/chat/completions", json=completion())
+        assert first == second.content == SSE_REPLY
+        assert provider.calls == 1
+        client.close()
+
+        # A fresh process replaying the same file never calls the provider
+        offline = Provider()
+        replay, _, cache = client_for(tmp_path, LLMCacheMode.REPLAY, offline)
+        assert replay.post("/chat/completions", json=completion()).content == SSE_REPLY
+        missed = replay.post("/chat/completions", json=completion("unseen"))
+        assert missed.status_code == 404
+        assert missed.json()["error"]["type"] == "llm_cache_miss"
+        assert offline.calls == 0
+        assert cache.get_stats()["hits"] == 2
+
+    def test_errors_and_other_requests_are_not_cached(self, tmp_path):
+        client, provider, cache = client_for(tmp_path, LLMCacheMode.RECORD, Provider(status=500))
+        client.post("/chat/completions", json=completion())
+        client.post("/chat/completions", json=completion())
+        client.get("/models")
+        assert provider.calls == 3
+        assert cache.get_stats()["entries"] == 0
+
+    def test_recorded_counts_only_stored_responses(self, tmp_path):
+        def unreachable(request):
+            raise httpx.ConnectError("provider down")
+
+        recorded = LLM_CACHE_REQUESTS.value(result="recorded")
+        down, _, _ = client_for(tmp_path, LLMCacheMode.RECORD, unreachable)
+        with pytest.raises(httpx.ConnectError):
+            down.post("/chat/completions", json=completion())
+        failing, _, _ = client_for(tmp_path, LLMCacheMode.RECORD, Provider(status=500))
+        failing.post("/chat/completions", json=completion())
+        assert LLM_CACHE_REQUESTS.value(result="recorded") == recorded
+
+        client, _, cache = client_for(tmp_path, LLMCacheMode.RECORD)
+        client.post("/chat/completions", json=completion())
+        assert LLM_CACHE_REQUESTS.value(result="recorded") == recorded + 1
+        assert cache.get_stats()["entries"] == 1
+
+    def test_passthrough_bypasses_cache(self, tmp_path):
+        client, provider, cache = client_for(tmp_path, LLMCacheMode.PASSTHROUGH)
+        client.post("/chat/completions", json=completion())
+        client.post("/chat/completions", json=completion())
+        assert provider.calls == 2
+        assert cache.get_stats()["entries"] == 0
+
+
+class TestLLMResponseCache:
+    def test_evicts_least_recently_used_over_size_bound(self, tmp_path):
+        cache = LLMResponseCache(str(tmp_path / "llm_cache.db"), max_bytes=25)
+        headers = [("content-type", "application/json")]
+        cache.put("a", 200, headers, b"x" * 10)
+        cache.put("b", 200, headers, b"x" * 10)
+        assert cache.get("a") is not None  # a is now more recent than b
+        cache.put("c", 200, headers, b"x" * 10)
+
+        assert cache.get("b") is None
+        assert cache.get("a")[2] == b"x" * 10
+        assert cache.get("c") == (200, headers, b"x" * 10)
+        assert cache.get_stats()["bytes"] == 20
+
+    def test_hits_are_written_in_batches(self, tmp_path):
+        cache = LLMResponseCache(str(tmp_path / "llm_cache.db"), touch_flush_seconds=60)
+        cache.put("a", 200, [], b"x")
+        writes = cache._conn.total_changes
+        for _ in range(5):
+            assert cache.get("a") is not None
+        assert cache._conn.total_changes == writes
+        assert cache.get_stats()["hits"] == 5
+        assert cache._conn.total_changes == writes + 1
+
+    def test_oversized_response_is_skipped(self, tmp_path):
+        cache = LLMResponseCache(str(tmp_path / "llm_cache.db"), max_bytes=5)
+        cache.put("big", 200, [], json.dumps({"text": "too long"}).encode())
+        assert cache.get_stats()["entries"] == 0
@@ -0,0 +1,69 @@
+"""Tests for the in-process Prometheus-style metrics"""
+
+import sys
+from pathlib import Path
+
+project_root = Path(__file__).parent.parent
+sys.path.insert(0, str(project_root))
+
+import pytest
+
+from utils.metrics import MetricsRegistry
+
+
+class TestMetrics:
+    def test_counter_and_gauge_exposition(self):
+        registry = MetricsRegistry()
+        requests = registry.counter("requests_total", "Requests", ["route"])
+        in_flight = registry.gauge("in_flight", "In flight")
+        requests.inc(route="/a")
+        requests.inc(2, route="/a")
+        in_flight.inc()
+
+        text = registry.render()
+        assert "# TYPE requests_total counter" in text
+        assert 'requests_total{route="/a"} 3' in text
+        assert "in_flight 1" in text
+
+    def test_histogram_buckets_are_cumulative(self):
+        registry = MetricsRegistry()
+        latency = registry.histogram("latency_seconds", "Latency", ["agent"], buckets=(0.1, 1.0))
+        for value in (0.05, 0.5, 5):
+            latency.observe(value, agent="diagnosis")
+
+        text = registry.render()
+        assert 'latency_seconds_bucket{agent="diagnosis",le="0.1"} 1' in text
+        assert 'latency_seconds_bucket{agent="diagnosis",le="1"} 2' in text
+        assert 'latency_seconds_bucket{agent="diagnosis",le="+Inf"} 3' in text
+        assert 'latency_seconds_count{agent="diagnosis"} 3' in text
+
+    def test_label_values_are_escaped(self):
+        registry = MetricsRegistry()
+        errors = registry.counter("errors_total", "Errors", ["detail"])
+        errors.inc(detail='say "hi"')
+        assert 'errors_total{detail="say \\"hi\\""} 1' in registry.render()
+
+    def test_wrong_labels_rejected(self):
+        registry = MetricsRegistry()
+        counter = registry.counter("c_total", "C", ["agent"])
+        with pytest.raises(ValueError):
+            counter.inc(route="/x")
+
+    def test_collect_hooks_run_before_render(self):
+        registry = MetricsRegistry()
+        depth = registry.gauge("queue_depth", "Depth")
+        registry.on_collect(lambda: depth.set(7))
+        assert "queue_depth 7" in registry.render()
+
+    def test_histogram_quantiles_interpolate_within_buckets(self):
+        registry = MetricsRegistry()
+        latency = registry.histogram("latency_seconds", "Latency", buckets=(1.0, 2.0, 4.0))
+        assert latency.quantile(0.5) is None
+        for value in [0.5] * 50 + [1.5] * 40 + [3] * 9 + [10]:
+            latency.observe(value)
+
+        assert latency.quantile(0.5) == pytest.approx(1.0)
+        assert latency.quantile(0.7) == pytest.approx(1.5)
+        assert latency.quantile(0.95) == pytest.approx(2 + 2 * 5 / 9)
+        # Beyond the last finite bucket the estimate is capped at that bound
+        assert latency.quantile(1.0) == 4.0
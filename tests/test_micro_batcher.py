@@ -0,0 +1,209 @@
+"""Tests for micro-batching of agent tasks"""
+
+import sys
+import asyncio
+from pathlib import Path
+
+project_root = Path(__file__).parent.parent
+sys.path.insert(0, str(project_root))
+
+import pytest
+
+from agents.micro_batcher import MicroBatcher
+from agents.orchestrator import AgentOrchestrator, TaskType
+from utils.config import get_setting
+from tests.test_orchestrator import SleepyAgent
+
+
+class Recorder:
+    def __init__(self, delay=0.0):
+        self.delay = delay
+        self.batches = []
+
+    async def __call__(self, items):
+        self.batches.append(list(items))
+        await asyncio.sleep(self.delay)
+        return [item * 10 if item >= 0 else ValueError(f"bad {item}") for item in items]
+
+
+class TestMicroBatcher:
+    def test_flushes_when_full(self):
+        async def main():
+            handler = Recorder()
+            batcher = MicroBatcher("test", handler, max_batch_size=3, max_wait=10)
+            results = await asyncio.wait_for(
+                asyncio.gather(*(batcher.submit(i) for i in range(6))), timeout=1
+            )
+            return handler, results, batcher.get_stats()
+
+        handler, results, stats = asyncio.run(main())
+        assert results == [0, 10, 20, 30, 40, 50]
+        assert handler.batches == [[0, 1, 2], [3, 4, 5]]
+        assert stats["avg_batch_size"] == 3
+
+    def test_flushes_after_max_wait(self):
+        async def main():
+            handler = Recorder()
+            batcher = MicroBatcher("test", handler, max_batch_size=100, max_wait=0.01)
+            return await asyncio.gather(batcher.submit(1), batcher.submit(2)), handler
+
+        results, handler = asyncio.run(main())
+        assert results == [10, 20]
+        assert handler.batches == [[1, 2]]
+
+    def test_per_item_errors_and_waiting_batches_accumulate(self):
+        async def main():
+            handler = Recorder(delay=0.02)
+            batcher = MicroBatcher("test", handler, max_batch_size=2, max_wait=0.001)
+            first = asyncio.gather(batcher.submit(1), batcher.submit(-1), return_exceptions=True)
+            await asyncio.sleep(0.005)
+            # Arrive while the first batch is running; sent together afterwards
+            rest = asyncio.gather(batcher.submit(2), batcher.submit(3))
+            return await first, await rest, handler
+
+        first, rest, handler = asyncio.run(main())
+        assert first[0] == 10 and isinstance(first[1], ValueError)
+        assert rest == [20, 30]
+        assert handler.batches == [[1, -1], [2, 3]]
+
+    def test_cancelled_items_are_not_sent(self):
+        async def main():
+            handler = Recorder()
+            batcher = MicroBatcher("test", handler, max_batch_size=10, max_wait=0.01)
+            with pytest.raises(asyncio.TimeoutError):
+                await asyncio.wait_for(batcher.submit(1), timeout=0.001)
+            result = await batcher.submit(2)
+            return result, handler
+
+        result, handler = asyncio.run(main())
+        assert result == 20
+        assert handler.batches == [[2]]
+
+
+class BatchingAgent(SleepyAgent):
+    def __init__(self, name):
+        super().__init__(name)
+        self.batch_sizes = []
+
+    async def process_batch(self, tasks):
+        self.batch_sizes.append(len(tasks))
+        await asyncio.sleep(0.01)
+        return [{"vehicle_id": task["data"]["vehicle_id"]} for task in tasks]
+
+
+class TestOrchestratorBatching:
+    def test_data_analysis_tasks_share_batches(self):
+        async def main():
+            orchestrator = AgentOrchestrator(max_concurrent_tasks=2)
+            agent = BatchingAgent("data_analysis")
+            orchestrator.register_agent("data_analysis", agent)
+            await orchestrator.start_all_agents()
+            processor = asyncio.create_task(orchestrator.process_tasks())
+
+            handles = [
+                await orchestrator.submit_task(TaskType.DATA_ANALYSIS, {"vehicle_id": f"VEH{i:03d}"})
+                for i in range(250)
+            ]
+            results = await asyncio.wait_for(asyncio.gather(*handles), timeout=5)
+            status = orchestrator.get_system_status()
+            await orchestrator.stop_all_agents(drain_timeout=1)
+            await processor
+            return agent, results, status
+
+        agent, results, status = asyncio.run(main())
+        assert [r["vehicle_id"] for r in results] == [f"VEH{i:03d}" for i in range(250)]
+        assert sum(agent.batch_sizes) == 250
+        batch_size = get_setting("agents_config", "agents.data_analysis_agent.telemetry_batch_size", 1)
+        assert max(agent.batch_sizes) == batch_size
+        assert len(agent.batch_sizes) <= -(-250 // batch_size) + 2
+        assert agent.done == []  # process_task never used
+        assert status["micro_batching"]["data_analysis"]["items"] == 250
+
+
+class TestParseBatchReports:
+    def test_extracts_reports_and_drops_bad_entries(self):
+        from agents.data_analysis_agent.agent import parse_batch_reports
+
+        reply = """```json
+        [{"ref": 0, "report": "Severity Level: HIGH"},
+         {"ref": 1, "report": {"Severity Level": "LOW"}},
+         {"ref": 7, "report": "out of range"},
+         {"ref": 2}]
+        ```"""
+        assert parse_batch_reports(reply, 3) == {0: "Severity Level: HIGH", 1: "Severity Level: LOW"}
+        assert parse_batch_reports("not json", 3) == {}
+
+
+class TestAnalyzeBatchFallback:
+    def make_agent(self, replies):
+        from agents.data_analysis_agent.agent import DataAnalysisAgent
+
+        agent = DataAnalysisAgent.__new__(DataAnalysisAgent)
+        agent.model, agent.temperature = "test", 0.3
+        agent.batches = []
+
+        def analyze_together(vehicles):
+            agent.batches.append([v["vehicle_id"] for v in vehicles])
+            return replies.pop(0)(vehicles)
+
+        def analyze(*args, **kwargs):
+            raise AssertionError("missing vehicles must not fall back to serial calls")
+
+        agent._analyze_together = analyze_together
+        agent.analyze = analyze
+        return agent
+
+    def test_missing_reports_are_rebatched_once_then_failed(self):
+        vehicles = [{"vehicle_id": f"V{i}", "type": "ICE", "sensor_data": {"n": i}} for i in range(5)]
+        agent = self.make_agent([
+            lambda batch: {0: "report V0", 2: "report V2"},  # truncated reply
+            lambda batch: {0: "report V1"},
+        ])
+        reports = agent.analyze_batch(vehicles, use_cache=False, use_rules=False)
+
+        assert agent.batches == [["V0", "V1", "V2", "V3", "V4"], ["V1", "V3", "V4"]]
+        assert reports[:3] == ["report V0", "report V1", "report V2"]
+        assert all(isinstance(report, ValueError) for report in reports[3:])
+
+    def test_unparseable_reply_splits_the_batch(self):
+        vehicles = [{"vehicle_id": f"V{i}", "type": "ICE", "sensor_data": {"n": i}} for i in range(5)]
+        agent = self.make_agent([
+            lambda batch: {},  # e.g. JSON cut off at the output limit
+            lambda batch: {0: "report V0", 1: "report V1"},
+            lambda batch: {},
+        ])
+        reports = agent.analyze_batch(vehicles, use_cache=False, use_rules=False)
+
+        assert agent.batches == [["V0", "V1", "V2", "V3", "V4"], ["V0", "V1"], ["V2", "V3", "V4"]]
+        assert reports[:2] == ["report V0", "report V1"]
+        assert all(isinstance(report, ValueError) for report in reports[2:])
+
+
+class FailingBatchAgent(BatchingAgent):
+    async def process_batch(self, tasks):
+        self.batch_sizes.append(len(tasks))
+        raise RuntimeError("LLM reply truncated")
+
+
+class TestBatchCircuitBreaker:
+    def test_one_breaker_outcome_per_batch(self):
+        async def main():
+            orchestrator = AgentOrchestrator(max_concurrent_tasks=2)
+            orchestrator.retry_attempts = 1
+            agent = FailingBatchAgent("data_analysis")
+            orchestrator.register_agent("data_analysis", agent)
+            await orchestrator.start_all_agents()
+            processor = asyncio.create_task(orchestrator.process_tasks())
+            handles = [
+                await orchestrator.submit_task(TaskType.DATA_ANALYSIS, {"vehicle_id": f"VEH{i:03d}"})
+                for i in range(20)
+            ]
+            await asyncio.wait_for(asyncio.gather(*handles, return_exceptions=True), timeout=5)
+            stats = orchestrator.breakers["data_analysis"].get_stats()
+            await orchestrator.stop_all_agents(drain_timeout=1)
+            await processor
+            return agent, stats
+
+        agent, stats = asyncio.run(main())
+        assert stats["window_calls"] == len(agent.batch_sizes) < 20
+        assert stats["state"] == "closed"
@@ -0,0 +1,142 @@
+"""Tests for the orchestrator's worker pool, bulkheads and drain"""
+
+import sys
+import asyncio
+from pathlib import Path
+
+project_root = Path(__file__).parent.parent
+sys.path.insert(0, str(project_root))
+
+import pytest
+
+from agents.base_agent import BaseAgent
+from agents.orchestrator import AgentOrchestrator, TaskType, TaskPriority
+
+
+class SleepyAgent(BaseAgent):
+    """Agent that records how many of its tasks run at once"""
+
+    def __init__(self, name, delay=0.02):
+        super().__init__(agent_id=name, agent_name=name)
+        self.delay = delay
+        self.running = 0
+        self.peak = 0
+        self.done = []
+
+    async def initialize(self):
+        return True
+
+    async def shutdown(self):
+        return True
+
+    async def process_task(self, task):
+        self.running += 1
+        self.peak = max(self.peak, self.running)
+        await asyncio.sleep(self.delay)
+        self.running -= 1
+        self.done.append(task["task_id"])
+        return {"ok": True}
+
+
+async def run_orchestrator(orchestrator, submissions):
+    await orchestrator.start_all_agents()
+    processor = asyncio.create_task(orchestrator.process_tasks())
+    for task_type, priority in submissions:
+        await orchestrator.submit_task(task_type, {}, priority)
+    await asyncio.sleep(0)
+    status = orchestrator.get_system_status()
+    await orchestrator.stop_all_agents(drain_timeout=5)
+    await processor
+    return status
+
+
+class TestOrchestratorWorkers:
+    def test_bulkhead_caps_per_agent_concurrency(self):
+        async def main():
+            orchestrator = AgentOrchestrator(max_concurrent_tasks=6)
+            diagnosis = SleepyAgent("diagnosis")
+            feedback = SleepyAgent("feedback")
+            orchestrator.register_agent("diagnosis", diagnosis)
+            orchestrator.register_agent("feedback", feedback)
+            orchestrator._agent_limits["diagnosis"] = 2
+
+            submissions = [(TaskType.DIAGNOSIS, TaskPriority.HIGH)] * 10 + \
+                          [(TaskType.FEEDBACK, TaskPriority.LOW)] * 4
+            status = await run_orchestrator(orchestrator, submissions)
+            return orchestrator, diagnosis, feedback, status
+
+        orchestrator, diagnosis, feedback, status = asyncio.run(main())
+        assert diagnosis.peak == 2
+        assert feedback.peak > 1
+        assert len(diagnosis.done) == 10 and len(feedback.done) == 4
+        assert status["bulkheads"]["diagnosis"]["limit"] == 2
+        assert orchestrator.get_system_status()["active_tasks"] == 0
+
+    def test_full_bulkhead_keeps_waiting_tasks_in_priority_order(self):
+        async def main():
+            orchestrator = AgentOrchestrator(max_concurrent_tasks=4)
+            diagnosis = SleepyAgent("diagnosis", delay=0.01)
+            orchestrator.register_agent("diagnosis", diagnosis)
+            orchestrator._agent_limits["diagnosis"] = 1
+            await orchestrator.start_all_agents()
+            processor = asyncio.create_task(orchestrator.process_tasks())
+            low = [await orchestrator.submit_task(TaskType.DIAGNOSIS, {}, TaskPriority.LOW) for _ in range(4)]
+            await asyncio.sleep(0.005)
+            critical = await orchestrator.submit_task(TaskType.DIAGNOSIS, {}, TaskPriority.CRITICAL)
+            await orchestrator.stop_all_agents(drain_timeout=5)
+            await processor
+            return diagnosis, low, critical
+
+        diagnosis, low, critical = asyncio.run(main())
+        # Only the first LOW task had started; CRITICAL overtakes the rest
+        assert diagnosis.done[:2] == [low[0].task_id, critical.task_id]
+
+    def test_stop_drains_queue_and_rejects_new_tasks(self):
+        async def main():
+            orchestrator = AgentOrchestrator(max_concurrent_tasks=2)
+            agent = SleepyAgent("feedback", delay=0.01)
+            orchestrator.register_agent("feedback", agent)
+            await run_orchestrator(orchestrator, [(TaskType.FEEDBACK, TaskPriority.LOW)] * 8)
+            with pytest.raises(RuntimeError):
+                await orchestrator.submit_task(TaskType.FEEDBACK, {})
+            return orchestrator, agent
+
+        orchestrator, agent = asyncio.run(main())
+        assert len(agent.done) == 8
+        assert orchestrator.task_queue.empty()
+        assert not orchestrator.is_running
+
+
+class FailingAgent(SleepyAgent):
+    async def process_task(self, task):
+        raise ValueError("boom")
+
+
+class TestTaskHandles:
+    def test_handle_resolves_with_result_and_is_retained(self):
+        async def main():
+            orchestrator = AgentOrchestrator(max_concurrent_tasks=2)
+            orchestrator.register_agent("feedback", SleepyAgent("feedback", delay=0))
+            orchestrator.register_agent("diagnosis", FailingAgent("diagnosis"))
+            orchestrator.retry_base_delay = 0
+            await orchestrator.start_all_agents()
+            processor = asyncio.create_task(orchestrator.process_tasks())
+
+            ok = await orchestrator.submit_task(TaskType.FEEDBACK, {})
+            failing = await orchestrator.submit_task(TaskType.DIAGNOSIS, {})
+            unroutable = await orchestrator.submit_task(TaskType.SCHEDULING, {})
+            result = await ok
+            with pytest.raises(ValueError):
+                await failing
+            with pytest.raises(LookupError):
+                await unroutable
+
+            await orchestrator.stop_all_agents(drain_timeout=1)
+            await processor
+            return orchestrator, ok, failing, result
+
+        orchestrator, ok, failing, result = asyncio.run(main())
+        assert result == {"ok": True}
+        assert orchestrator.get_task_result(ok.task_id)["status"] == "succeeded"
+        stored = orchestrator.get_task_result(failing.task_id)
+        assert stored["status"] == "failed" and stored["error"] == "boom"
@@ -0,0 +1,115 @@
+"""Tests for declarative agent pipelines"""
+
+import sys
+import asyncio
+from pathlib import Path
+
+project_root = Path(__file__).parent.parent
+sys.path.insert(0, str(project_root))
+
+import pytest
+
+from agents.base_agent import BaseAgent
+from agents.orchestrator import AgentOrchestrator, TaskType
+from agents.pipeline import Pipeline, PipelineError, Stage, VEHICLE_MAINTENANCE_PIPELINE
+
+
+class RecordingAgent(BaseAgent):
+    """Echoes its task data and logs start/finish order"""
+
+    def __init__(self, name, log, fail=False, delay=0.02):
+        super().__init__(agent_id=name, agent_name=name)
+        self.log = log
+        self.fail = fail
+        self.delay = delay
+
+    async def initialize(self):
+        return True
+
+    async def shutdown(self):
+        return True
+
+    async def process_task(self, task):
+        self.log.append(("start", self.agent_name))
+        try:
+            await asyncio.sleep(self.delay)
+        except asyncio.CancelledError:
+            self.log.append(("cancelled", self.agent_name))
+            raise
+        self.log.append(("end", self.agent_name))
+        if self.fail:
+            raise RuntimeError(f"{self.agent_name} failed")
+        return {"agent": self.agent_name, "data": task["data"]}
+
+
+async def run(pipeline, failing=()):
+    log = []
+    orchestrator = AgentOrchestrator(max_concurrent_tasks=4)
+    orchestrator.retry_base_delay = 0
+    for name in ("data_analysis", "diagnosis", "customer_engagement", "scheduling"):
+        orchestrator.register_agent(name, RecordingAgent(name, log, fail=name in failing))
+    await orchestrator.start_all_agents()
+    processor = asyncio.create_task(orchestrator.process_tasks())
+    try:
+        return await pipeline.run(orchestrator, {"vehicle_id": "VEH001"}), log
+    finally:
+        await orchestrator.stop_all_agents(drain_timeout=1)
+        await processor
+
+
+class TestPipeline:
+    def test_stages_chain_and_fan_out(self):
+        results, log = asyncio.run(run(VEHICLE_MAINTENANCE_PIPELINE))
+
+        assert set(results) == {"analysis", "diagnosis", "customer_engagement", "scheduling"}
+        assert results["diagnosis"]["data"]["analysis"]["agent"] == "data_analysis"
+        assert results["scheduling"]["data"]["diagnosis"]["agent"] == "diagnosis"
+        assert log.index(("end", "data_analysis")) < log.index(("start", "diagnosis"))
+        # The two final stages overlap
+        assert log.index(("start", "scheduling")) < log.index(("end", "customer_engagement"))
+        assert log.index(("start", "customer_engagement")) < log.index(("end", "scheduling"))
+
+    def test_failure_stops_downstream_stages(self):
+        with pytest.raises(PipelineError) as excinfo:
+            asyncio.run(run(VEHICLE_MAINTENANCE_PIPELINE, failing=("diagnosis",)))
+
+        assert excinfo.value.stage == "diagnosis"
+        assert set(excinfo.value.results) == {"analysis"}
+
+    def test_failure_cancels_running_and_queued_siblings(self):
+        pipeline = Pipeline("siblings", [
+            Stage("analysis", TaskType.DATA_ANALYSIS),
+            Stage("diagnosis", TaskType.DIAGNOSIS),
+            Stage("scheduling", TaskType.SCHEDULING),
+        ])
+
+        async def main():
+            log = []
+            orchestrator = AgentOrchestrator(max_concurrent_tasks=2)
+            orchestrator.retry_base_delay = 0
+            orchestrator.register_agent("data_analysis", RecordingAgent("data_analysis", log, delay=5))
+            orchestrator.register_agent("diagnosis", RecordingAgent("diagnosis", log, fail=True))
+            orchestrator.register_agent("scheduling", RecordingAgent("scheduling", log))
+            await orchestrator.start_all_agents()
+            processor = asyncio.create_task(orchestrator.process_tasks())
+            try:
+                with pytest.raises(PipelineError):
+                    await pipeline.run(orchestrator, {"vehicle_id": "VEH001"})
+                await asyncio.sleep(0.1)
+                return list(log), orchestrator.get_system_status()
+            finally:
+                await orchestrator.stop_all_agents(drain_timeout=1)
+                await processor
+
+        log, status = asyncio.run(main())
+        # The running and queued siblings were cancelled before finishing
+        assert ("cancelled", "data_analysis") in log
+        assert ("end", "scheduling") not in log
+        assert status["active_tasks"] == 0 and status["pending_results"] == 0
+
+    def test_rejects_unknown_dependencies_and_cycles(self):
+        with pytest.raises(ValueError):
+            Pipeline("bad", [Stage("a", TaskType.DIAGNOSIS, depends_on=("missing",))])
+        with pytest.raises(ValueError):
+            Pipeline("cycle", [Stage("a", TaskType.DIAGNOSIS, depends_on=("b",)),
+                               Stage("b", TaskType.FEEDBACK, depends_on=("a",))])
@@ -0,0 +1,133 @@
+"""Tests for circuit breakers, retries and deadlines in the orchestrator"""
+
+import sys
+import time
+import asyncio
+from pathlib import Path
+
+project_root = Path(__file__).parent.parent
+sys.path.insert(0, str(project_root))
+
+import pytest
+
+from agents.base_agent import BaseAgent
+from agents.orchestrator import AgentOrchestrator, TaskType
+from agents.resilience import CircuitBreaker, BreakerState, retry_delay
+
+
+class FlakyAgent(BaseAgent):
+    """Fails the first `failures` calls, optionally hanging instead of raising"""
+
+    def __init__(self, name, failures=0, hang=False):
+        super().__init__(agent_id=name, agent_name=name)
+        self.failures = failures
+        self.hang = hang
+        self.calls = 0
+
+    async def initialize(self):
+        return True
+
+    async def shutdown(self):
+        return True
+
+    async def process_task(self, task):
+        self.calls += 1
+        if self.hang:
+            await asyncio.sleep(10)
+        if self.calls <= self.failures:
+            raise ConnectionError("provider unavailable")
+        return {"agent": self.agent_name}
+
+
+def make_orchestrator(agent_type, agent, breaker=None):
+    orchestrator = AgentOrchestrator(max_concurrent_tasks=1)
+    orchestrator.register_agent(agent_type, agent)
+    orchestrator.retry_base_delay = 0
+    if breaker is not None:
+        orchestrator.breakers[agent_type] = breaker
+    return orchestrator
+
+
+def route(orchestrator, task_type, data=None):
+    task = {"task_id": "t1", "task_type": task_type.value, "priority": 2, "data": data or {}}
+    return asyncio.run(orchestrator._route_task(task))
+
+
+class TestCircuitBreaker:
+    def test_opens_on_failure_rate_and_recovers_after_trial(self, monkeypatch):
+        now = [0.0]
+        monkeypatch.setattr(time, "monotonic", lambda: now[0])
+        breaker = CircuitBreaker("x", failure_rate_threshold=0.5, window_size=4,
+                                 min_calls=4, reset_timeout=10)
+        for ok in (True, False, True, False):
+            assert breaker.allow()
+            breaker.record_success() if ok else breaker.record_failure()
+        assert breaker.state == BreakerState.OPEN
+        assert not breaker.allow()
+
+        now[0] = 11
+        assert breaker.allow()          # half-open trial
+        assert not breaker.allow()      # only one trial at a time
+        breaker.record_success()
+        assert breaker.state == BreakerState.CLOSED
+        assert breaker.get_stats()["times_opened"] == 1
+
+    def test_failed_trial_reopens(self, monkeypatch):
+        now = [0.0]
+        monkeypatch.setattr(time, "monotonic", lambda: now[0])
+        breaker = CircuitBreaker("x", window_size=2, min_calls=1, reset_timeout=5)
+        breaker.record_failure()
+        now[0] = 6
+        assert breaker.allow()
+        breaker.record_failure()
+        assert breaker.state == BreakerState.OPEN
+        assert not breaker.allow()
+
+    def test_retry_delay_is_capped(self):
+        assert all(0 <= retry_delay(attempt, 1.0, 4.0) <= 4.0 for attempt in range(10))
+
+
+class TestOrchestratorResilience:
+    def test_retries_until_success(self):
+        agent = FlakyAgent("diagnosis", failures=2)
+        orchestrator = make_orchestrator("diagnosis", agent)
+        assert route(orchestrator, TaskType.DIAGNOSIS) == {"agent": "diagnosis"}
+        assert agent.calls == 3
+
+    def test_gives_up_after_retry_attempts(self):
+        agent = FlakyAgent("diagnosis", failures=10)
+        orchestrator = make_orchestrator("diagnosis", agent)
+        with pytest.raises(ConnectionError):
+            route(orchestrator, TaskType.DIAGNOSIS)
+        assert agent.calls == orchestrator.retry_attempts
+        assert agent.error_count == 1
+
+    def test_deadline_enforced(self):
+        agent = FlakyAgent("diagnosis", hang=True)
+        orchestrator = make_orchestrator("diagnosis", agent)
+        orchestrator.timeout_seconds = 0.05
+        with pytest.raises(TimeoutError):
+            route(orchestrator, TaskType.DIAGNOSIS)
+        assert agent.calls == 1
+
+    def test_open_circuit_fails_fast(self):
+        breaker = CircuitBreaker("diagnosis", window_size=1, min_calls=1, reset_timeout=60)
+        breaker.record_failure()
+        agent = FlakyAgent("diagnosis")
+        orchestrator = make_orchestrator("diagnosis", agent, breaker)
+        with pytest.raises(Exception, match="open"):
+            route(orchestrator, TaskType.DIAGNOSIS)
+        assert agent.calls == 0
+        assert orchestrator.get_system_status()["circuit_breakers"]["diagnosis"]["state"] == "open"
+
+    def test_open_circuit_falls_back_to_rules_for_data_analysis(self):
+        breaker = CircuitBreaker("data_analysis", window_size=1, min_calls=1, reset_timeout=60)
+        breaker.record_failure()
+        agent = FlakyAgent("data_analysis")
+        orchestrator = make_orchestrator("data_analysis", agent, breaker)
+        vehicle = {"vehicle_id": "VEH001", "type": "ICE",
+                   "sensor_data": {"engine_temp": 110, "oil_pressure": 50}}
+        result = route(orchestrator, TaskType.DATA_ANALYSIS, {"vehicle": vehicle})
+        assert result["source"] == "rules_fallback"
+        assert result["severity"] == "CRITICAL"
+        assert agent.calls == 0
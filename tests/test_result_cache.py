@@ -0,0 +1,57 @@
+"""Tests for the content-addressed agent result cache"""
+
+import sys
+import time
+from pathlib import Path
+
+project_root = Path(__file__).parent.parent
+sys.path.insert(0, str(project_root))
+
+from utils.result_cache import ResultCache, cache_key
+
+
+class TestCacheKey:
+    def test_key_ignores_dict_ordering(self):
+        a = cache_key("data_analysis", "1", "gpt-4o-mini", 0.3, {"x": 1, "y": {"a": 1, "b": 2}})
+        b = cache_key("data_analysis", "1", "gpt-4o-mini", 0.3, {"y": {"b": 2, "a": 1}, "x": 1})
+        assert a == b
+
+    def test_key_depends_on_every_component(self):
+        base = ("data_analysis", "1", "gpt-4o-mini", 0.3, {"x": 1})
+        keys = {
+            cache_key(*base),
+            cache_key("diagnosis", *base[1:]),
+            cache_key(base[0], "2", *base[2:]),
+            cache_key(base[0], base[1], "gpt-4o", *base[3:]),
+            cache_key(*base[:3], 0.7, base[4]),
+            cache_key(*base[:4], {"x": 2}),
+        }
+        assert len(keys) == 6
+
+
+class TestResultCache:
+    def test_hit_and_miss_counters(self):
+        cache = ResultCache(max_entries=10, ttl_seconds=60)
+        assert cache.get("k") is None
+        cache.set("k", "report")
+        assert cache.get("k") == "report"
+        stats = cache.get_stats()
+        assert stats["hits"] == 1
+        assert stats["misses"] == 1
+
+    def test_lru_eviction(self):
+        cache = ResultCache(max_entries=2, ttl_seconds=60)
+        cache.set("a", 1)
+        cache.set("b", 2)
+        cache.get("a")
+        cache.set("c", 3)
+        assert cache.get("b") is None
+        assert cache.get("a") == 1
+        assert cache.get_stats()["evictions"] == 1
+
+    def test_ttl_expiry(self):
+        cache = ResultCache(max_entries=2, ttl_seconds=0.01)
+        cache.set("a", 1)
+        time.sleep(0.02)
+        assert cache.get("a") is None
+        assert cache.get_stats()["expirations"] == 1
@@ -0,0 +1,203 @@
+"""Tests for the sharded multi-process orchestrator"""
+
+import os
+import sys
+import time
+import asyncio
+import random
+from collections import Counter, defaultdict
+from pathlib import Path
+
+project_root = Path(__file__).parent.parent
+sys.path.insert(0, str(project_root))
+
+import pytest
+
+from agents.base_agent import BaseAgent
+from agents.orchestrator import TaskType
+from agents.sharding import (
+    HashRing, ShardedOrchestrator, ShardUnavailableError, shard_key, share_process_limits
+)
+
+
+class TimingAgent(BaseAgent):
+    """Reports which process ran each task and when"""
+
+    async def initialize(self):
+        return True
+
+    async def shutdown(self):
+        return True
+
+    async def process_task(self, task):
+        started = time.monotonic()
+        await asyncio.sleep(random.uniform(0, 0.01))
+        if task["data"].get("fail"):
+            raise ValueError("boom")
+        return {"pid": os.getpid(), "seq": task["data"]["seq"],
+                "started": started, "finished": time.monotonic()}
+
+
+class SlowAgent(TimingAgent):
+    async def process_task(self, task):
+        started = time.monotonic()
+        await asyncio.sleep(0.2)
+        if "marker" in task["data"]:
+            Path(task["data"]["marker"]).touch()
+        return {"pid": os.getpid(), "seq": task["data"]["seq"],
+                "started": started, "finished": time.monotonic()}
+
+
+def register_timing_agent(orchestrator):
+    orchestrator.register_agent("diagnosis", TimingAgent("diagnosis", "diagnosis"))
+
+
+def register_slow_agents(orchestrator):
+    orchestrator.register_agent("scheduling", SlowAgent("scheduling", "scheduling"))
+    orchestrator.register_agent("feedback", SlowAgent("feedback", "feedback"))
+
+
+async def await_task(orchestrator, data):
+    return await (await orchestrator.submit_task(TaskType.DIAGNOSIS, data))
+
+
+class TestHashRing:
+    def test_keys_spread_and_mostly_stay_when_a_node_is_added(self):
+        keys = [f"VEH{i:04d}" for i in range(2000)]
+        four = HashRing(range(4))
+        five = HashRing(range(5))
+        counts = Counter(four.node_for(key) for key in keys)
+        assert set(counts) == {0, 1, 2, 3}
+        assert min(counts.values()) > 300
+        moved = sum(four.node_for(key) != five.node_for(key) for key in keys)
+        assert moved < len(keys) * 0.35
+
+    def test_share_process_limits(self, monkeypatch):
+        monkeypatch.setenv("LLM_MAX_CONCURRENCY", "16")
+        monkeypatch.setenv("LLM_RATE_LIMIT_RPM", "600")
+        monkeypatch.setenv("LLM_RATE_LIMIT_RPM_GPT_4O", "120")
+        monkeypatch.delenv("AGENT_EXECUTOR_WORKERS", raising=False)
+        share_process_limits(4)
+        assert os.environ["LLM_MAX_CONCURRENCY"] == "4"
+        assert float(os.environ["LLM_RATE_LIMIT_RPM"]) == 150
+        assert float(os.environ["LLM_RATE_LIMIT_RPM_GPT_4O"]) == 30
+        assert os.environ["AGENT_EXECUTOR_WORKERS"] == "2"
+
+    def test_shard_key(self):
+        assert shard_key({"vehicle_id": "VEH001"}) == "VEH001"
+        assert shard_key({"vehicle": {"vehicle_id": "VEH002"}}) == "VEH002"
+        assert shard_key({}) is None
+
+
+class TestShardedOrchestrator:
+    def test_routes_by_vehicle_and_preserves_order(self):
+        async def main():
+            orchestrator = ShardedOrchestrator(register_timing_agent, num_shards=2, max_concurrent_tasks=4)
+            await orchestrator.start_all_agents()
+            try:
+                handles = defaultdict(list)
+                for seq in range(5):
+                    for vehicle in range(8):
+                        vehicle_id = f"VEH{vehicle:03d}"
+                        handles[vehicle_id].append(await orchestrator.submit_task(
+                            TaskType.DIAGNOSIS, {"vehicle_id": vehicle_id, "seq": seq}
+                        ))
+                results = {vid: await asyncio.gather(*hs) for vid, hs in handles.items()}
+                status = orchestrator.get_system_status()
+                healthy = await orchestrator.health_check()
+                with pytest.raises(ValueError):
+                    await await_task(orchestrator, {"seq": 0, "fail": True})
+            finally:
+                await orchestrator.stop_all_agents(drain_timeout=5)
+            return orchestrator, results, status, healthy
+
+        orchestrator, results, status, healthy = asyncio.run(main())
+        pids = set()
+        for vehicle_id, runs in results.items():
+            assert [run["seq"] for run in runs] == list(range(5))
+            assert len({run["pid"] for run in runs}) == 1
+            for before, after in zip(runs, runs[1:]):
+                assert after["started"] >= before["finished"]
+            pids.add(runs[0]["pid"])
+        assert len(pids) == 2 and os.getpid() not in pids
+        assert healthy
+        assert status["num_shards"] == 2 and status["live_shards"] == 2
+        assert status["max_concurrent_tasks"] == 8
+        assert status["shards"][0]["agents"]["diagnosis"]["status"] == "running"
+        assert status["agents"]["diagnosis"]["status"] == "running"
+        assert status["agents"]["diagnosis"]["shards"] == {0: "running", 1: "running"}
+        assert not any(process.is_alive() for process in orchestrator._processes)
+
+    def test_different_task_types_for_a_vehicle_run_concurrently(self):
+        async def main():
+            orchestrator = ShardedOrchestrator(register_slow_agents, num_shards=1, max_concurrent_tasks=4)
+            await orchestrator.start_all_agents()
+            try:
+                handles = [
+                    await orchestrator.submit_task(task_type, {"vehicle_id": "VEH001", "seq": seq})
+                    for seq in range(2) for task_type in (TaskType.SCHEDULING, TaskType.FEEDBACK)
+                ]
+                return await asyncio.gather(*handles)
+            finally:
+                await orchestrator.stop_all_agents(drain_timeout=5)
+
+        scheduling_first, feedback_first, scheduling_second, feedback_second = asyncio.run(main())
+        # Independent stages overlap ...
+        assert feedback_first["started"] < scheduling_first["finished"]
+        # ... while tasks of one type stay in submission order
+        assert scheduling_second["started"] >= scheduling_first["finished"]
+        assert feedback_second["started"] >= feedback_first["finished"]
+
+    def test_cancelling_a_handle_cancels_the_task_in_its_shard(self, tmp_path):
+        async def main():
+            orchestrator = ShardedOrchestrator(register_slow_agents, num_shards=1, max_concurrent_tasks=4)
+            await orchestrator.start_all_agents()
+            try:
+                running, waiting = [
+                    await orchestrator.submit_task(TaskType.SCHEDULING, {
+                        "vehicle_id": "VEH001", "seq": seq, "marker": str(tmp_path / f"done{seq}")
+                    })
+                    for seq in range(2)
+                ]
+                await asyncio.sleep(0.1)
+                running.cancel()
+                waiting.cancel()
+                # Long enough for both tasks to have finished had they run
+                await asyncio.sleep(0.5)
+            finally:
+                await orchestrator.stop_all_agents(drain_timeout=5)
+
+        asyncio.run(main())
+        assert list(tmp_path.iterdir()) == []
+
+    def test_status_listener_and_process_tasks(self):
+        async def main():
+            orchestrator = ShardedOrchestrator(register_timing_agent, num_shards=2)
+            statuses = []
+            orchestrator.add_status_listener(statuses.append)
+            await orchestrator.start_all_agents()
+            processor = asyncio.create_task(orchestrator.process_tasks())
+            await asyncio.sleep(0)
+            running = not processor.done()
+            await orchestrator.stop_all_agents()
+            await asyncio.wait_for(processor, timeout=1)
+            return statuses, running
+
+        statuses, running = asyncio.run(main())
+        assert running
+        assert statuses[-1]["orchestrator_running"] is False
+        assert any(s["agents"].get("diagnosis", {}).get("status") == "running" for s in statuses)
+
+    def test_requests_to_dead_shard_fail(self):
+        async def main():
+            orchestrator = ShardedOrchestrator(register_timing_agent, num_shards=1)
+            await orchestrator.start_all_agents()
+            orchestrator._processes[0].kill()
+            await asyncio.to_thread(orchestrator._processes[0].join)
+            with pytest.raises(ShardUnavailableError):
+                await await_task(orchestrator, {"vehicle_id": "VEH001", "seq": 0})
+            healthy = await orchestrator.health_check()
+            await orchestrator.stop_all_agents()
+            return healthy
+
+        assert asyncio.run(main()) is False
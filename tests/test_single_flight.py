@@ -0,0 +1,72 @@
+"""Tests for single-flight request coalescing"""
+
+import sys
+import asyncio
+from pathlib import Path
+
+project_root = Path(__file__).parent.parent
+sys.path.insert(0, str(project_root))
+
+import pytest
+
+from utils.single_flight import SingleFlight
+
+
+class TestSingleFlight:
+    def test_concurrent_callers_share_one_call(self):
+        calls = []
+
+        async def work():
+            calls.append(1)
+            await asyncio.sleep(0.01)
+            return "result"
+
+        async def main():
+            flight = SingleFlight()
+            results = await asyncio.gather(*(flight.do("k", work) for _ in range(5)))
+            return flight, results
+
+        flight, results = asyncio.run(main())
+        assert results == ["result"] * 5
+        assert len(calls) == 1
+        assert flight.get_stats() == {"calls": 5, "executions": 1, "coalesced": 4, "in_flight": 0}
+
+    def test_sequential_calls_are_not_coalesced(self):
+        async def main():
+            flight = SingleFlight()
+            await flight.do("k", lambda: asyncio.sleep(0, "a"))
+            await flight.do("k", lambda: asyncio.sleep(0, "b"))
+            return flight.get_stats()
+
+        assert asyncio.run(main())["executions"] == 2
+
+    def test_errors_propagate_to_every_waiter(self):
+        async def fail():
+            await asyncio.sleep(0.01)
+            raise RuntimeError("llm down")
+
+        async def main():
+            flight = SingleFlight()
+            return await asyncio.gather(
+                flight.do("k", fail), flight.do("k", fail), return_exceptions=True
+            )
+
+        results = asyncio.run(main())
+        assert all(isinstance(r, RuntimeError) for r in results)
+
+    def test_cancelled_caller_does_not_cancel_others(self):
+        async def work():
+            await asyncio.sleep(0.02)
+            return "ok"
+
+        async def main():
+            flight = SingleFlight()
+            first = asyncio.ensure_future(flight.do("k", work))
+            second = asyncio.ensure_future(flight.do("k", work))
+            await asyncio.sleep(0)
+            first.cancel()
+            with pytest.raises(asyncio.CancelledError):
+                await first
+            return await second
+
+        assert asyncio.run(main()) == "ok"
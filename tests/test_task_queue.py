@@ -0,0 +1,261 @@
+"""Tests for the orchestrator's priority task queue"""
+
+import sys
+import time
+import asyncio
+from pathlib import Path
+
+project_root = Path(__file__).parent.parent
+sys.path.insert(0, str(project_root))
+
+import pytest
+
+from agents.task_queue import PriorityTaskQueue
+from agents.orchestrator import AgentOrchestrator, TaskType, TaskPriority
+
+
+def task(name, priority):
+    return {"task_id": name, "priority": priority}
+
+
+class TestPriorityTaskQueue:
+    def test_higher_priority_first_fifo_within_priority(self):
+        queue = PriorityTaskQueue(aging_seconds=3600)
+        for name, priority in [("low1", 1), ("crit1", 4), ("low2", 1), ("crit2", 4), ("med", 2)]:
+            queue.put_nowait(task(name, priority))
+
+        order = [queue.get_nowait()["task_id"] for _ in range(5)]
+        assert order == ["crit1", "crit2", "med", "low1", "low2"]
+        assert queue.empty()
+
+    def test_aging_prevents_starvation(self, monkeypatch):
+        now = [1000.0]
+        monkeypatch.setattr(time, "monotonic", lambda: now[0])
+        queue = PriorityTaskQueue(aging_seconds=10)
+        queue.put_nowait(task("old_low", 1))
+        now[0] += 35  # LOW has aged past HIGH
+        queue.put_nowait(task("new_high", 3))
+
+        assert queue.get_nowait()["task_id"] == "old_low"
+
+    def test_depths(self):
+        queue = PriorityTaskQueue()
+        queue.put_nowait(task("a", 1))
+        queue.put_nowait(task("b", 1))
+        queue.put_nowait(task("c", 4))
+        depths = queue.depths()
+        assert list(depths) == [4, 1]
+        assert depths[1]["depth"] == 2
+
+    def test_gate_skips_blocked_task_types_until_woken(self):
+        async def main():
+            open_types = {"feedback"}
+            queue = PriorityTaskQueue(aging_seconds=3600)
+            queue.set_gate(lambda task_type: task_type in open_types)
+            queue.put_nowait({**task("diag", 4), "task_type": "diagnosis"})
+            queue.put_nowait({**task("fb", 1), "task_type": "feedback"})
+            first = queue.get_nowait()
+            getter = asyncio.ensure_future(queue.get())
+            await asyncio.sleep(0.01)
+            blocked = not getter.done()
+            open_types.add("diagnosis")
+            queue.wake()
+            second = await asyncio.wait_for(getter, timeout=1)
+            return first, blocked, second, queue.type_depths()
+
+        first, blocked, second, depths = asyncio.run(main())
+        assert first["task_id"] == "fb"
+        assert blocked
+        assert second["task_id"] == "diag"
+        assert depths == {"diagnosis": 0, "feedback": 0}
+
+    def test_get_waits_for_put(self):
+        async def main():
+            queue = PriorityTaskQueue()
+            getter = asyncio.ensure_future(queue.get())
+            await asyncio.sleep(0)
+            queue.put_nowait(task("a", 2))
+            return await asyncio.wait_for(getter, timeout=1)
+
+        assert asyncio.run(main())["task_id"] == "a"
+
+
+class TestOrchestratorQueue:
+    def test_status_reports_depth_per_priority(self):
+        async def main():
+            orchestrator = AgentOrchestrator()
+            await orchestrator.submit_task(TaskType.FEEDBACK, {}, TaskPriority.LOW)
+            await orchestrator.submit_task(TaskType.DIAGNOSIS, {}, TaskPriority.CRITICAL)
+            status = orchestrator.get_system_status()
+            first = orchestrator.task_queue.get_nowait()
+            return status, first
+
+        status, first = asyncio.run(main())
+        assert status["task_queue_size"] == 2
+        assert status["task_queue_depths"]["CRITICAL"]["depth"] == 1
+        assert status["task_queue_depths"]["LOW"]["depth"] == 1
+        assert first["task_type"] == "diagnosis"
+
+
+class TestSQLiteTaskQueue:
+    def make(self, tmp_path, **kwargs):
+        from agents.task_queue import SQLiteTaskQueue
+        return SQLiteTaskQueue(str(tmp_path / "tasks.db"), **kwargs)
+
+    def test_unacked_tasks_resume_after_restart(self, tmp_path):
+        async def first_run():
+            queue = self.make(tmp_path)
+            for name, priority in [("low", 1), ("crit", 4), ("acked", 2)]:
+                await queue.put(task(name, priority))
+            leased = await queue.get()
+            done = await queue.get()
+            queue.ack(done)
+            await queue.close()
+            return leased, done
+
+        async def second_run():
+            queue = self.make(tmp_path)
+            names = [(await queue.get())["task_id"] for _ in range(queue.qsize())]
+            await queue.close()
+            return names
+
+        leased, done = asyncio.run(first_run())
+        assert (leased["task_id"], done["task_id"]) == ("crit", "acked")
+        # The crashed lease and the never-delivered task both come back
+        assert asyncio.run(second_run()) == ["crit", "low"]
+
+    def test_resumed_tasks_keep_their_aging(self, tmp_path):
+        import sqlite3
+
+        async def first_run():
+            queue = self.make(tmp_path)
+            await queue.put(task("old_low", 1))
+            await queue.close()
+
+        async def second_run():
+            queue = self.make(tmp_path, aging_seconds=10)
+            await queue.put(task("new_high", 3))
+            first = await queue.get()
+            await queue.close()
+            return first
+
+        asyncio.run(first_run())
+        with sqlite3.connect(str(tmp_path / "tasks.db")) as conn:
+            conn.execute("UPDATE tasks SET enqueued_at = enqueued_at - 35")
+        # Waited 35s before the restart: LOW has aged past HIGH
+        assert asyncio.run(second_run())["task_id"] == "old_low"
+
+    def test_nack_dead_letters(self, tmp_path):
+        async def main():
+            queue = self.make(tmp_path)
+            await queue.put(task("bad", 2))
+            queue.nack(await queue.get(), ValueError("boom"))
+            dead = queue.get_stats()["dead_letters"]
+            await queue.close()
+            return dead
+
+        assert asyncio.run(main()) == 1
+        queue = self.make(tmp_path)
+        assert queue.qsize() == 0
+        assert queue.get_stats()["dead_letters"] == 1
+        [letter] = queue.dead_letters()
+        assert letter["task"]["task_id"] == "bad" and letter["error"] == "boom"
+
+    def test_expired_lease_is_redelivered_then_dead_lettered(self, tmp_path):
+        async def main():
+            queue = self.make(tmp_path, visibility_timeout=0, max_deliveries=2)
+            await queue.put(task("hung", 2))
+            first = await queue.get()
+            second = await asyncio.wait_for(queue.get(), timeout=1)
+            queue._requeue_expired()
+            await queue.close()
+            return first, second
+
+        first, second = asyncio.run(main())
+        assert first["task_id"] == second["task_id"] == "hung"
+        reopened = self.make(tmp_path)
+        assert reopened.qsize() == 0
+        assert reopened.get_stats()["dead_letters"] == 1
+
+    def test_concurrent_puts_share_commits(self, tmp_path):
+        async def main():
+            queue = self.make(tmp_path, commit_interval=0.01)
+            await asyncio.gather(*(queue.put(task(f"t{i}", 2)) for i in range(50)))
+            stats = queue.get_stats()
+            await queue.close()
+            return stats
+
+        assert asyncio.run(main())["commits"] < 5
+
+    def test_get_nowait_leases_like_get(self, tmp_path):
+        async def main():
+            queue = self.make(tmp_path)
+            await queue.put(task("a", 2))
+            leased = queue.get_nowait()
+            with pytest.raises(asyncio.QueueEmpty):
+                queue.get_nowait()
+            stats = queue.get_stats()
+            queue.ack(leased)
+            await queue.close()
+            return leased, stats
+
+        leased, stats = asyncio.run(main())
+        assert leased["task_id"] == "a" and stats["leased"] == 1
+
+    def test_expired_lease_wakes_a_blocked_consumer(self, tmp_path):
+        async def main():
+            queue = self.make(tmp_path, visibility_timeout=0.05)
+            await queue.put(task("crashed", 2))
+            await queue.get()  # consumer dies without ack
+            # No put() follows; the reaper alone must redeliver
+            redelivered = await asyncio.wait_for(queue.get(), timeout=1)
+            await queue.close()
+            return redelivered
+
+        assert asyncio.run(main())["task_id"] == "crashed"
+
+    def test_held_lease_does_not_expire_until_renewed(self, tmp_path):
+        async def main():
+            queue = self.make(tmp_path, visibility_timeout=0.05)
+            await queue.put(task("parked", 2))
+            leased = await queue.get()
+            queue.hold_lease(leased)
+            await asyncio.sleep(0.1)
+            held_qsize = queue.qsize()
+            queue.renew_lease(leased)
+            redelivered = await asyncio.wait_for(queue.get(), timeout=1)
+            await queue.close()
+            return held_qsize, redelivered
+
+        held_qsize, redelivered = asyncio.run(main())
+        assert held_qsize == 0
+        assert redelivered["task_id"] == "parked"
+
+    def test_tasks_waiting_for_a_slot_stay_queued_unleased(self, tmp_path):
+        from agents.task_queue import SQLiteTaskQueue
+        from tests.test_orchestrator import SleepyAgent
+
+        async def main():
+            orchestrator = AgentOrchestrator(max_concurrent_tasks=4)
+            orchestrator.task_queue = SQLiteTaskQueue(str(tmp_path / "tasks.db"), visibility_timeout=0.05)
+            agent = SleepyAgent("diagnosis", delay=0.04)
+            orchestrator.register_agent("diagnosis", agent)
+            orchestrator._agent_limits["diagnosis"] = 1
+            await orchestrator.start_all_agents()
+            processor = asyncio.create_task(orchestrator.process_tasks())
+            # Waiting far longer than the visibility timeout behind a limit of 1
+            handles = [await orchestrator.submit_task(TaskType.DIAGNOSIS, {}) for _ in range(5)]
+            await asyncio.sleep(0.02)
+            stats = orchestrator.task_queue.get_stats()
+            queued = orchestrator.get_system_status()["bulkheads"]["diagnosis"]["queued"]
+            finished = len(agent.done)
+            await asyncio.wait_for(asyncio.gather(*handles), timeout=5)
+            await orchestrator.stop_all_agents(drain_timeout=1)
+            await processor
+            return agent, handles, stats, queued, finished
+
+        agent, handles, stats, queued, finished = asyncio.run(main())
+        # One task leased and running, the rest still queued
+        assert stats["leased"] == 1 and queued + finished == 4
+        assert sorted(agent.done) == sorted(handle.task_id for handle in handles)
+        assert sorted(agent.done) == sorted(handle.task_id for handle in handles)
@@ -0,0 +1,65 @@
+"""Tests for the vectorized sensor threshold rules"""
+
+import sys
+from pathlib import Path
+
+project_root = Path(__file__).parent.parent
+sys.path.insert(0, str(project_root))
+
+from agents.data_analysis_agent.rules import describe_thresholds, evaluate_fleet, evaluate_vehicle
+from utils.mock_data import get_all_vehicles
+
+
+def ice(**sensor_data):
+    return {"vehicle_id": "T1", "type": "ICE", "sensor_data": sensor_data}
+
+
+def ev(**sensor_data):
+    return {"vehicle_id": "T2", "type": "EV", "sensor_data": sensor_data}
+
+
+class TestThresholdRules:
+    def test_healthy_vehicle_skips_llm(self):
+        result = evaluate_vehicle(ice(engine_temp=85, oil_pressure=50, battery_voltage=13.5, brake_wear=20))
+        assert result["severity"] == "LOW"
+        assert result["anomalies"] == []
+        assert result["needs_llm"] is False
+
+    def test_severity_bands(self):
+        assert evaluate_vehicle(ice(engine_temp=92))["severity"] == "MEDIUM"
+        assert evaluate_vehicle(ice(engine_temp=96))["severity"] == "HIGH"
+        assert evaluate_vehicle(ice(engine_temp=101))["severity"] == "CRITICAL"
+        assert evaluate_vehicle(ice(oil_pressure=29))["severity"] == "CRITICAL"
+        assert evaluate_vehicle(ev(battery_soh=69))["severity"] == "CRITICAL"
+        assert evaluate_vehicle(ev(brake_wear=60))["severity"] == "MEDIUM"
+
+    def test_rules_only_apply_to_matching_vehicle_type(self):
+        # engine_temp is an ICE metric; EV readings of it are ignored
+        assert evaluate_vehicle(ev(engine_temp=150))["severity"] == "LOW"
+
+    def test_unknown_vehicle_type_escalates(self):
+        result = evaluate_vehicle({"vehicle_id": "T3", "type": "Hybrid", "sensor_data": {}})
+        assert result["needs_llm"] is True
+
+    def test_unreadable_or_missing_reading_escalates(self):
+        results = evaluate_fleet([
+            ice(engine_temp="N/A", oil_pressure=50, battery_voltage=13.5, brake_wear=20),
+            ice(engine_temp=85, oil_pressure=None, battery_voltage="13.5", brake_wear=20),
+            ice(engine_temp=85, oil_pressure=50, battery_voltage=13.5),
+            ice(engine_temp=101, oil_pressure="bad", battery_voltage=13.5, brake_wear=20),
+        ])
+        assert [r["needs_llm"] for r in results] == [True, True, True, True]
+        assert all(r["anomalies"] == [] for r in results[:3])
+        assert results[3]["severity"] == "CRITICAL"
+        assert [a["metric"] for a in results[3]["anomalies"]] == ["engine_temp"]
+
+    def test_mock_fleet(self):
+        results = {r["vehicle_id"]: r for r in evaluate_fleet(get_all_vehicles().values())}
+        assert results["VEH001"]["severity"] == "CRITICAL"
+        assert results["VEH002"]["needs_llm"] is True
+        assert results["VEH003"]["needs_llm"] is False
+
+    def test_prompt_text_generated_from_rules(self):
+        text = describe_thresholds()
+        assert "- Engine Temp: 80-90°C normal, >100°C critical" in text
+        assert "- Battery SOH: 85-100% normal, <70% critical" in text
@@ -0,0 +1,89 @@
+"""Tests for the indexed, paginated vehicle store"""
+
+import sys
+from pathlib import Path
+
+project_root = Path(__file__).parent.parent
+sys.path.insert(0, str(project_root))
+
+import pytest
+
+from utils.vehicle_store import VehicleStore, InvalidCursorError
+
+
+def make_vehicle(vehicle_id, vehicle_type="ICE", model="Sedan", year=2022, **sensors):
+    sensor_data = {"engine_temp": 85, "oil_pressure": 50, "battery_voltage": 13.0, "brake_wear": 20}
+    sensor_data.update(sensors)
+    return {"vehicle_id": vehicle_id, "type": vehicle_type, "model": model,
+            "year": year, "sensor_data": sensor_data}
+
+
+@pytest.fixture
+def store():
+    vehicles = [make_vehicle(f"VEH{i:03d}", model="Sedan" if i % 2 else "Truck",
+                             year=2020 + i % 3) for i in range(25)]
+    vehicles.append(make_vehicle("VEH900", engine_temp=110))
+    return VehicleStore(vehicles)
+
+
+class TestVehicleStore:
+    def test_cursor_pages_cover_every_vehicle_once(self, store):
+        seen, cursor = [], None
+        while True:
+            page = store.query(limit=10, cursor=cursor)
+            seen.extend(v["vehicle_id"] for v in page["vehicles"])
+            cursor = page["next_cursor"]
+            if cursor is None:
+                break
+        assert seen == sorted(seen)
+        assert len(seen) == len(set(seen)) == len(store) == 26
+
+    def test_filters_intersect_indexes(self, store):
+        page = store.query({"model": "truck", "year": 2020}, limit=100)
+        ids = [v["vehicle_id"] for v in page["vehicles"]]
+        assert ids == ["VEH000", "VEH006", "VEH012", "VEH018", "VEH024"]
+        assert page["total"] == 5
+        assert page["next_cursor"] is None
+
+    def test_filtered_pagination(self, store):
+        first = store.query({"model": "Sedan"}, limit=5)
+        second = store.query({"model": "Sedan"}, limit=5, cursor=first["next_cursor"])
+        first_ids = [v["vehicle_id"] for v in first["vehicles"]]
+        second_ids = [v["vehicle_id"] for v in second["vehicles"]]
+        assert max(first_ids) < min(second_ids)
+        assert first["total"] == second["total"] == 13
+
+    def test_severity_is_derived_from_rules(self, store):
+        page = store.query({"severity": "CRITICAL"})
+        assert [v["vehicle_id"] for v in page["vehicles"]] == ["VEH900"]
+
+    def test_projection(self, store):
+        page = store.query(limit=1, fields=["model", "severity"])
+        assert page["vehicles"] == [{"vehicle_id": "VEH000", "model": "Truck", "severity": "LOW"}]
+
+    def test_upsert_reindexes(self, store):
+        store.upsert(make_vehicle("VEH000", model="Van", year=2020))
+        assert store.query({"model": "Truck", "year": 2020})["total"] == 4
+        assert store.query({"model": "Van"})["total"] == 1
+
+    def test_delete(self, store):
+        assert store.delete("VEH900")
+        assert not store.delete("VEH900")
+        assert store.query({"severity": "CRITICAL"})["total"] == 0
+        assert store.get("VEH900") is None
+
+    def test_invalid_cursor_and_filter(self, store):
+        with pytest.raises(InvalidCursorError):
+            store.query(cursor="@@")
+        with pytest.raises(ValueError):
+            store.query({"owner": "x"})
+
+    def test_changes_since(self, store):
+        version = store.version
+        store.upsert(make_vehicle("VEH001", model="Van"))
+        store.delete("VEH002")
+        delta = store.changes_since(version, fields=["model"])
+        assert delta["changed"] == [{"vehicle_id": "VEH001", "model": "Van"}]
+        assert delta["deleted"] == ["VEH002"]
+        assert delta["version"] == f"{store.changes.epoch}-{store.changes.version}"
+        assert store.changes_since(delta["version"])["changed"] == []
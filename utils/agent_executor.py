@@ -0,0 +1,120 @@
+"""
+Agent Executor
+Bounded thread pool that runs blocking agent calls (Crew.kickoff) off the
+asyncio event loop so cheap endpoints keep serving while LLM work is in flight
+"""
+
+import os
+import asyncio
+import threading
+import logging
+from concurrent.futures import Future, ThreadPoolExecutor
+from typing import Any, Callable, Dict, Optional
+
+logger = logging.getLogger("agent_executor")
+
+DEFAULT_MAX_WORKERS = 8
+DEFAULT_MAX_QUEUE = 64
+
+
+class ExecutorSaturatedError(Exception):
+    """Raised when the executor queue is full and new work is rejected"""
+
+
+class AgentExecutor:
+    """
+    Thread pool with admission control and utilisation metrics
+
+    At most max_workers calls run at once and at most max_queue more wait
+    for a free thread; anything beyond that is rejected immediately so the
+    API can shed load instead of queueing without bound.
+    """
+
+    def __init__(self, max_workers: Optional[int] = None, max_queue: Optional[int] = None):
+        self.max_workers = max_workers or int(os.getenv("AGENT_EXECUTOR_WORKERS", DEFAULT_MAX_WORKERS))
+        self.max_queue = max_queue if max_queue is not None else int(
+            os.getenv("AGENT_EXECUTOR_QUEUE_SIZE", DEFAULT_MAX_QUEUE)
+        )
+        self._executor = ThreadPoolExecutor(
+            max_workers=self.max_workers,
+            thread_name_prefix="agent-worker"
+        )
+        self._lock = threading.Lock()
+        self._queued = 0
+        self._running = 0
+        self._peak_queued = 0
+        self._submitted = 0
+        self._completed = 0
+        self._failed = 0
+        self._rejected = 0
+
+    async def run(self, fn: Callable[..., Any], *args, **kwargs) -> Any:
+        """Run fn(*args, **kwargs) on the pool and await its result"""
+        with self._lock:
+            if self._queued + self._running >= self.max_workers + self.max_queue:
+                self._rejected += 1
+                raise ExecutorSaturatedError(
+                    f"Agent executor saturated ({self._running} running, {self._queued} queued)"
+                )
+            self._queued += 1
+            self._submitted += 1
+            self._peak_queued = max(self._peak_queued, self._queued)
+
+        future = self._executor.submit(self._invoke, fn, args, kwargs)
+        future.add_done_callback(self._on_done)
+        return await asyncio.wrap_future(future)
+
+    def _invoke(self, fn: Callable[..., Any], args: tuple, kwargs: Dict[str, Any]) -> Any:
+        with self._lock:
+            self._queued -= 1
+            self._running += 1
+        try:
+            return fn(*args, **kwargs)
+        finally:
+            with self._lock:
+                self._running -= 1
+
+    def _on_done(self, future: Future):
+        with self._lock:
+            if future.cancelled():
+                # Cancelled before a worker picked it up
+                self._queued -= 1
+            elif future.exception() is not None:
+                self._failed += 1
+            else:
+                self._completed += 1
+
+    def get_stats(self) -> Dict[str, Any]:
+        """Get queue depth and saturation metrics"""
+        with self._lock:
+            return {
+                "max_workers": self.max_workers,
+                "max_queue": self.max_queue,
+                "running": self._running,
+                "queue_depth": self._queued,
+                "peak_queue_depth": self._peak_queued,
+                "saturation": round(self._running / self.max_workers, 3),
+                "submitted": self._submitted,
+                "completed": self._completed,
+                "failed": self._failed,
+                "rejected": self._rejected,
+            }
+
+    def shutdown(self, wait: bool = True):
+        """Stop accepting work and release the worker threads"""
+        logger.info("Shutting down agent executor")
+        self._executor.shutdown(wait=wait, cancel_futures=True)
+
+
+_shared_executor: Optional[AgentExecutor] = None
+_shared_executor_lock = threading.Lock()
+
+
+def get_agent_executor() -> AgentExecutor:
+    """Process-wide executor shared by the orchestrator's agent adapters"""
+    global _shared_executor
+    if _shared_executor is None:
+        with _shared_executor_lock:
+            if _shared_executor is None:
+                _shared_executor = AgentExecutor()
+    return _shared_executor
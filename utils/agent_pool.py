@@ -0,0 +1,367 @@
+"""
+Agent Pool
+Keeps pre-warmed agent instances around so API requests reuse them
+instead of constructing a new LLM client and CrewAI agent per call
+"""
+
+import os
+import queue
+import asyncio
+import importlib
+import threading
+import time
+import logging
+from contextlib import asynccontextmanager, contextmanager
+from typing import Any, Callable, Dict, List, Optional
+
+logger = logging.getLogger("agent_pool")
+
+DEFAULT_POOL_SIZE = 2
+DEFAULT_CHECKOUT_TIMEOUT = 30.0
+
+
+class PoolExhaustedError(Exception):
+    """Raised when no agent becomes available before the checkout timeout"""
+
+
+class AgentStateError(Exception):
+    """Raised by an agent call that left the agent unusable; the agent is discarded"""
+
+
+def leaves_agent_broken(error: BaseException) -> bool:
+    """
+    Whether an error escaping an agent call means the agent must be discarded
+
+    Ordinary call failures (LLM/HTTP errors, rate limits, bad input) leave
+    the agent as it was and it goes back to the pool. An AgentStateError,
+    or an interrupt (cancellation, KeyboardInterrupt) that may have stopped
+    the crew halfway, does not.
+    """
+    return isinstance(error, AgentStateError) or not isinstance(error, Exception)
+
+
+# Put in the idle queue in place of a discarded agent; whoever takes it
+# builds the replacement, so waiters are woken as for a checked-in agent
+_REPLACE = object()
+
+
+def pool_size_for(agent_type: str, default: Optional[int] = None) -> int:
+    """
+    Resolve the pool size for an agent type
+
+    AGENT_POOL_SIZE_<AGENT_TYPE> overrides AGENT_POOL_SIZE, which overrides
+    the built-in default.
+    """
+    if default is None:
+        default = int(os.getenv("AGENT_POOL_SIZE", DEFAULT_POOL_SIZE))
+    value = os.getenv(f"AGENT_POOL_SIZE_{agent_type.upper()}")
+    return max(1, int(value)) if value else max(1, default)
+
+
+def lazy_factory(path: str) -> Callable[[], Any]:
+    """
+    Factory for "package.module:ClassName" that imports the module on first use
+
+    Keeps heavy agent dependencies (crewai, langchain) out of server start-up.
+    """
+    target = None
+
+    def factory():
+        nonlocal target
+        if target is None:
+            module_name, attr = path.split(":")
+            target = getattr(importlib.import_module(module_name), attr)
+        return target()
+
+    factory.__qualname__ = f"lazy_factory({path})"
+    return factory
+
+
+class AgentPool:
+    """
+    Fixed-size pool of agents of a single type
+
+    Agents are created up to max_size, handed out exclusively on checkout
+    and returned on checkin. Idle agents are reused most-recently-used first
+    so the warmest HTTP connections get picked up again.
+    """
+
+    def __init__(self, agent_type: str, factory: Callable[[], Any], max_size: int,
+                 checkout_timeout: float = DEFAULT_CHECKOUT_TIMEOUT):
+        self.agent_type = agent_type
+        self.factory = factory
+        self.max_size = max_size
+        self.checkout_timeout = checkout_timeout
+
+        self._idle: queue.LifoQueue = queue.LifoQueue()
+        self._lock = threading.Lock()
+        self._created = 0
+        self._in_use = 0
+        self._checkouts = 0
+        self._waits = 0
+        self._timeouts = 0
+        self._discarded = 0
+        self._replacements = 0
+
+    def warm(self, count: Optional[int] = None) -> int:
+        """Eagerly create idle agents (defaults to filling the pool)"""
+        target = self.max_size if count is None else min(count, self.max_size)
+        created = 0
+        while True:
+            with self._lock:
+                if self._created >= target:
+                    break
+                self._created += 1
+            try:
+                agent = self.factory()
+            except Exception:
+                with self._lock:
+                    self._created -= 1
+                raise
+            self._idle.put(agent)
+            created += 1
+        if created:
+            logger.info(f"Warmed {created} {self.agent_type} agent(s)")
+        return created
+
+    def checkout(self, timeout: Optional[float] = None) -> Any:
+        """Take an agent out of the pool, creating one if below max_size"""
+        try:
+            agent = self._idle.get_nowait()
+        except queue.Empty:
+            agent = self._create_or_wait(self.checkout_timeout if timeout is None else timeout)
+        if agent is _REPLACE:
+            agent = self._replace()
+
+        with self._lock:
+            self._in_use += 1
+            self._checkouts += 1
+        return agent
+
+    def checkin(self, agent: Any, discard: bool = False):
+        """
+        Return an agent to the pool
+
+        Pass discard=True when the agent may be in a bad state; it is dropped
+        and the next checkout builds a fresh instance in its place.
+        """
+        with self._lock:
+            self._in_use -= 1
+            if discard:
+                self._discarded += 1
+                self._replacements += 1
+        self._idle.put(_REPLACE if discard else agent)
+
+    @contextmanager
+    def agent(self, timeout: Optional[float] = None):
+        """
+        Context manager wrapping checkout/checkin
+
+        If the body raises an error that leaves the agent broken (see
+        leaves_agent_broken), the agent is discarded rather than handed to
+        the next caller; any other error returns it to the pool.
+        """
+        agent = self.checkout(timeout)
+        try:
+            yield agent
+        except BaseException as e:
+            self.checkin(agent, discard=leaves_agent_broken(e))
+            raise
+        self.checkin(agent)
+
+    def _replace(self) -> Any:
+        """Build an agent for a slot freed by a discarded one"""
+        with self._lock:
+            self._replacements -= 1
+        try:
+            return self.factory()
+        except Exception:
+            with self._lock:
+                self._created -= 1
+            raise
+
+    def _create_or_wait(self, timeout: float) -> Any:
+        with self._lock:
+            can_create = self._created < self.max_size
+            if can_create:
+                self._created += 1
+            else:
+                self._waits += 1
+
+        if can_create:
+            try:
+                return self.factory()
+            except Exception:
+                with self._lock:
+                    self._created -= 1
+                raise
+
+        try:
+            return self._idle.get(timeout=timeout)
+        except queue.Empty:
+            with self._lock:
+                self._timeouts += 1
+            raise PoolExhaustedError(
+                f"No {self.agent_type} agent available after {timeout:.1f}s"
+            )
+
+    def get_stats(self) -> Dict[str, Any]:
+        """Get pool utilisation counters"""
+        with self._lock:
+            return {
+                "max_size": self.max_size,
+                "created": self._created,
+                "idle": self._idle.qsize() - self._replacements,
+                "in_use": self._in_use,
+                "checkouts": self._checkouts,
+                "waits": self._waits,
+                "timeouts": self._timeouts,
+                "discarded": self._discarded,
+            }
+
+
+class AgentRegistry:
+    """
+    Pools for every agent type the API serves
+
+    factories maps agent type (e.g. "data_analysis") to a zero-argument
+    callable that builds a new agent instance. Listeners are called with
+    the registry whenever its state changes: warm-up finished, an agent
+    type starts or stops failing to build, or an agent is discarded after
+    a call that left it broken.
+
+    Async callers should hold slot(agent_type) before handing a call that
+    checks out an agent to a worker thread, so that waiting for a busy
+    pool happens on the event loop instead of parking the thread.
+    """
+
+    def __init__(self, factories: Dict[str, Callable[[], Any]],
+                 sizes: Optional[Dict[str, int]] = None):
+        sizes = sizes or {}
+        self.pools: Dict[str, AgentPool] = {
+            agent_type: AgentPool(
+                agent_type,
+                factory,
+                sizes.get(agent_type) or pool_size_for(agent_type),
+            )
+            for agent_type, factory in factories.items()
+        }
+        self._slots: Dict[str, asyncio.Semaphore] = {
+            agent_type: asyncio.Semaphore(pool.max_size) for agent_type, pool in self.pools.items()
+        }
+        self.warmed_at: Optional[float] = None
+        self.warm_errors: Dict[str, str] = {}
+        self._errors_lock = threading.Lock()
+        self._listeners: List[Callable[["AgentRegistry"], None]] = []
+
+    def add_listener(self, listener: Callable[["AgentRegistry"], None]):
+        self._listeners.append(listener)
+
+    def remove_listener(self, listener: Callable[["AgentRegistry"], None]):
+        if listener in self._listeners:
+            self._listeners.remove(listener)
+
+    def _notify(self):
+        for listener in self._listeners:
+            try:
+                listener(self)
+            except Exception as e:
+                logger.error(f"Agent registry listener failed: {str(e)}")
+
+    def _set_error(self, agent_type: str, error: Optional[str]) -> bool:
+        """Record (or clear) why agent_type cannot be built; returns whether it changed"""
+        with self._errors_lock:
+            if self.warm_errors.get(agent_type) == error:
+                return False
+            if error is None:
+                del self.warm_errors[agent_type]
+            else:
+                self.warm_errors[agent_type] = error
+            return True
+
+    def warm_all(self):
+        """Pre-create agents for every pool; failures are logged, not raised"""
+        started = time.perf_counter()
+        for agent_type, pool in self.pools.items():
+            try:
+                pool.warm()
+                self._set_error(agent_type, None)
+            except Exception as e:
+                self._set_error(agent_type, str(e))
+                logger.error(f"Failed to warm {agent_type} pool: {str(e)}")
+        self.warmed_at = time.time()
+        logger.info(f"Agent pools warmed in {time.perf_counter() - started:.2f}s")
+        self._notify()
+
+    @property
+    def is_warm(self) -> bool:
+        return self.warmed_at is not None and not self.warm_errors
+
+    def pool(self, agent_type: str) -> AgentPool:
+        if agent_type not in self.pools:
+            raise KeyError(f"Unknown agent type: {agent_type}")
+        return self.pools[agent_type]
+
+    def agent(self, agent_type: str, timeout: Optional[float] = None):
+        """
+        Context manager checking out an agent of the given type
+
+        Like AgentPool.agent(), and also keeps warm_errors current and
+        notifies listeners of build failures, recoveries and discards.
+        """
+        return self._checked_out(agent_type, self.pool(agent_type), timeout)
+
+    @asynccontextmanager
+    async def slot(self, agent_type: str, timeout: Optional[float] = None):
+        """
+        Async context manager reserving one agent of the given type
+
+        Waits on the event loop (up to the pool's checkout timeout) until
+        fewer than max_size callers hold a slot, so an agent() checkout made
+        while holding it does not block.
+        """
+        pool = self.pool(agent_type)
+        timeout = pool.checkout_timeout if timeout is None else timeout
+        semaphore = self._slots[agent_type]
+        if not semaphore.locked():
+            await semaphore.acquire()  # free slot, returns without yielding
+        else:
+            with pool._lock:
+                pool._waits += 1
+            try:
+                await asyncio.wait_for(semaphore.acquire(), timeout)
+            except asyncio.TimeoutError:
+                with pool._lock:
+                    pool._timeouts += 1
+                raise PoolExhaustedError(
+                    f"No {agent_type} agent available after {timeout:.1f}s"
+                )
+        try:
+            yield
+        finally:
+            semaphore.release()
+
+    @contextmanager
+    def _checked_out(self, agent_type: str, pool: AgentPool, timeout: Optional[float]):
+        try:
+            agent = pool.checkout(timeout)
+        except PoolExhaustedError:
+            raise
+        except Exception as e:
+            if self._set_error(agent_type, str(e)):
+                self._notify()
+            raise
+        if self._set_error(agent_type, None):
+            self._notify()
+        try:
+            yield agent
+        except BaseException as e:
+            broken = leaves_agent_broken(e)
+            pool.checkin(agent, discard=broken)
+            if broken:
+                self._notify()
+            raise
+        pool.checkin(agent)
+
+    def get_stats(self) -> Dict[str, Any]:
+        return {agent_type: pool.get_stats() for agent_type, pool in self.pools.items()}
@@ -0,0 +1,173 @@
+"""
+Alert Store
+Active maintenance alerts with change versions for ETags and delta sync
+"""
+
+import logging
+import threading
+from datetime import datetime
+from typing import Any, Callable, Dict, Hashable, Iterable, List, Optional
+
+from utils.change_log import ChangeLog
+
+logger = logging.getLogger("alerts")
+
+# Rule severities that raise a "critical" alert; the rest are "warning"
+CRITICAL_SEVERITIES = ("HIGH", "CRITICAL")
+
+
+def alerts_from_anomalies(vehicle_id: str, anomalies: List[Dict[str, Any]]) -> List[Dict[str, Any]]:
+    """One alert per anomalous reading found by the threshold rules"""
+    return [
+        {
+            "id": f"{vehicle_id}:{anomaly['metric']}",
+            "vehicle_id": vehicle_id,
+            "type": "critical" if anomaly["severity"] in CRITICAL_SEVERITIES else "warning",
+            "severity": anomaly["severity"],
+            "metric": anomaly["metric"],
+            "message": f"{anomaly['label']} out of range: {anomaly['value']:g}{anomaly['unit']}",
+        }
+        for anomaly in anomalies
+    ]
+
+
+class AlertStore:
+    """
+    Alerts keyed by id, newest first
+
+    Alerts are plain dicts with at least "id" and "vehicle_id"; a
+    created_at timestamp is added on insert unless timestamps is False.
+    Every insert, update and
+    delete is recorded in self.changes and passed to the listeners as
+    listener("raised", alert) or listener("cleared", {"id": ...}).
+    """
+
+    def __init__(self, alerts: Optional[Iterable[Dict[str, Any]]] = None, timestamps: bool = True):
+        self.timestamps = timestamps
+        self._lock = threading.RLock()
+        self._alerts: Dict[Hashable, Dict[str, Any]] = {}
+        self.changes = ChangeLog()
+        self._listeners: List[Callable[[str, Dict[str, Any]], None]] = []
+        for alert in alerts or ():
+            self.upsert(alert)
+
+    def upsert(self, alert: Dict[str, Any]) -> bool:
+        """Insert or replace an alert; returns False if nothing changed"""
+        with self._lock:
+            existing = self._alerts.get(alert["id"])
+            alert = dict(alert)
+            if self.timestamps:
+                created_at = existing["created_at"] if existing is not None else datetime.now().isoformat()
+                alert.setdefault("created_at", created_at)
+            if alert == existing:
+                return False
+            self._alerts[alert["id"]] = alert
+            self.changes.record(alert["id"])
+            self._notify("raised", alert)
+            return True
+
+    def delete(self, alert_id: Hashable) -> bool:
+        with self._lock:
+            if self._alerts.pop(alert_id, None) is None:
+                return False
+            self.changes.record(alert_id, deleted=True)
+            self._notify("cleared", {"id": alert_id})
+            return True
+
+    def add_listener(self, listener: Callable[[str, Dict[str, Any]], None]):
+        self._listeners.append(listener)
+
+    def remove_listener(self, listener: Callable[[str, Dict[str, Any]], None]):
+        if listener in self._listeners:
+            self._listeners.remove(listener)
+
+    def _notify(self, action: str, payload: Dict[str, Any]):
+        for listener in self._listeners:
+            try:
+                listener(action, payload)
+            except Exception as e:
+                logger.error(f"Alert listener failed: {str(e)}")
+
+    def sync_vehicle(self, vehicle_id: str, anomalies: List[Dict[str, Any]],
+                     details: Optional[Dict[str, Any]] = None) -> List[Dict[str, Any]]:
+        """
+        Make a vehicle's rule alerts match its current anomalies
+
+        Raises or updates one alert per anomaly and clears alerts for
+        readings that are back in range. details (e.g. the latest agent
+        analysis or diagnosis) are added to each of the vehicle's alerts
+        and kept until replaced. Returns the alerts that were raised or
+        changed.
+        """
+        with self._lock:
+            current = {alert["id"]: alert for alert in alerts_from_anomalies(vehicle_id, anomalies)}
+            stale = [alert_id for alert_id, alert in self._alerts.items()
+                     if alert["vehicle_id"] == vehicle_id and "metric" in alert
+                     and alert_id not in current]
+            for alert_id in stale:
+                self.delete(alert_id)
+            changed = []
+            for alert_id, alert in current.items():
+                alert = {**self._alerts.get(alert_id, {}), **alert, **(details or {})}
+                if self.upsert(alert):
+                    changed.append(self._alerts[alert_id])
+            return changed
+
+    def get(self, alert_id: Hashable) -> Optional[Dict[str, Any]]:
+        with self._lock:
+            return self._alerts.get(alert_id)
+
+    def list(self, vehicle_id: Optional[str] = None, newest_first: bool = True) -> List[Dict[str, Any]]:
+        with self._lock:
+            alerts = self._alerts.values()
+            alerts = [alert for alert in (reversed(alerts) if newest_first else alerts)
+                      if vehicle_id is None or alert["vehicle_id"] == vehicle_id]
+        return alerts
+
+    def __len__(self) -> int:
+        return len(self._alerts)
+
+    @property
+    def version(self) -> str:
+        """Version token for ?since= (see ChangeLog)"""
+        with self._lock:
+            return self.changes.token
+
+    def etag(self, variant: str = "") -> str:
+        with self._lock:
+            return self.changes.etag(variant)
+
+    def changes_since(self, since: str) -> Dict[str, Any]:
+        """
+        Alerts changed and IDs deleted after the version token since
+
+        Raises:
+            ResyncRequiredError: The change log no longer covers since
+        """
+        with self._lock:
+            changed, deleted = self.changes.changes_since(since)
+            return {
+                "version": self.changes.token,
+                "changed": [self._alerts[alert_id] for alert_id in changed],
+                "deleted": deleted,
+            }
+
+
+_default_store: Optional[AlertStore] = None
+_default_store_lock = threading.Lock()
+
+
+def get_alert_store() -> AlertStore:
+    """Process-wide store, seeded from the threshold rules over the vehicle store"""
+    global _default_store
+    if _default_store is None:
+        with _default_store_lock:
+            if _default_store is None:
+                from agents.data_analysis_agent.rules import evaluate_fleet
+                from utils.vehicle_store import get_vehicle_store
+
+                store = AlertStore()
+                for finding in evaluate_fleet(get_vehicle_store().all().values()):
+                    store.sync_vehicle(finding["vehicle_id"], finding["anomalies"])
+                _default_store = store
+    return _default_store
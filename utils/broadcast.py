@@ -0,0 +1,219 @@
+"""
+Event Broadcast
+Fan-out of server events (alerts, agent status) to WebSocket subscribers
+through a shared ring buffer
+"""
+
+import os
+import time
+import asyncio
+import logging
+import contextlib
+import threading
+from typing import Any, Dict, Iterable, List, Optional
+
+from utils.metrics import EVENTS_PUBLISHED, EVENT_SUBSCRIBERS, EVENT_SUBSCRIBERS_DROPPED
+
+logger = logging.getLogger("broadcast")
+
+DEFAULT_CAPACITY = 1024
+DEFAULT_MAX_LAG = 256
+DEFAULT_SEND_TIMEOUT = 10.0
+
+
+class SlowConsumerError(Exception):
+    """Raised when a subscriber falls too far behind the newest event"""
+
+
+class Broadcaster:
+    """
+    Publishes events into a fixed-size ring buffer
+
+    Publishing writes one slot and wakes waiting subscribers, so its cost
+    does not depend on the number of subscribers. Each subscriber only
+    keeps a cursor into the ring; the events between its cursor and the
+    head are its send buffer, bounded by max_lag. A subscriber further
+    behind than that is dropped instead of holding events for it.
+
+    publish() may be called from any thread; subscribers run on the event
+    loop that created them.
+    """
+
+    def __init__(self, capacity: Optional[int] = None, max_lag: Optional[int] = None):
+        self.capacity = capacity or int(os.getenv("EVENT_BUFFER_SIZE", DEFAULT_CAPACITY))
+        self.max_lag = min(max_lag or int(os.getenv("EVENT_MAX_LAG", DEFAULT_MAX_LAG)), self.capacity)
+        self._ring: List[Optional[Dict[str, Any]]] = [None] * self.capacity
+        self._next_seq = 0
+        self._lock = threading.Lock()
+        self._loop: Optional[asyncio.AbstractEventLoop] = None
+        self._waiter: Optional[asyncio.Future] = None
+        self._subscribers = 0
+        self._dropped = 0
+
+    @property
+    def head(self) -> int:
+        """Sequence number the next published event will get"""
+        return self._next_seq
+
+    def publish(self, topic: str, data: Any) -> int:
+        """Append an event and wake subscribers; returns its sequence number"""
+        with self._lock:
+            seq = self._next_seq
+            self._ring[seq % self.capacity] = {
+                "seq": seq,
+                "topic": topic,
+                "timestamp": time.time(),
+                "data": data,
+            }
+            self._next_seq = seq + 1
+        EVENTS_PUBLISHED.inc(topic=topic)
+        self._wake()
+        return seq
+
+    def _wake(self):
+        loop = self._loop
+        if loop is None or loop.is_closed():
+            return
+        try:
+            on_loop = asyncio.get_running_loop() is loop
+        except RuntimeError:
+            on_loop = False
+        if on_loop:
+            self._resolve_waiter()
+        else:
+            loop.call_soon_threadsafe(self._resolve_waiter)
+
+    def _resolve_waiter(self):
+        waiter, self._waiter = self._waiter, None
+        if waiter is not None and not waiter.done():
+            waiter.set_result(None)
+
+    async def _wait_for(self, seq: int):
+        """Wait until an event with sequence number seq has been published"""
+        while self._next_seq <= seq:
+            if self._waiter is None:
+                self._loop = asyncio.get_running_loop()
+                self._waiter = self._loop.create_future()
+            await asyncio.shield(self._waiter)
+
+    def _read(self, cursor: int) -> List[Dict[str, Any]]:
+        with self._lock:
+            lag = self._next_seq - cursor
+            if lag > self.max_lag:
+                raise SlowConsumerError(f"Subscriber is {lag} events behind (max {self.max_lag})")
+            return [self._ring[seq % self.capacity] for seq in range(cursor, self._next_seq)]
+
+    def subscribe(self, topics: Optional[Iterable[str]] = None,
+                  since: Optional[int] = None) -> "Subscription":
+        """
+        Start a subscription at the head, or replay from since if those
+        events are still buffered
+        """
+        self._loop = asyncio.get_running_loop()
+        cursor = self._next_seq
+        if since is not None:
+            cursor = max(min(since, self._next_seq), self._next_seq - self.max_lag, 0)
+        return Subscription(self, cursor, topics)
+
+    def _attach(self):
+        self._subscribers += 1
+        EVENT_SUBSCRIBERS.inc()
+
+    def _detach(self, dropped: bool):
+        self._subscribers -= 1
+        EVENT_SUBSCRIBERS.dec()
+        if dropped:
+            self._dropped += 1
+            EVENT_SUBSCRIBERS_DROPPED.inc()
+
+    def get_stats(self) -> Dict[str, Any]:
+        return {
+            "capacity": self.capacity,
+            "max_lag": self.max_lag,
+            "published": self._next_seq,
+            "subscribers": self._subscribers,
+            "dropped_slow_consumers": self._dropped,
+        }
+
+
+class Subscription:
+    """A subscriber's cursor into a Broadcaster's ring buffer"""
+
+    def __init__(self, broadcaster: Broadcaster, cursor: int,
+                 topics: Optional[Iterable[str]] = None):
+        self.broadcaster = broadcaster
+        self.cursor = cursor
+        self.topics = set(topics) if topics else None
+
+    async def next_batch(self) -> List[Dict[str, Any]]:
+        """
+        Wait for and return every event published since the last batch
+
+        Raises:
+            SlowConsumerError: The subscriber fell more than max_lag
+                events behind
+        """
+        while True:
+            await self.broadcaster._wait_for(self.cursor)
+            events = self.broadcaster._read(self.cursor)
+            self.cursor += len(events)
+            if self.topics is not None:
+                events = [event for event in events if event["topic"] in self.topics]
+            if events:
+                return events
+
+
+def add_event_stream(app, broadcaster: Broadcaster, path: str = "/ws/events",
+                     send_timeout: float = DEFAULT_SEND_TIMEOUT):
+    """
+    Add a WebSocket endpoint that pushes broadcaster events to clients
+
+    Clients may pass ?topics=alerts,agent_status to filter and ?since=<seq>
+    to replay buffered events after a reconnect. The first message is a
+    hello object with the ring head and the client's cursor; every later
+    message is a JSON list of events. Clients that cannot keep up (lag beyond max_lag or a
+    send blocked for send_timeout) are closed with code 1013 and should
+    reconnect and resync over HTTP.
+    """
+    from fastapi import WebSocket, WebSocketDisconnect
+
+    @app.websocket(path)
+    async def event_stream(websocket: WebSocket):
+        topics = websocket.query_params.get("topics")
+        since = websocket.query_params.get("since")
+        await websocket.accept()
+        subscription = broadcaster.subscribe(
+            topics=topics.split(",") if topics else None,
+            since=int(since) if since and since.isdigit() else None,
+        )
+        broadcaster._attach()
+        dropped = False
+        batch = receiver = None
+        try:
+            # cursor > since means the requested events are gone: resync over HTTP
+            await websocket.send_json({"type": "hello", "head": broadcaster.head,
+                                       "cursor": subscription.cursor})
+            # Read side: notice client disconnects while waiting for events
+            receiver = asyncio.create_task(websocket.receive_text())
+            while True:
+                if batch is None:
+                    batch = asyncio.create_task(subscription.next_batch())
+                done, _ = await asyncio.wait({batch, receiver}, return_when=asyncio.FIRST_COMPLETED)
+                if receiver in done:
+                    receiver.result()
+                    receiver = asyncio.create_task(websocket.receive_text())
+                if batch in done:
+                    events, batch = batch.result(), None
+                    await asyncio.wait_for(websocket.send_json(events), send_timeout)
+        except (SlowConsumerError, asyncio.TimeoutError) as e:
+            dropped = True
+            logger.warning(f"Dropping slow event subscriber: {str(e) or 'send timed out'}")
+            with contextlib.suppress(Exception):
+                await websocket.close(code=1013, reason="slow consumer")
+        except WebSocketDisconnect:
+            pass
+        finally:
+            for task in (batch, receiver):
+                if task is not None:
+                    task.cancel()
+            broadcaster._detach(dropped)
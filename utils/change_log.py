@@ -0,0 +1,115 @@
+"""
+Change Log
+Monotonic change versions with tombstones, used by the vehicle and alert
+stores for ETags and ?since= delta sync
+"""
+
+import uuid
+import hashlib
+from collections import OrderedDict, deque
+from typing import Hashable, List, Optional, Tuple
+
+DEFAULT_MAX_TOMBSTONES = 10000
+
+
+class ResyncRequiredError(Exception):
+    """Raised when a delta is requested from a version the log no longer covers"""
+
+
+class ChangeLog:
+    """
+    Records the version at which each key last changed
+
+    Every change bumps a store-wide version. Keys are kept in version
+    order, so a delta since version N only walks the keys changed after
+    N. Clients see versions as "<epoch>-<N>" tokens, so a token from
+    before a server restart is never mistaken for a current one. Deleted keys stay as tombstones until more than max_tombstones
+    accumulate; a delta from before the oldest evicted tombstone raises
+    ResyncRequiredError. Not thread-safe: the owning store serialises
+    access under its own lock.
+    """
+
+    def __init__(self, max_tombstones: int = DEFAULT_MAX_TOMBSTONES):
+        self.max_tombstones = max_tombstones
+        # Changes between server restarts are not comparable
+        self.epoch = uuid.uuid4().hex[:8]
+        self.version = 0
+        self._entries: "OrderedDict[Hashable, Tuple[int, bool]]" = OrderedDict()
+        self._tombstones = deque()
+        self._horizon = 0
+
+    def record(self, key: Hashable, deleted: bool = False) -> int:
+        """Mark key as changed (or deleted) and return the new version"""
+        self.version += 1
+        self._entries[key] = (self.version, deleted)
+        self._entries.move_to_end(key)
+        if deleted:
+            self._tombstones.append((self.version, key))
+            self._evict_tombstones()
+        return self.version
+
+    def _evict_tombstones(self):
+        while len(self._tombstones) > self.max_tombstones:
+            version, key = self._tombstones.popleft()
+            # Skip tombstones for keys that were re-created since
+            if self._entries.get(key) == (version, True):
+                del self._entries[key]
+            self._horizon = max(self._horizon, version)
+
+    @property
+    def token(self) -> str:
+        """The current version as handed to clients"""
+        return f"{self.epoch}-{self.version}"
+
+    def _parse_token(self, token: str) -> int:
+        """Version number of a client token; "0" means from the beginning"""
+        if token == "0":
+            return 0
+        epoch, _, version = token.partition("-")
+        if epoch != self.epoch or not version.isdigit():
+            raise ResyncRequiredError(
+                f"Version {token} is not from this server run ({self.epoch}); reload the full list"
+            )
+        return int(version)
+
+    def changes_since(self, token: str) -> Tuple[List[Hashable], List[Hashable]]:
+        """
+        Keys changed and keys deleted after the version in token
+
+        Raises:
+            ResyncRequiredError: token is from another epoch (the server
+                restarted), newer than the current version or older than
+                the retained tombstones
+        """
+        since = self._parse_token(token)
+        if since > self.version or since < self._horizon:
+            raise ResyncRequiredError(
+                f"Version {token} is outside the retained change history "
+                f"({self._horizon}-{self.version}); reload the full list"
+            )
+        changed, deleted = [], []
+        for key, (version, is_deleted) in reversed(self._entries.items()):
+            if version <= since:
+                break
+            (deleted if is_deleted else changed).append(key)
+        changed.reverse()
+        deleted.reverse()
+        return changed, deleted
+
+    def etag(self, variant: str = "") -> str:
+        """Strong ETag for the current version of one representation (e.g. a query string)"""
+        digest = hashlib.sha1(variant.encode("utf-8")).hexdigest()[:12]
+        return f'"{self.epoch}-{self.version}-{digest}"'
+
+
+def etag_matches(if_none_match: Optional[str], etag: str) -> bool:
+    """Whether an If-None-Match header value matches etag"""
+    if not if_none_match:
+        return False
+    candidates = [tag.strip() for tag in if_none_match.split(",")]
+    return "*" in candidates or any(tag.removeprefix("W/") == etag for tag in candidates)
+
+
+def etag_headers(etag: str) -> dict:
+    """Response headers that make browsers revalidate with If-None-Match on every fetch"""
+    return {"ETag": etag, "Cache-Control": "no-cache"}
@@ -0,0 +1,41 @@
+"""
+Configuration Loader
+Reads the YAML files in config/ once per process
+"""
+
+from functools import lru_cache
+from pathlib import Path
+from typing import Any, Dict
+
+import yaml
+
+CONFIG_DIR = Path(__file__).parent.parent / "config"
+
+
+@lru_cache(maxsize=None)
+def load_config(name: str) -> Dict[str, Any]:
+    """
+    Load config/<name>.yaml
+
+    Returns an empty dict when the file does not exist so callers can
+    always fall back to their defaults.
+    """
+    path = CONFIG_DIR / f"{name}.yaml"
+    if not path.exists():
+        return {}
+    with open(path, encoding="utf-8") as f:
+        return yaml.safe_load(f) or {}
+
+
+def get_setting(name: str, key: str, default: Any = None) -> Any:
+    """
+    Look up a dotted key in a config file
+
+    Example: get_setting("database_config", "redis.cache_ttl_seconds", 3600)
+    """
+    value: Any = load_config(name)
+    for part in key.split("."):
+        if not isinstance(value, dict) or part not in value:
+            return default
+        value = value[part]
+    return value
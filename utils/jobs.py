@@ -0,0 +1,291 @@
+"""
+Background Jobs
+Runs long agent workflows outside the HTTP request and keeps their
+status, progress and result in a pluggable job store
+"""
+
+import os
+import json
+import time
+import uuid
+import sqlite3
+import asyncio
+import logging
+import threading
+from collections import OrderedDict
+from dataclasses import dataclass, field, asdict
+from enum import Enum
+from typing import Any, Awaitable, Callable, Dict, List, Optional
+
+logger = logging.getLogger("jobs")
+
+DEFAULT_MAX_RETAINED = 1000
+DEFAULT_RETENTION_SECONDS = 3600
+DEFAULT_MAX_RUNNING = 4
+
+
+class JobStatus(Enum):
+    PENDING = "pending"
+    RUNNING = "running"
+    SUCCEEDED = "succeeded"
+    FAILED = "failed"
+    CANCELLED = "cancelled"
+
+
+FINISHED_STATUSES = (JobStatus.SUCCEEDED, JobStatus.FAILED, JobStatus.CANCELLED)
+
+
+@dataclass
+class Job:
+    job_id: str
+    job_type: str
+    params: Dict[str, Any]
+    status: JobStatus = JobStatus.PENDING
+    progress: Dict[str, Any] = field(default_factory=dict)
+    result: Any = None
+    error: Optional[str] = None
+    created_at: float = field(default_factory=time.time)
+    started_at: Optional[float] = None
+    finished_at: Optional[float] = None
+
+    @property
+    def finished(self) -> bool:
+        return self.status in FINISHED_STATUSES
+
+    def to_dict(self) -> Dict[str, Any]:
+        data = asdict(self)
+        data["status"] = self.status.value
+        return data
+
+    @classmethod
+    def from_dict(cls, data: Dict[str, Any]) -> "Job":
+        data = dict(data)
+        data["status"] = JobStatus(data["status"])
+        return cls(**data)
+
+
+class InMemoryJobStore:
+    """
+    Job store backed by a dict
+
+    Finished jobs are dropped once they are older than retention_seconds,
+    and the oldest finished jobs are evicted beyond max_retained.
+    """
+
+    def __init__(self, max_retained: int = DEFAULT_MAX_RETAINED,
+                 retention_seconds: float = DEFAULT_RETENTION_SECONDS):
+        self.max_retained = max_retained
+        self.retention_seconds = retention_seconds
+        self._jobs: "OrderedDict[str, Job]" = OrderedDict()
+        self._lock = threading.Lock()
+
+    def save(self, job: Job):
+        with self._lock:
+            self._jobs[job.job_id] = job
+            if job.finished:
+                self._prune()
+
+    def get(self, job_id: str) -> Optional[Job]:
+        with self._lock:
+            return self._jobs.get(job_id)
+
+    def list(self, limit: int = 50) -> List[Job]:
+        with self._lock:
+            return list(reversed(self._jobs.values()))[:limit]
+
+    def count(self) -> int:
+        with self._lock:
+            return len(self._jobs)
+
+    def _prune(self):
+        cutoff = time.time() - self.retention_seconds
+        finished = [job for job in self._jobs.values() if job.finished]
+        excess = len(self._jobs) - self.max_retained
+        for job in finished:
+            expired = job.finished_at is not None and job.finished_at < cutoff
+            if expired or excess > 0:
+                del self._jobs[job.job_id]
+                excess -= 1
+
+
+class SQLiteJobStore:
+    """
+    Job store persisted to a local SQLite file
+
+    Same interface and retention rules as InMemoryJobStore. Jobs that were
+    still pending or running when the previous process exited are marked
+    failed on startup.
+    """
+
+    def __init__(self, path: str, max_retained: int = DEFAULT_MAX_RETAINED,
+                 retention_seconds: float = DEFAULT_RETENTION_SECONDS):
+        self.path = path
+        self.max_retained = max_retained
+        self.retention_seconds = retention_seconds
+        self._lock = threading.Lock()
+        self._conn = sqlite3.connect(path, check_same_thread=False)
+        self._conn.execute("PRAGMA journal_mode=WAL")
+        self._conn.execute(
+            """
+            CREATE TABLE IF NOT EXISTS jobs (
+                job_id TEXT PRIMARY KEY,
+                status TEXT NOT NULL,
+                created_at REAL NOT NULL,
+                finished_at REAL,
+                data TEXT NOT NULL
+            )
+            """
+        )
+        self._conn.execute("CREATE INDEX IF NOT EXISTS jobs_created ON jobs (created_at)")
+        self._fail_interrupted()
+        self._conn.commit()
+
+    def _fail_interrupted(self):
+        rows = self._conn.execute(
+            "SELECT data FROM jobs WHERE status IN (?, ?)",
+            (JobStatus.PENDING.value, JobStatus.RUNNING.value)
+        ).fetchall()
+        for (data,) in rows:
+            job = Job.from_dict(json.loads(data))
+            job.status = JobStatus.FAILED
+            job.error = "Interrupted by server restart"
+            job.finished_at = time.time()
+            self._write(job)
+
+    def _write(self, job: Job):
+        self._conn.execute(
+            "INSERT OR REPLACE INTO jobs (job_id, status, created_at, finished_at, data) "
+            "VALUES (?, ?, ?, ?, ?)",
+            (job.job_id, job.status.value, job.created_at, job.finished_at,
+             json.dumps(job.to_dict(), default=str))
+        )
+
+    def save(self, job: Job):
+        with self._lock:
+            self._write(job)
+            if job.finished:
+                self._prune()
+            self._conn.commit()
+
+    def get(self, job_id: str) -> Optional[Job]:
+        with self._lock:
+            row = self._conn.execute(
+                "SELECT data FROM jobs WHERE job_id = ?", (job_id,)
+            ).fetchone()
+        return Job.from_dict(json.loads(row[0])) if row else None
+
+    def list(self, limit: int = 50) -> List[Job]:
+        with self._lock:
+            rows = self._conn.execute(
+                "SELECT data FROM jobs ORDER BY created_at DESC LIMIT ?", (limit,)
+            ).fetchall()
+        return [Job.from_dict(json.loads(data)) for (data,) in rows]
+
+    def count(self) -> int:
+        with self._lock:
+            return self._conn.execute("SELECT COUNT(*) FROM jobs").fetchone()[0]
+
+    def _prune(self):
+        finished = tuple(status.value for status in FINISHED_STATUSES)
+        self._conn.execute(
+            "DELETE FROM jobs WHERE status IN (?, ?, ?) AND finished_at < ?",
+            (*finished, time.time() - self.retention_seconds)
+        )
+        self._conn.execute(
+            "DELETE FROM jobs WHERE job_id IN ("
+            "  SELECT job_id FROM jobs WHERE status IN (?, ?, ?)"
+            "  ORDER BY created_at LIMIT MAX(0, (SELECT COUNT(*) FROM jobs) - ?))",
+            (*finished, self.max_retained)
+        )
+
+
+def create_job_store():
+    """Build the job store selected by JOB_STORE (memory or sqlite)"""
+    max_retained = int(os.getenv("JOB_MAX_RETAINED", DEFAULT_MAX_RETAINED))
+    retention = float(os.getenv("JOB_RETENTION_SECONDS", DEFAULT_RETENTION_SECONDS))
+    if os.getenv("JOB_STORE", "memory").lower() == "sqlite":
+        path = os.getenv("JOB_STORE_PATH", "jobs.db")
+        return SQLiteJobStore(path, max_retained, retention)
+    return InMemoryJobStore(max_retained, retention)
+
+
+JobRunner = Callable[[Callable[[Dict[str, Any]], None]], Awaitable[Any]]
+
+
+class JobManager:
+    """
+    Runs jobs as asyncio tasks on the server's event loop
+
+    At most max_running jobs execute at once; the rest stay pending in
+    submission order.
+    """
+
+    def __init__(self, store=None, max_running: Optional[int] = None):
+        self.store = store or create_job_store()
+        self.max_running = max_running or int(os.getenv("JOB_MAX_RUNNING", DEFAULT_MAX_RUNNING))
+        self._slots = asyncio.Semaphore(self.max_running)
+        self._tasks: Dict[str, asyncio.Task] = {}
+
+    def submit(self, job_type: str, params: Dict[str, Any], runner: JobRunner) -> Job:
+        """
+        Queue a job
+
+        runner is called as runner(report_progress) and its return value
+        becomes the job result. report_progress(dict) updates job.progress.
+        """
+        job = Job(job_id=uuid.uuid4().hex, job_type=job_type, params=params)
+        self.store.save(job)
+        self._tasks[job.job_id] = asyncio.create_task(self._run(job, runner))
+        logger.info(f"Job submitted: {job.job_id} (Type: {job_type})")
+        return job
+
+    async def _run(self, job: Job, runner: JobRunner):
+        def report_progress(progress: Dict[str, Any]):
+            job.progress = progress
+            self.store.save(job)
+
+        try:
+            async with self._slots:
+                job.status = JobStatus.RUNNING
+                job.started_at = time.time()
+                self.store.save(job)
+                job.result = await runner(report_progress)
+                job.status = JobStatus.SUCCEEDED
+        except asyncio.CancelledError:
+            job.status = JobStatus.CANCELLED
+        except Exception as e:
+            job.status = JobStatus.FAILED
+            job.error = str(e)
+            logger.error(f"Job {job.job_id} failed: {str(e)}")
+        finally:
+            job.finished_at = time.time()
+            self.store.save(job)
+            self._tasks.pop(job.job_id, None)
+
+    def get(self, job_id: str) -> Optional[Job]:
+        return self.store.get(job_id)
+
+    def list(self, limit: int = 50) -> List[Job]:
+        return self.store.list(limit)
+
+    def cancel(self, job_id: str) -> bool:
+        """Cancel a pending or running job; returns False if it already finished"""
+        task = self._tasks.get(job_id)
+        if task is None or task.done():
+            return False
+        task.cancel()
+        return True
+
+    async def shutdown(self):
+        """Cancel every unfinished job and wait for them to record it"""
+        tasks = list(self._tasks.values())
+        for task in tasks:
+            task.cancel()
+        await asyncio.gather(*tasks, return_exceptions=True)
+
+    def get_stats(self) -> Dict[str, Any]:
+        return {
+            "max_running": self.max_running,
+            "active": len(self._tasks),
+            "stored": self.store.count(),
+        }
@@ -0,0 +1,331 @@
+"""
+Metrics
+Minimal in-process Prometheus-style metrics (counters, gauges,
+histograms) rendered in the text exposition format at /metrics
+"""
+
+import time
+import threading
+from abc import ABC, abstractmethod
+from contextlib import contextmanager
+from typing import Callable, Dict, List, Optional, Sequence, Tuple
+
+# Seconds; covers fast cache hits through multi-minute LLM pipelines
+DEFAULT_BUCKETS = (0.005, 0.01, 0.025, 0.05, 0.1, 0.25, 0.5, 1.0, 2.5, 5.0,
+                   10.0, 20.0, 30.0, 60.0, 120.0, 300.0)
+
+
+def _format_value(value: float) -> str:
+    if value == float("inf"):
+        return "+Inf"
+    if float(value).is_integer():
+        return str(int(value))
+    return repr(float(value))
+
+
+def _escape_label(value: str) -> str:
+    return str(value).replace("\\", "\\\\").replace('"', '\\"').replace("\n", "\\n")
+
+
+def _format_labels(names: Sequence[str], values: Sequence[str]) -> str:
+    if not names:
+        return ""
+    pairs = ",".join(f'{name}="{_escape_label(value)}"' for name, value in zip(names, values))
+    return "{" + pairs + "}"
+
+
+class _Metric(ABC):
+    metric_type = ""
+
+    def __init__(self, name: str, documentation: str, label_names: Sequence[str] = ()):
+        self.name = name
+        self.documentation = documentation
+        self.label_names = tuple(label_names)
+        self._lock = threading.Lock()
+
+    def _key(self, labels: Dict[str, str]) -> Tuple[str, ...]:
+        if set(labels) != set(self.label_names):
+            raise ValueError(f"{self.name} expects labels {self.label_names}, got {tuple(labels)}")
+        return tuple(str(labels[name]) for name in self.label_names)
+
+    def render(self) -> List[str]:
+        lines = [f"# HELP {self.name} {self.documentation}", f"# TYPE {self.name} {self.metric_type}"]
+        lines.extend(self._samples())
+        return lines
+
+    @abstractmethod
+    def _samples(self) -> List[str]:
+        """Exposition lines for every labelled series of the metric"""
+
+
+class Counter(_Metric):
+    """Monotonically increasing value"""
+
+    metric_type = "counter"
+
+    def __init__(self, *args, **kwargs):
+        super().__init__(*args, **kwargs)
+        self._values: Dict[Tuple[str, ...], float] = {}
+
+    def inc(self, amount: float = 1, **labels):
+        key = self._key(labels)
+        with self._lock:
+            self._values[key] = self._values.get(key, 0) + amount
+
+    def value(self, **labels) -> float:
+        with self._lock:
+            return self._values.get(self._key(labels), 0)
+
+    def _samples(self) -> List[str]:
+        with self._lock:
+            items = sorted(self._values.items())
+        return [f"{self.name}{_format_labels(self.label_names, key)} {_format_value(v)}"
+                for key, v in items]
+
+
+class Gauge(_Metric):
+    """Value that can go up and down"""
+
+    metric_type = "gauge"
+
+    def __init__(self, *args, **kwargs):
+        super().__init__(*args, **kwargs)
+        self._values: Dict[Tuple[str, ...], float] = {}
+
+    def set(self, value: float, **labels):
+        key = self._key(labels)
+        with self._lock:
+            self._values[key] = value
+
+    def inc(self, amount: float = 1, **labels):
+        key = self._key(labels)
+        with self._lock:
+            self._values[key] = self._values.get(key, 0) + amount
+
+    def dec(self, amount: float = 1, **labels):
+        self.inc(-amount, **labels)
+
+    def value(self, **labels) -> float:
+        with self._lock:
+            return self._values.get(self._key(labels), 0)
+
+    @contextmanager
+    def track_in_progress(self, **labels):
+        self.inc(**labels)
+        try:
+            yield
+        finally:
+            self.dec(**labels)
+
+    def _samples(self) -> List[str]:
+        with self._lock:
+            items = sorted(self._values.items())
+        return [f"{self.name}{_format_labels(self.label_names, key)} {_format_value(v)}"
+                for key, v in items]
+
+
+class Histogram(_Metric):
+    """Distribution of observations in fixed cumulative buckets"""
+
+    metric_type = "histogram"
+
+    def __init__(self, *args, buckets: Sequence[float] = DEFAULT_BUCKETS, **kwargs):
+        super().__init__(*args, **kwargs)
+        self.buckets = tuple(sorted(buckets)) + (float("inf"),)
+        # key -> (per-bucket counts, sum, count)
+        self._values: Dict[Tuple[str, ...], list] = {}
+
+    def observe(self, value: float, **labels):
+        key = self._key(labels)
+        with self._lock:
+            state = self._values.get(key)
+            if state is None:
+                state = self._values[key] = [[0] * len(self.buckets), 0.0, 0]
+            for i, bound in enumerate(self.buckets):
+                if value <= bound:
+                    state[0][i] += 1
+                    break
+            state[1] += value
+            state[2] += 1
+
+    @contextmanager
+    def time(self, **labels):
+        """Observe the wall time of the with-block in seconds"""
+        start = time.perf_counter()
+        try:
+            yield
+        finally:
+            self.observe(time.perf_counter() - start, **labels)
+
+    def count(self, **labels) -> int:
+        with self._lock:
+            state = self._values.get(self._key(labels))
+            return state[2] if state else 0
+
+    def quantile(self, q: float, **labels) -> Optional[float]:
+        """
+        Estimate the q-quantile (0-1) from the bucket counts
+
+        Interpolates linearly inside the bucket holding the target rank, as
+        Prometheus' histogram_quantile does. Observations above the largest
+        finite bucket are reported as that bound. None before any observation.
+        """
+        with self._lock:
+            state = self._values.get(self._key(labels))
+            if not state or not state[2]:
+                return None
+            counts, count = list(state[0]), state[2]
+        rank = q * count
+        cumulative = 0
+        for i, (bound, bucket_count) in enumerate(zip(self.buckets, counts)):
+            if bucket_count and cumulative + bucket_count >= rank:
+                if bound == float("inf"):
+                    return self.buckets[-2] if len(self.buckets) > 1 else None
+                lower = self.buckets[i - 1] if i > 0 else 0.0
+                return lower + (bound - lower) * (rank - cumulative) / bucket_count
+            cumulative += bucket_count
+        return None
+
+    def _samples(self) -> List[str]:
+        with self._lock:
+            items = sorted((key, [list(s[0]), s[1], s[2]]) for key, s in self._values.items())
+        lines = []
+        bucket_names = self.label_names + ("le",)
+        for key, (counts, total, count) in items:
+            cumulative = 0
+            for bound, bucket_count in zip(self.buckets, counts):
+                cumulative += bucket_count
+                labels = _format_labels(bucket_names, key + (_format_value(bound),))
+                lines.append(f"{self.name}_bucket{labels} {cumulative}")
+            labels = _format_labels(self.label_names, key)
+            lines.append(f"{self.name}_sum{labels} {_format_value(total)}")
+            lines.append(f"{self.name}_count{labels} {count}")
+        return lines
+
+
+class MetricsRegistry:
+    """Holds metrics and renders them for scraping"""
+
+    def __init__(self):
+        self._metrics: Dict[str, _Metric] = {}
+        self._collect_hooks: List[Callable[[], None]] = []
+        self._lock = threading.Lock()
+
+    def _register(self, metric: _Metric) -> _Metric:
+        with self._lock:
+            existing = self._metrics.get(metric.name)
+            if existing is not None:
+                return existing
+            self._metrics[metric.name] = metric
+            return metric
+
+    def counter(self, name: str, documentation: str, labels: Sequence[str] = ()) -> Counter:
+        return self._register(Counter(name, documentation, labels))
+
+    def gauge(self, name: str, documentation: str, labels: Sequence[str] = ()) -> Gauge:
+        return self._register(Gauge(name, documentation, labels))
+
+    def histogram(self, name: str, documentation: str, labels: Sequence[str] = (),
+                  buckets: Optional[Sequence[float]] = None) -> Histogram:
+        return self._register(Histogram(name, documentation, labels,
+                                        buckets=buckets or DEFAULT_BUCKETS))
+
+    def on_collect(self, hook: Callable[[], None]):
+        """Run hook before every render, e.g. to copy pool stats into gauges"""
+        self._collect_hooks.append(hook)
+
+    def render(self) -> str:
+        for hook in list(self._collect_hooks):
+            hook()
+        with self._lock:
+            metrics = list(self._metrics.values())
+        lines = []
+        for metric in metrics:
+            lines.extend(metric.render())
+        return "\n".join(lines) + "\n"
+
+
+registry = MetricsRegistry()
+
+# HTTP layer
+HTTP_REQUESTS = registry.counter(
+    "http_requests_total", "HTTP requests handled", ["method", "route", "status"])
+HTTP_REQUEST_DURATION = registry.histogram(
+    "http_request_duration_seconds", "Time until the response headers were sent",
+    ["method", "route"])
+HTTP_REQUESTS_IN_FLIGHT = registry.gauge(
+    "http_requests_in_flight", "HTTP requests currently being handled")
+HTTP_REQUEST_ERRORS = registry.counter(
+    "http_request_errors_total", "HTTP requests that ended in a 5xx or an unhandled exception",
+    ["method", "route"])
+
+# Agent layer
+AGENT_CALL_DURATION = registry.histogram(
+    "agent_call_duration_seconds", "Wall time of one agent call (checkout + LLM work)",
+    ["agent", "method"])
+AGENT_CALLS_IN_FLIGHT = registry.gauge(
+    "agent_calls_in_flight", "Agent calls currently executing", ["agent"])
+AGENT_CALL_ERRORS = registry.counter(
+    "agent_call_errors_total", "Agent calls that raised", ["agent", "method"])
+AGENT_TASK_DURATION = registry.histogram(
+    "agent_task_duration_seconds", "Wall time of one orchestrator task in an agent", ["agent"])
+AGENT_TASK_QUEUE_WAIT = registry.histogram(
+    "agent_task_queue_wait_seconds", "Time from task submission until an agent started it", ["agent"])
+LLM_REQUEST_DURATION = registry.histogram(
+    "llm_request_duration_seconds", "Wall time of one LLM request", ["agent"])
+LLM_TOKENS = registry.counter(
+    "llm_tokens_total", "LLM tokens consumed", ["agent", "kind"])
+LLM_REQUESTS_IN_FLIGHT = registry.gauge(
+    "llm_requests_in_flight", "LLM HTTP requests holding a concurrency slot")
+LLM_THROTTLE_WAIT = registry.histogram(
+    "llm_throttle_wait_seconds", "Time an LLM request waited for the rate limit and a concurrency slot",
+    ["model"])
+LLM_RATE_LIMITED = registry.counter(
+    "llm_rate_limited_total", "LLM requests the provider answered with 429", ["model"])
+LLM_CACHE_REQUESTS = registry.counter(
+    "llm_cache_requests_total", "LLM requests seen by the response cache", ["result"])
+
+# Event push
+EVENTS_PUBLISHED = registry.counter(
+    "events_published_total", "Events published to push subscribers", ["topic"])
+EVENT_SUBSCRIBERS = registry.gauge(
+    "event_subscribers", "Connected push subscribers")
+EVENT_SUBSCRIBERS_DROPPED = registry.counter(
+    "event_subscribers_dropped_total", "Push subscribers disconnected for falling behind")
+
+CONTENT_TYPE = "text/plain; version=0.0.4; charset=utf-8"
+
+
+def instrument_app(app, metrics_path: str = "/metrics"):
+    """
+    Add request metrics middleware and a scrape endpoint to a FastAPI app
+
+    Routes are labelled by their path template (e.g. /api/vehicles/{vehicle_id})
+    so label cardinality stays bounded.
+    """
+    from fastapi import Request
+    from fastapi.responses import PlainTextResponse
+
+    @app.middleware("http")
+    async def record_request_metrics(request: Request, call_next):
+        method = request.method
+        start = time.perf_counter()
+        HTTP_REQUESTS_IN_FLIGHT.inc()
+        status = 500
+        try:
+            response = await call_next(request)
+            status = response.status_code
+            return response
+        finally:
+            HTTP_REQUESTS_IN_FLIGHT.dec()
+            route = request.scope.get("route")
+            route_path = getattr(route, "path", "unmatched")
+            HTTP_REQUEST_DURATION.observe(
+                time.perf_counter() - start, method=method, route=route_path)
+            HTTP_REQUESTS.inc(method=method, route=route_path, status=status)
+            if status >= 500:
+                HTTP_REQUEST_ERRORS.inc(method=method, route=route_path)
+
+    @app.get(metrics_path, include_in_schema=False)
+    def metrics():
+        return PlainTextResponse(registry.render(), media_type=CONTENT_TYPE)
@@ -0,0 +1,17 @@
+"""
+Streaming Helpers
+Wire formats for streamed API responses
+"""
+
+import json
+from typing import Any
+
+
+def sse_event(event: str, data: Any) -> str:
+    """Format one Server-Sent Events message with a JSON payload"""
+    return f"event: {event}\ndata: {json.dumps(data, default=str)}\n\n"
+
+
+def ndjson_line(data: Any) -> str:
+    """Format one newline-delimited JSON record"""
+    return json.dumps(data, default=str) + "\n"
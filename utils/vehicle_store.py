@@ -0,0 +1,236 @@
+"""
+Vehicle Store
+In-memory vehicle registry with secondary indexes, cursor pagination,
+field projection and change versions for the fleet list endpoints
+"""
+
+import base64
+import heapq
+import bisect
+import threading
+from typing import Any, Dict, Iterable, List, Optional, Set
+
+from utils.change_log import ChangeLog
+
+# Fields with an exact-match index; values are matched case-insensitively
+INDEXED_FIELDS = ("type", "model", "year", "severity")
+
+DEFAULT_PAGE_SIZE = 100
+MAX_PAGE_SIZE = 1000
+
+
+class InvalidCursorError(ValueError):
+    """Raised when a pagination cursor cannot be decoded"""
+
+
+def encode_cursor(vehicle_id: str) -> str:
+    return base64.urlsafe_b64encode(vehicle_id.encode("utf-8")).decode("ascii")
+
+
+def decode_cursor(cursor: str) -> str:
+    try:
+        vehicle_id = base64.b64decode(cursor, altchars=b"-_", validate=True).decode("utf-8")
+    except Exception:
+        vehicle_id = ""
+    if not vehicle_id:
+        raise InvalidCursorError(f"Invalid cursor: {cursor}")
+    return vehicle_id
+
+
+def _index_key(value: Any) -> str:
+    return str(value).strip().lower()
+
+
+class VehicleStore:
+    """
+    Vehicles keyed by vehicle_id, kept in ID order for keyset pagination
+
+    Every vehicle also carries a derived "severity" (from the threshold
+    rules) that can be filtered on and projected like a stored field.
+    Every insert, update and delete is recorded in self.changes.
+    """
+
+    def __init__(self, vehicles: Optional[Iterable[Dict[str, Any]]] = None):
+        self._lock = threading.RLock()
+        self._vehicles: Dict[str, Dict[str, Any]] = {}
+        self._severity: Dict[str, str] = {}
+        self._ids: List[str] = []
+        self._indexes: Dict[str, Dict[str, Set[str]]] = {name: {} for name in INDEXED_FIELDS}
+        self.changes = ChangeLog()
+        if vehicles:
+            self.bulk_load(vehicles)
+
+    def bulk_load(self, vehicles: Iterable[Dict[str, Any]]):
+        """Insert many vehicles, scoring severity for all of them in one pass"""
+        from agents.data_analysis_agent.rules import evaluate_fleet
+
+        vehicles = list(vehicles)
+        findings = evaluate_fleet(vehicles)
+        with self._lock:
+            for vehicle, result in zip(vehicles, findings):
+                self._put(vehicle, result["severity"])
+
+    def upsert(self, vehicle: Dict[str, Any]):
+        """Insert or replace a vehicle and refresh its index entries"""
+        from agents.data_analysis_agent.rules import evaluate_vehicle
+
+        severity = evaluate_vehicle(vehicle)["severity"]
+        with self._lock:
+            self._put(vehicle, severity)
+
+    def delete(self, vehicle_id: str) -> bool:
+        with self._lock:
+            if vehicle_id not in self._vehicles:
+                return False
+            self._unindex(vehicle_id)
+            del self._vehicles[vehicle_id]
+            del self._severity[vehicle_id]
+            del self._ids[bisect.bisect_left(self._ids, vehicle_id)]
+            self.changes.record(vehicle_id, deleted=True)
+            return True
+
+    def _put(self, vehicle: Dict[str, Any], severity: str):
+        vehicle_id = vehicle["vehicle_id"]
+        if vehicle_id in self._vehicles:
+            self._unindex(vehicle_id)
+        else:
+            bisect.insort(self._ids, vehicle_id)
+        self._vehicles[vehicle_id] = vehicle
+        self._severity[vehicle_id] = severity
+        for name in INDEXED_FIELDS:
+            key = _index_key(self._field(vehicle_id, name))
+            self._indexes[name].setdefault(key, set()).add(vehicle_id)
+        self.changes.record(vehicle_id)
+
+    def _unindex(self, vehicle_id: str):
+        for name in INDEXED_FIELDS:
+            key = _index_key(self._field(vehicle_id, name))
+            bucket = self._indexes[name].get(key)
+            if bucket is not None:
+                bucket.discard(vehicle_id)
+                if not bucket:
+                    del self._indexes[name][key]
+
+    def _field(self, vehicle_id: str, name: str) -> Any:
+        if name == "severity":
+            return self._severity[vehicle_id]
+        return self._vehicles[vehicle_id].get(name)
+
+    def get(self, vehicle_id: str) -> Optional[Dict[str, Any]]:
+        with self._lock:
+            return self._vehicles.get(vehicle_id)
+
+    def all(self) -> Dict[str, Dict[str, Any]]:
+        with self._lock:
+            return dict(self._vehicles)
+
+    def __len__(self) -> int:
+        return len(self._vehicles)
+
+    @property
+    def version(self) -> str:
+        """Version token for ?since= (see ChangeLog)"""
+        with self._lock:
+            return self.changes.token
+
+    def etag(self, variant: str = "") -> str:
+        with self._lock:
+            return self.changes.etag(variant)
+
+    def project(self, vehicle_id: str, fields: Optional[List[str]] = None) -> Dict[str, Any]:
+        """A vehicle record limited to fields (vehicle_id is always included)"""
+        vehicle = self._vehicles[vehicle_id]
+        if not fields:
+            return vehicle
+        projected = {"vehicle_id": vehicle_id}
+        for name in fields:
+            if name == "severity":
+                projected[name] = self._severity[vehicle_id]
+            elif name in vehicle:
+                projected[name] = vehicle[name]
+        return projected
+
+    def query(self, filters: Optional[Dict[str, Any]] = None, cursor: Optional[str] = None,
+              limit: int = DEFAULT_PAGE_SIZE, fields: Optional[List[str]] = None) -> Dict[str, Any]:
+        """
+        Page through vehicles in vehicle_id order
+
+        Args:
+            filters: Exact-match filters on INDEXED_FIELDS (None values ignored)
+            cursor: next_cursor from the previous page
+            limit: Page size, capped at MAX_PAGE_SIZE
+            fields: Optional projection
+
+        Returns:
+            Dict with the store version, vehicles, total (matching
+            vehicles) and next_cursor (None on the last page)
+        """
+        filters = {k: v for k, v in (filters or {}).items() if v is not None}
+        unknown = set(filters) - set(INDEXED_FIELDS)
+        if unknown:
+            raise ValueError(f"Cannot filter on: {', '.join(sorted(unknown))}")
+        limit = max(1, min(limit, MAX_PAGE_SIZE))
+        after = decode_cursor(cursor) if cursor else None
+
+        with self._lock:
+            if filters:
+                candidates = self._match(filters)
+                total = len(candidates)
+                remaining = (vid for vid in candidates if after is None or vid > after)
+                page = heapq.nsmallest(limit + 1, remaining)
+            else:
+                total = len(self._ids)
+                start = bisect.bisect_right(self._ids, after) if after is not None else 0
+                page = self._ids[start:start + limit + 1]
+
+            has_more = len(page) > limit
+            page = page[:limit]
+            return {
+                "version": self.changes.token,
+                "vehicles": [self.project(vid, fields) for vid in page],
+                "total": total,
+                "next_cursor": encode_cursor(page[-1]) if has_more else None,
+            }
+
+    def changes_since(self, since: str, fields: Optional[List[str]] = None) -> Dict[str, Any]:
+        """
+        Vehicles changed and IDs deleted after the version token since
+
+        Raises:
+            ResyncRequiredError: The change log no longer covers since
+        """
+        with self._lock:
+            changed, deleted = self.changes.changes_since(since)
+            return {
+                "version": self.changes.token,
+                "changed": [self.project(vid, fields) for vid in changed],
+                "deleted": deleted,
+            }
+
+    def _match(self, filters: Dict[str, Any]) -> Set[str]:
+        """Intersect index buckets, smallest first"""
+        buckets = sorted(
+            (self._indexes[name].get(_index_key(value), set()) for name, value in filters.items()),
+            key=len,
+        )
+        result = set(buckets[0])
+        for bucket in buckets[1:]:
+            result &= bucket
+            if not result:
+                break
+        return result
+
+
+_default_store: Optional[VehicleStore] = None
+_default_store_lock = threading.Lock()
+
+
+def get_vehicle_store() -> VehicleStore:
+    """Process-wide store, loaded from the mock vehicle data on first use"""
+    global _default_store
+    if _default_store is None:
+        with _default_store_lock:
+            if _default_store is None:
+                from utils.mock_data import VEHICLES
+                _default_store = VehicleStore(VEHICLES.values())
+    return _default_store